@@ -0,0 +1,143 @@
+# Scaling of the phases of SemanticGraphBuilder.build on synthetic repositories of several sizes.
+# Every scale is generated with benchmarks/synthetic_repo.py (the same files for the same scale),
+# built once with the profiler and the reports are stored as JSON with the git revision,
+# so the results of two revisions can be compared.
+# The allocations are not traced, so the times are not slowed down; every scale is built in its own process,
+# so the peak memory (the peak resident set size of the process) belongs to this scale only.
+# Usage: python benchmarks/bench_build.py run <results.json> [scales, e.g. 100,1000,10000,50000]
+#        python benchmarks/bench_build.py compare <old_results.json> <new_results.json>
+#        python benchmarks/bench_build.py measure <path_to_repo> <report.json>  (one build, used by "run")
+import json
+import math
+import os
+import subprocess
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from main import SemanticGraphBuilder  # Builder of the semantic graph
+from synthetic_repo import generate  # Synthetic repositories
+
+DEFAULT_SCALES = [100, 300, 1000]  # Numbers of the generated modules, larger ones are given explicitly
+
+
+def revision():
+    # Git revision of the benchmarked code
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__)), check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+def measure(path, report_path):
+    # Profile one build in the current process and write the report
+    report = SemanticGraphBuilder().build_from_one(path, os.path.dirname(report_path), profile=True)
+    with open(report_path, 'w', encoding='utf-8') as f:
+        json.dump(report, f)
+
+
+def run(scales):
+    # Profile the build of the synthetic repository of every scale, each one in a new process
+    results = {'revision': revision(), 'scales': {}}
+    for files in scales:
+        with tempfile.TemporaryDirectory() as folder:
+            path = os.path.join(folder, f'synthetic_{files}')
+            generate(path, files)
+            report_path = os.path.join(folder, 'report.json')
+            subprocess.run([sys.executable, os.path.abspath(__file__), 'measure', path, report_path], check=True)
+            with open(report_path, encoding='utf-8') as f:
+                report = json.load(f)
+        results['scales'][str(files)] = {
+            'wall_time': report['wall_time'],
+            'cpu_time': report['cpu_time'],
+            'peak_memory': report['peak_memory'],
+            'phases': {phase['name']: phase for phase in report['phases']}
+        }
+        print(f"{files:>7} files: {report['wall_time']:8.2f} s, peak {memory_cell(report['peak_memory'], 11)}")
+    return results
+
+
+def megabytes(value):
+    # Memory in megabytes, None if it was not measured (see profiling.peak_rss)
+    return None if value is None else value / 2 ** 20
+
+
+def memory_cell(value, width):
+    # Memory for the tables, "-" if it was not measured
+    if value is None:
+        return f"{'-':>{width}}"
+    return f"{megabytes(value):>{width - 3}.1f} MB"
+
+
+def exponent(small, large, small_time, large_time):
+    # Growth of the time with the size: 1 is linear, 2 is quadratic
+    if small_time <= 0 or large_time <= 0:
+        return float('nan')
+    return math.log(large_time / small_time) / math.log(large / small)
+
+
+def print_scaling(results):
+    # Time and memory of every phase at every scale with the growth between the scales
+    scales = sorted(results['scales'], key=int)
+    phases = []
+    for scale in scales:
+        for name in results['scales'][scale]['phases']:
+            if name not in phases:
+                phases.append(name)
+
+    print(f"revision {results['revision']}")
+    print(f"{'phase':<16}" + ''.join(f"{scale + ' files':>16}" for scale in scales) + f"{'growth':>10}")
+    for name in phases + ['total']:
+        times = []
+        for scale in scales:
+            data = results['scales'][scale]
+            times.append(data['wall_time'] if name == 'total' else data['phases'].get(name, {}).get('wall_time'))
+        cells = ''.join(f"{t:>14.3f} s" if t is not None else f"{'-':>16}" for t in times)
+        growth = ''
+        if len(scales) > 1 and times[0] is not None and times[-1] is not None:
+            growth = f"n^{exponent(int(scales[0]), int(scales[-1]), times[0], times[-1]):.2f}"
+        print(f"{name:<16}{cells}{growth:>10}")
+    print(f"{'peak memory':<16}" + ''.join(memory_cell(results['scales'][scale]['peak_memory'], 16)
+                                           for scale in scales))
+
+
+def compare(old, new):
+    # Relative change of the time of every phase between two stored results
+    print(f"{old['revision']} -> {new['revision']}")
+    for scale in sorted(set(old['scales']) & set(new['scales']), key=int):
+        print(f"{scale} files:")
+        old_phases = old['scales'][scale]['phases']
+        new_phases = new['scales'][scale]['phases']
+        rows = [(name, old_phases[name]['wall_time'], new_phases[name]['wall_time'])
+                for name in new_phases if name in old_phases]
+        rows.append(('total', old['scales'][scale]['wall_time'], new['scales'][scale]['wall_time']))
+        rows.append(('peak memory, MB', megabytes(old['scales'][scale]['peak_memory']),
+                     megabytes(new['scales'][scale]['peak_memory'])))
+        for name, before, after in rows:
+            if before is None or after is None:
+                # Not measured by one of the runs
+                cells = ''.join(f"{'-':>14}" if value is None else f"{value:>14.3f}" for value in (before, after))
+                print(f"  {name:<16}{cells}")
+                continue
+            change = (after - before) / before if before else float('nan')
+            print(f"  {name:<16}{before:>14.3f}{after:>14.3f}{change:>+10.1%}")
+
+
+if __name__ == "__main__":
+    if sys.argv[1] == 'compare':
+        with open(sys.argv[2], encoding='utf-8') as f:
+            old_results = json.load(f)
+        with open(sys.argv[3], encoding='utf-8') as f:
+            new_results = json.load(f)
+        compare(old_results, new_results)
+    elif sys.argv[1] == 'measure':
+        measure(sys.argv[2], sys.argv[3])
+    else:
+        scales = [int(scale) for scale in sys.argv[3].split(',')] if len(sys.argv) > 3 else DEFAULT_SCALES
+        results = run(scales)
+        with open(sys.argv[2], 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+        print_scaling(results)
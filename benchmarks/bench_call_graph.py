@@ -0,0 +1,36 @@
+# Benchmark of the Invoke edges: the call graph of code2flow (a second parse of the repository)
+# against the native call graph built from the calls extracted from the tree-sitter trees.
+# Usage: python benchmarks/bench_call_graph.py <path_to_repo> [save_folder]
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from main import SemanticGraphBuilder  # Builder of the semantic graph
+
+
+def build(path, save_folder, call_graph):
+    # Build the graph with the given source of the calls, return the time and the Invoke edges
+    builder = SemanticGraphBuilder()
+    start = time.perf_counter()
+    builder.build_from_one(path, save_folder, call_graph=call_graph)
+    elapsed = time.perf_counter() - start
+    invokes = {(u, v) for u, v, data in builder.graph.edges(data=True) if data.get('type') == 'Invoke'}
+    return elapsed, len(builder.graph.edges), invokes
+
+
+if __name__ == "__main__":
+    path = sys.argv[1]
+    save_folder = sys.argv[2] if len(sys.argv) > 2 else "."
+
+    code2flow_time, code2flow_edges, code2flow_invokes = build(path, save_folder, 'code2flow')
+    native_time, native_edges, native_invokes = build(path, save_folder, 'native')
+    common = code2flow_invokes & native_invokes
+
+    print(f"code2flow: {code2flow_time:8.2f} s, {code2flow_edges} edges, {len(code2flow_invokes)} invokes")
+    print(f"native:    {native_time:8.2f} s, {native_edges} edges, {len(native_invokes)} invokes")
+    print(f"speedup: {code2flow_time / native_time:.1f}x")
+    print(f"common invokes: {len(common)}, "
+          f"recall {len(common) / max(len(code2flow_invokes), 1):.1%}, "
+          f"precision {len(common) / max(len(native_invokes), 1):.1%} (against code2flow)")
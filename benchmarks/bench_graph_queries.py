@@ -0,0 +1,58 @@
+# Questions over a built graph: scanning graph.edges(data=True) for every question against GraphQuery.
+# Usage: python benchmarks/bench_graph_queries.py <path_to_repo> [save_folder] [questions]
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from main import SemanticGraphBuilder  # Builder of the semantic graph
+
+
+def scan_invoked_by(graph, node):
+    # Who invokes the node, by scanning all the edges
+    return [u for u, v, data in graph.edges(data=True) if data.get('type') == 'Invoke' and v == node]
+
+
+def scan_subclasses(graph, node):
+    # All subclasses of the class, by scanning all the edges for every level
+    result = []
+    stack = [node]
+    while stack:
+        current = stack.pop()
+        for u, v, data in graph.edges(data=True):
+            if data.get('type') == 'Class Hierarchy' and v == current and u not in result:
+                result.append(u)
+                stack.append(u)
+    return result
+
+
+def measure(function, nodes):
+    # Time of the answers for all the nodes
+    start = time.perf_counter()
+    answers = [function(node) for node in nodes]
+    return time.perf_counter() - start, answers
+
+
+if __name__ == "__main__":
+    path = sys.argv[1]
+    save_folder = sys.argv[2] if len(sys.argv) > 2 else "."
+    questions = int(sys.argv[3]) if len(sys.argv) > 3 else 200
+
+    builder = SemanticGraphBuilder()
+    builder.build_from_one(path, save_folder)
+    graph = builder.graph
+    nodes = list(graph)[::max(1, len(graph) // questions)][:questions]
+
+    start = time.perf_counter()
+    query = builder.query()
+    index_time = time.perf_counter() - start
+    print(f"index: {index_time * 1000:.1f} ms for {graph.number_of_edges()} edges")
+
+    for name, scan, lookup in (('invoked_by', scan_invoked_by, query.invoked_by),
+                               ('subclasses', scan_subclasses, query.subclasses)):
+        scan_time, scan_answers = measure(lambda node: scan(graph, node), nodes)
+        query_time, query_answers = measure(lookup, nodes)
+        same = all(sorted(a) == sorted(b) for a, b in zip(scan_answers, query_answers))
+        print(f"{name:<12} scan: {scan_time / len(nodes) * 1e6:10.1f} us/question, "
+              f"index: {query_time / len(nodes) * 1e6:8.2f} us/question, same answers: {same}")
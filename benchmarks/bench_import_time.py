@@ -0,0 +1,45 @@
+# Start-up cost of the builder: the time of "import main" in a fresh interpreter (python -X importtime),
+# against importing also the heavy dependencies which main.py used to load eagerly.
+# Usage: python benchmarks/bench_import_time.py [repeats]
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))  # Folder of main.py
+
+# Modules which main.py imported at load time before they were moved into the phases which use them
+EAGER_MODULES = ['json', 'pprint', 'concurrent.futures.process', 'PIL.Image', 'code2flow', 'serialization',
+                 'rendering', 'corpus', 'query', 'extraction_cache']
+
+
+def import_time(statement):
+    # Microseconds of the imports of the statement in a new interpreter, from the report of -X importtime
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', statement], cwd=ROOT,
+                            capture_output=True, text=True, check=True)
+    total = 0
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or '|' not in line:
+            continue
+        _, cumulative, name = line.split('|')
+        if name.startswith('  '):
+            continue  # Only the top-level imports (the nested ones are indented)
+        if cumulative.strip().isdigit():
+            total += int(cumulative)
+    return total
+
+
+def measure(statement, repeats):
+    # Median import time of the statement (the first run also compiles the caches, it is not counted)
+    import_time(statement)
+    return statistics.median(import_time(statement) for _ in range(repeats))
+
+
+if __name__ == "__main__":
+    repeats = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    baseline = measure('pass', repeats)  # Imports of the interpreter itself
+    lazy = measure('import main', repeats) - baseline
+    eager = measure('import main, ' + ', '.join(EAGER_MODULES), repeats) - baseline
+    print(f"import main:                          {lazy / 1000:8.1f} ms")
+    print(f"import main with the eager modules:   {eager / 1000:8.1f} ms")
+    print(f"saved per process:                    {(eager - lazy) / 1000:8.1f} ms")
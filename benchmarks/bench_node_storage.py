@@ -0,0 +1,58 @@
+# Memory of the built graph with the body attributes against the compact node store.
+# The memory which stays allocated after the build is measured by tracemalloc, in total
+# and without the suffix index of the names (which is the same in both modes).
+# Usage: python benchmarks/bench_node_storage.py <path_to_repo> [save_folder]
+import gc
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from main import SemanticGraphBuilder  # Builder of the semantic graph
+
+
+def build(path, save_folder, compact):
+    # Build the graph in the given mode, return the builder, the retained memory (total, without the index)
+    # and the time
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    builder = SemanticGraphBuilder(compact=compact)
+    builder.build_from_one(path, save_folder)
+    elapsed = time.perf_counter() - start
+    gc.collect()
+    snapshot = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    total = sum(stat.size for stat in snapshot.statistics('filename'))
+    without_index = sum(stat.size for stat in snapshot.filter_traces(
+        [tracemalloc.Filter(False, '*indexes.py')]).statistics('filename'))
+    return builder, (total, without_index), elapsed
+
+
+def source_size(path):
+    # Size of the python files of the repository
+    return sum(os.path.getsize(os.path.join(root, file))
+               for root, _, files in os.walk(path) for file in files if file.endswith('.py'))
+
+
+if __name__ == "__main__":
+    path = sys.argv[1]
+    save_folder = sys.argv[2] if len(sys.argv) > 2 else "."
+
+    full, full_memory, full_time = build(path, save_folder, False)
+    compact, compact_memory, compact_time = build(path, save_folder, True)
+
+    # Bodies read lazily from the sources
+    start = time.perf_counter()
+    for node in compact.node_store.rows:
+        compact.get_body(node)
+    bodies_time = time.perf_counter() - start
+
+    print(f"nodes: {len(full.graph.nodes)}, source: {source_size(path) / 2 ** 20:.1f} MB")
+    print(f"body attributes: {full_memory[0] / 2 ** 20:8.1f} MB, "
+          f"{full_memory[1] / 2 ** 20:8.1f} MB without index, build {full_time:.2f} s")
+    print(f"compact store:   {compact_memory[0] / 2 ** 20:8.1f} MB, "
+          f"{compact_memory[1] / 2 ** 20:8.1f} MB without index, build {compact_time:.2f} s")
+    print(f"all bodies read lazily in {bodies_time:.2f} s")
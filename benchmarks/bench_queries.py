@@ -0,0 +1,84 @@
+# Micro-benchmark of the per-file query cost: queries compiled for every file (as the passes did before)
+# against the precompiled QueryRegistry with the merged import query.
+# Usage: python benchmarks/bench_queries.py <path_to_repo> [repeats]
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import tree_sitter_python as tspython  # Tree-sitter parser for Python
+from tree_sitter import Language, Parser  # For parsing
+from queries import QUERY_SOURCES, QueryRegistry  # Precompiled queries
+
+# The four import queries which were compiled separately for every file
+LEGACY_IMPORT_QUERIES = [
+    """
+    (import_statement name: (dotted_name) @file.name)
+    (import_from_statement module_name: (dotted_name) @script.name name: (dotted_name) @imports)
+    """,
+    """
+    (import_statement name: (aliased_import) @file)
+    (import_from_statement module_name: (dotted_name) @script.name name: (aliased_import) @imports)
+    """,
+    """
+    (import_from_statement module_name: (dotted_name) @script.name (wildcard_import))
+    """,
+    """
+    (import_from_statement module_name: (relative_import) @script.name name: (dotted_name) @imports)
+    """
+]
+
+
+def collect_trees(path, parser):
+    # Parse every python file of the repository once, parsing is not a part of the measurement
+    trees = []
+    for root, _, files in os.walk(path):
+        for file in files:
+            if file.endswith('.py'):
+                with open(os.path.join(root, file), 'rb') as f:
+                    trees.append(parser.parse(f.read()))
+    return trees
+
+
+def run_legacy(language, trees):
+    # Compile every query for every file and run the import queries one by one
+    for tree in trees:
+        language.query(QUERY_SOURCES['definitions']).captures(tree.root_node)
+        for source in LEGACY_IMPORT_QUERIES:
+            language.query(source).captures(tree.root_node)
+        language.query(QUERY_SOURCES['superclasses']).captures(tree.root_node)
+
+
+def run_registry(language, trees):
+    # Compile the queries once and run the merged import query in a single pass
+    queries = QueryRegistry(language)
+    for tree in trees:
+        queries.captures('definitions', tree.root_node)
+        queries.captures('imports', tree.root_node)
+        queries.captures('superclasses', tree.root_node)
+
+
+def measure(function, language, trees, repeats):
+    # Best time of several runs
+    best = float('inf')
+    for _ in range(repeats):
+        start = time.perf_counter()
+        function(language, trees)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+if __name__ == "__main__":
+    language = Language(tspython.language())
+    trees = collect_trees(sys.argv[1], Parser(language))
+    repeats = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+
+    legacy = measure(run_legacy, language, trees, repeats)
+    registry = measure(run_registry, language, trees, repeats)
+
+    print(f"files: {len(trees)}")
+    print(f"per-file queries:   {legacy / len(trees) * 1e6:10.1f} us/file")
+    print(f"precompiled merged: {registry / len(trees) * 1e6:10.1f} us/file")
+    print(f"speedup: {legacy / registry:.1f}x")
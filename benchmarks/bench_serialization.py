@@ -0,0 +1,53 @@
+# Size and speed of the saved graph: GML (nx.write_gml / nx.read_gml) against the binary format.
+# Usage: python benchmarks/bench_serialization.py <path_to_repo> [save_folder] [repeats]
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import networkx as nx  # For GML
+from main import SemanticGraphBuilder  # Builder of the semantic graph
+from serialization import save_binary_graph, load_binary_graph  # Binary format
+
+
+def measure(function, repeats):
+    # Best time of several runs and the result of the last one
+    best = float('inf')
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = function()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def same_graph(first, second):
+    # Check that the nodes, edges, keys and attributes are equal
+    return dict(first.nodes(data=True)) == dict(second.nodes(data=True)) and \
+        sorted(first.edges(keys=True, data=True), key=repr) == sorted(second.edges(keys=True, data=True), key=repr)
+
+
+if __name__ == "__main__":
+    path = sys.argv[1]
+    save_folder = sys.argv[2] if len(sys.argv) > 2 else "."
+    repeats = int(sys.argv[3]) if len(sys.argv) > 3 else 3
+
+    builder = SemanticGraphBuilder()
+    builder.build_from_one(path, save_folder)
+    graph = builder.graph
+    gml_path = os.path.join(save_folder, 'bench.gml')
+    binary_path = os.path.join(save_folder, 'bench.sgb')
+
+    gml_write, _ = measure(lambda: nx.write_gml(graph, gml_path), repeats)
+    gml_read, gml_graph = measure(lambda: nx.read_gml(gml_path), repeats)
+    binary_write, _ = measure(lambda: save_binary_graph(graph, binary_path), repeats)
+    binary_read, binary_graph = measure(lambda: load_binary_graph(binary_path), repeats)
+    binary_read_copy, _ = measure(lambda: load_binary_graph(binary_path, use_mmap=False), repeats)
+
+    print(f"graph: {len(graph.nodes)} nodes, {len(graph.edges)} edges")
+    print(f"GML:    {os.path.getsize(gml_path) / 2 ** 20:7.2f} MB, write {gml_write:.3f} s, read {gml_read:.3f} s, "
+          f"exact round-trip: {same_graph(graph, gml_graph)}")
+    print(f"binary: {os.path.getsize(binary_path) / 2 ** 20:7.2f} MB, write {binary_write:.3f} s, "
+          f"read {binary_read:.3f} s (mmap), {binary_read_copy:.3f} s (read), "
+          f"exact round-trip: {same_graph(graph, binary_graph)}")
+    print(f"load speedup: {gml_read / binary_read:.1f}x")
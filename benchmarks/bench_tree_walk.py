@@ -0,0 +1,152 @@
+# Benchmark of the extraction of the records of the files: the query passes (definitions with the replay of
+# the sorted open and close records, imports, superclasses with the two-pointer merge, calls) which the builder
+# used before against the single TreeCursor walk of walk_tree, with a check that both give the same records.
+# Usage: python benchmarks/bench_tree_walk.py <path_to_repo> [repeats]
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import tree_sitter_python as tspython  # Tree-sitter parser for Python
+from tree_sitter import Language, Parser  # For parsing
+from parsing import FileExtraction, walk_tree  # The single walk
+from queries import QueryRegistry  # Precompiled queries of the query passes
+
+
+def collect_trees(path, parser):
+    # Parse every python file of the repository once, parsing is not a part of the measurement
+    trees = []
+    for root, _, files in os.walk(path):
+        for file in files:
+            if file.endswith('.py'):
+                with open(os.path.join(root, file), 'rb') as f:
+                    trees.append((os.path.join(root, file), parser.parse(f.read())))
+    return trees
+
+
+def legacy_definitions(queries, tree):
+    # Open and close records of every captured body, sorted and replayed to get the nesting
+    captures = queries.captures('definitions', tree.root_node)
+    definitions = []
+    for prefix, type in (('func', 'function'), ('class', 'class')):
+        for name, body in zip(captures.get(prefix + '.name', []), captures.get(prefix + '.body', [])):
+            definitions.append({'name': name.text.decode('utf-8', errors='ignore'), 'start_byte': body.start_byte,
+                                'nesting': 0, 'type': type, 'end_byte': body.end_byte,
+                                'start_point': body.start_point, 'end_point': body.end_point,
+                                'for_sorting': [body.start_byte, 0]})
+            definitions.append({'name': name.text.decode('utf-8', errors='ignore'), 'end_byte': body.end_byte,
+                                'nesting': 1, 'type': type, 'for_sorting': [body.end_byte, 1]})
+    definitions.sort(key=lambda x: x['for_sorting'])
+
+    records = []
+    counter = 0
+    for object in definitions:
+        if object['nesting'] == 0:
+            counter += 1
+            records.append((counter, object['name'], object['type'], object['start_byte'], object['end_byte'],
+                            object['start_point'], object['end_point']))
+        if object['nesting'] == 1:
+            counter -= 1
+    return records
+
+
+def legacy_imports(queries, tree):
+    # Captures of the merged import query
+    captures = queries.captures('imports', tree.root_node)
+    return {key: [(node.start_byte, node.text.decode('utf-8', errors='ignore')) for node in nodes]
+            for key, nodes in captures.items()}
+
+
+def legacy_superclasses(queries, tree):
+    # Captured parents matched to the captured classes with two pointers
+    captures = queries.captures('superclasses', tree.root_node)
+    superclasses = []
+    if "class.parents" in captures.keys():
+        name_body = dict()
+        for i in range(len(captures["class.name"])):
+            name_body[captures["class.name"][i]] = captures["class.body"][i]
+        i, j = 0, 0
+        while j < len(captures["class.parents"]):
+            if captures["class.name"][i].start_byte < captures["class.parents"][j].start_byte \
+                    < name_body[captures["class.name"][i]].start_byte:
+                superclasses.append((captures["class.name"][i].text.decode('utf-8', errors='ignore'),
+                                     captures["class.parents"][j].text.decode('utf-8', errors='ignore')))
+                j += 1
+            else:
+                i += 1
+    return superclasses
+
+
+def legacy_calls(queries, tree):
+    # Captured calls of both kinds merged by their positions
+    captures = queries.captures('calls', tree.root_node)
+    calls = [(node.start_byte, node.text.decode('utf-8', errors='ignore'), None)
+             for node in captures.get('call.name', [])]
+    for node in captures.get('call.attribute', []):
+        owner = node.child_by_field_name('object')
+        calls.append((node.start_byte,
+                      node.child_by_field_name('attribute').text.decode('utf-8', errors='ignore'),
+                      owner.text.decode('utf-8', errors='ignore') if owner.type == 'identifier' else ''))
+    calls.sort(key=lambda x: x[0])
+    return calls
+
+
+def legacy_extract(queries, tree):
+    # Records of the file from the query passes
+    return FileExtraction(legacy_definitions(queries, tree), legacy_imports(queries, tree),
+                          legacy_superclasses(queries, tree), legacy_calls(queries, tree))
+
+
+def run_legacy(queries, trees):
+    for _, tree in trees:
+        legacy_extract(queries, tree)
+
+
+def run_walk(queries, trees):
+    for _, tree in trees:
+        walk_tree(tree)
+
+
+def differences(queries, trees):
+    # Files whose records differ; the query captures of the calls at one position (e.g. "a.b().c()")
+    # come in the order of the query matches, so the calls of one position are compared as sets
+    files = []
+    for file, tree in trees:
+        legacy = legacy_extract(queries, tree)
+        walked = walk_tree(tree)
+        for field in ('definitions', 'imports', 'superclasses'):
+            if getattr(legacy, field) != getattr(walked, field):
+                files.append((file, field))
+        if sorted(legacy.calls, key=repr) != sorted(walked.calls, key=repr) or \
+                [call[0] for call in legacy.calls] != [call[0] for call in walked.calls]:
+            files.append((file, 'calls'))
+    return files
+
+
+def measure(function, queries, trees, repeats):
+    # Best time of several runs
+    best = float('inf')
+    for _ in range(repeats):
+        start = time.perf_counter()
+        function(queries, trees)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+if __name__ == "__main__":
+    language = Language(tspython.language())
+    queries = QueryRegistry(language)
+    trees = collect_trees(sys.argv[1], Parser(language))
+    repeats = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+
+    legacy = measure(run_legacy, queries, trees, repeats)
+    walk = measure(run_walk, queries, trees, repeats)
+
+    print(f"files: {len(trees)}")
+    print(f"query passes: {legacy / len(trees) * 1e6:10.1f} us/file")
+    print(f"single walk:  {walk / len(trees) * 1e6:10.1f} us/file")
+    print(f"speedup: {legacy / walk:.2f}x")
+    for file, field in differences(queries, trees):
+        print(f"different {field}: {file}")  # Only broken files, where the queries pair names and bodies by order
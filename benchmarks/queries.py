@@ -0,0 +1,93 @@
+# Tree-sitter queries of the extraction before the single walk of parsing.walk_tree,
+# kept as the reference of the benchmarks (see bench_queries.py and bench_tree_walk.py)
+
+# Sources of the queries, compiled once by QueryRegistry
+QUERY_SOURCES = {
+    # class and function definitions
+    'definitions': """
+    (class_definition
+        name: (identifier) @class.name
+        body: (block) @class.body
+    )
+
+    (function_definition
+        name: (identifier) @func.name
+        parameters: (parameters) @func.parameters
+        body: (block) @func.body
+    )
+    """,
+
+    # all kinds of imports in one pass:
+    # import.name - "import smth", import.aliased - "import smth1 as smth2",
+    # from.* - "from smth import smth", from_aliased.* - "from smth1 import smth2 as smth3",
+    # wildcard.module - "from smth import *", relative.* - "from ...smth import smth"
+    'imports': """
+    (import_statement
+        name: (dotted_name) @import.name
+    )
+
+    (import_statement
+        name: (aliased_import
+            name: (dotted_name) @import.aliased)
+    )
+
+    (import_from_statement
+        module_name: (dotted_name) @from.module
+        name: (dotted_name) @from.name
+    )
+
+    (import_from_statement
+        module_name: (dotted_name) @from_aliased.module
+        name: (aliased_import
+            name: (dotted_name) @from_aliased.name)
+    )
+
+    (import_from_statement
+        module_name: (dotted_name) @wildcard.module
+        (wildcard_import)
+    )
+
+    (import_from_statement
+        module_name: (relative_import) @relative.module
+        name: (dotted_name) @relative.name
+    )
+    """,
+
+    # classes with their parent classes
+    'superclasses': """
+    (class_definition
+        name: (identifier) @class.name
+        superclasses: (argument_list (identifier) @class.parents)?
+        body: (block) @class.body
+    )
+    """,
+
+    # calls of functions "name()" and of attributes "owner.name()"
+    'calls': """
+    (call
+        function: (identifier) @call.name
+    )
+
+    (call
+        function: (attribute) @call.attribute
+    )
+    """
+}
+
+
+class QueryRegistry:
+    # Named tree-sitter queries compiled once for a language
+    def __init__(self, language, sources=None):
+        self.queries = {}  # Compiled queries by their names
+        for name, source in (sources or QUERY_SOURCES).items():
+            self.queries[name] = language.query(source)
+
+    def __getitem__(self, name):
+        return self.queries[name]
+
+    def captures(self, name, node):
+        # Execute the query on the node, captures of every name are sorted by their position in the code
+        captures = self.queries[name].captures(node)
+        for el in captures:
+            captures[el].sort(key=lambda x: x.start_byte)
+        return captures
@@ -0,0 +1,117 @@
+# Deterministic generator of synthetic python repositories for the benchmarks.
+# The same arguments always give the same files:
+#   files - number of modules (plus the __init__.py of the packages),
+#   depth - nesting of the packages, branching - modules per package (and subpackages per package),
+#   fanout - imports per module, cycles - share of the modules which also import a later module,
+#   wildcards - share of the imports written as "from module import *",
+#   hierarchy - length of the chains of the base classes across the modules.
+# A module imports the earlier modules of its own package and of the first package (the "core" of the
+# repository) as real projects mostly do, so the transitive imports of a module stay bounded.
+# Usage: python benchmarks/synthetic_repo.py <path> <files> [depth] [fanout] [cycles] [wildcards] [hierarchy] [seed]
+import os
+import random
+import sys
+
+
+def module_path(index, depth, branching):
+    # Packages and the name of the module with the index
+    packages = []
+    rest = index // branching
+    for _ in range(depth):
+        packages.append(f'p{rest % branching}')
+        rest //= branching
+    return packages[::-1], f'm{index}'
+
+
+def module_name(index, depth, branching):
+    # Dotted name of the module with the index
+    packages, name = module_path(index, depth, branching)
+    return '.'.join(packages + [name])
+
+
+def module_source(index, imports, base, depth, branching):
+    # Source of the module: the imports, a class hierarchy, functions calling the imported ones and nested ones
+    lines = []
+    used = []  # Imported functions and classes which can be called
+    for target, style in imports:
+        name = module_name(target, depth, branching)
+        if style == 'wildcard':
+            lines.append(f'from {name} import *')
+            used.append(f'f{target}_0')
+        elif style == 'from':
+            lines.append(f'from {name} import f{target}_0, C{target}')
+            used.append(f'f{target}_0')
+            used.append(f'C{target}')
+        else:
+            lines.append(f'import {name}')
+            used.append(f'{name}.f{target}_1')
+    if base is not None:
+        lines.append(f'from {module_name(base, depth, branching)} import C{base}')
+    lines.append('')
+
+    lines.append(f'class C{index}({f"C{base}" if base is not None else "object"}):')
+    lines.append('    def __init__(self, value):')
+    lines.append('        self.value = value')
+    lines.append('')
+    lines.append('    def method(self, other):')
+    lines.append('        def inner(x):')
+    lines.append('            return x + 1')
+    lines.append('        return inner(self.value) + helper(other)')
+    lines.append('')
+    lines.append('')
+    lines.append('def helper(value):')
+    lines.append(f'    return value * {index + 1}')
+    lines.append('')
+    for function in range(2):
+        lines.append('')
+        lines.append(f'def f{index}_{function}(value):')
+        for callee in used:
+            lines.append(f'    value = {callee}(value)')
+        lines.append(f'    return C{index}(helper(value)).method(value)')
+    lines.append('')
+    return '\n'.join(lines)
+
+
+def generate(path, files, depth=2, branching=10, fanout=3, cycles=0.05, wildcards=0.1, hierarchy=4, seed=0):
+    # Write the repository to the path, return the list of the written files
+    rng = random.Random(seed)
+    written = []
+    packages = set()
+    for index in range(files):
+        first = index - index % branching  # First module of the package
+        last = min(first + branching, files)  # Next to the last module of the package
+        candidates = sorted(set(range(min(branching, index))) | set(range(first, index)))
+        imports = []
+        for target in sorted(rng.sample(candidates, min(fanout, len(candidates)))):
+            roll = rng.random()
+            style = 'wildcard' if roll < wildcards else 'from' if roll < 0.6 else 'import'
+            imports.append((target, style))
+        if index + 1 < last and rng.random() < cycles:
+            imports.append((rng.randrange(index + 1, last), 'import'))  # A later module closes a cycle
+        base = index - 1 if hierarchy > 1 and index % hierarchy and index > first else None
+
+        module_packages, name = module_path(index, depth, branching)
+        folder = os.path.join(path, *module_packages)
+        for level in range(1, len(module_packages) + 1):
+            packages.add(os.path.join(path, *module_packages[:level]))
+        os.makedirs(folder, exist_ok=True)
+        file = os.path.join(folder, name + '.py')
+        with open(file, 'w', encoding='utf-8') as f:
+            f.write(module_source(index, imports, base, depth, branching))
+        written.append(file)
+
+    for package in sorted(packages):
+        file = os.path.join(package, '__init__.py')
+        with open(file, 'w', encoding='utf-8') as f:
+            f.write('')
+        written.append(file)
+    return written
+
+
+if __name__ == "__main__":
+    arguments = sys.argv[2:]
+    names = ['files', 'depth', 'fanout', 'cycles', 'wildcards', 'hierarchy', 'seed']
+    types = [int, int, int, float, float, int, int]
+    options = {name: cast(value) for name, cast, value in zip(names, types, arguments)}
+    written = generate(sys.argv[1], **options)
+    print(f"{len(written)} files written to {sys.argv[1]}")
@@ -0,0 +1,138 @@
+SELF_NAMES = ('self', 'cls')  # Names of the owners which refer to the class of the method
+
+
+class CallGraph:
+    # Native call graph: the calls extracted from the trees are resolved to the definitions by their names,
+    # similar to code2flow but without a second parse of the repository.
+    # Plain calls "name()" are resolved to the functions of the same file if there are any,
+    # otherwise to the top-level functions and the constructors of the classes with this name;
+    # calls "self.name()" are resolved to the methods of the enclosing class;
+    # other attribute calls "owner.name()" are resolved only if exactly one candidate is reachable.
+    def __init__(self):
+        self.functions = {}  # Name -> top-level function nodes
+        self.constructors = {}  # Class name -> nodes of the "__init__" methods
+        self.methods = {}  # Name -> method nodes
+        self.class_methods = {}  # Class node -> method name -> method node
+        self.file_callables = {}  # File node -> name -> functions (not methods) and constructors of the file
+        self.attributes = {}  # Name -> file node -> methods and top-level functions which "owner.name()" may call
+        self.calls = {}  # File node -> [(caller node, enclosing class node, name, owner)]
+        self.owners = {}  # Function node -> file node
+        self.positions = {}  # File node -> position of the file, the candidates are kept in the order of the files
+
+    def add_file(self, file_node, extraction):
+        # Index the definitions of the file and attribute every call to the innermost function around it
+        self.calls[file_node] = []
+        scopes = []  # Open definitions: (node, type, start_byte, end_byte)
+        definitions = []
+        for nesting, name, type, start_byte, end_byte, start_point, end_point in extraction.definitions:
+            del scopes[nesting - 1:]  # Leave the scopes which were closed before the current definition
+            parent = scopes[-1] if scopes else None
+            node = (parent[0] if parent else file_node) + '/' + name
+            scopes.append((node, type, start_byte, end_byte))
+            definitions.append((node, type, start_byte, end_byte))
+
+            if type != 'function':
+                continue
+            self.owners[node] = file_node
+            if parent is None or parent[1] == 'function':
+                self.file_callables.setdefault(file_node, {}).setdefault(name, []).append(node)
+                if parent is None:
+                    self.insert(self.functions.setdefault(name, []), node)
+                    self.attributes.setdefault(name, {}).setdefault(file_node, []).append(node)
+            else:
+                self.insert(self.methods.setdefault(name, []), node)
+                self.attributes.setdefault(name, {}).setdefault(file_node, []).append(node)
+                self.class_methods.setdefault(parent[0], {})[name] = node
+                if name == '__init__':
+                    class_name = parent[0].split('/')[-1]
+                    self.insert(self.constructors.setdefault(class_name, []), node)
+                    self.file_callables.setdefault(file_node, {}).setdefault(class_name, []).append(node)
+
+        # Calls and definitions are both sorted by their position, so one sweep finds the scopes of the calls
+        scopes = []
+        index = 0
+        for start_byte, name, owner in extraction.calls:
+            while index < len(definitions) and definitions[index][2] <= start_byte:
+                scopes.append(definitions[index])
+                index += 1
+            scopes = [scope for scope in scopes if scope[3] > start_byte]  # Keep the bodies around the call
+
+            caller, enclosing_class = file_node, None
+            for position in range(len(scopes) - 1, -1, -1):
+                if scopes[position][1] == 'function':
+                    caller = scopes[position][0]
+                    if position > 0 and scopes[position - 1][1] == 'class':
+                        enclosing_class = scopes[position - 1][0]
+                    break
+            self.calls[file_node].append((caller, enclosing_class, name, owner))
+
+    def insert(self, nodes, node):
+        # Add the candidate after the candidates of the same and the previous files
+        # (a file which is added again after a change goes back to its place)
+        position = self.positions.get(self.owners[node], -1)
+        at = len(nodes)
+        while at and self.positions.get(self.owners[nodes[at - 1]], -1) > position:
+            at -= 1
+        nodes.insert(at, node)
+
+    def remove_file(self, file_node):
+        # Forget the definitions and the calls of the file, e.g. before it is added again after a change
+        prefix = file_node + '/'
+        for index in (self.functions, self.constructors, self.methods):
+            for name in [name for name, nodes in index.items() if any(node.startswith(prefix) for node in nodes)]:
+                index[name] = [node for node in index[name] if not node.startswith(prefix)]
+                if not index[name]:
+                    del index[name]
+        for name in [name for name, files in self.attributes.items() if file_node in files]:
+            del self.attributes[name][file_node]
+            if not self.attributes[name]:
+                del self.attributes[name]
+        for class_node in [class_node for class_node in self.class_methods if class_node.startswith(prefix)]:
+            del self.class_methods[class_node]
+        for node in [node for node, owner in self.owners.items() if owner == file_node]:
+            del self.owners[node]
+        self.file_callables.pop(file_node, None)
+        self.calls.pop(file_node, None)
+
+    def files_calling(self, names):
+        # Files with calls of any of the names
+        return [file_node for file_node, calls in self.calls.items() if any(call[2] in names for call in calls)]
+
+    def resolve(self, is_reachable, reachable_files=None, files=None):
+        # Yield the pairs (caller, callee), is_reachable(file node, callee) tells if the callee can be seen;
+        # reachable_files(file node) gives the files with nodes reached from the file (kept up to date while
+        # the pairs are yielded), the candidates of the attribute calls are looked up only in these files.
+        # Only the calls of the given file nodes are resolved (in their order) if files is not None
+        for file_node in self.calls if files is None else files:
+            for caller, enclosing_class, name, owner in self.calls.get(file_node, ()):
+                yield from self.resolve_call(is_reachable, reachable_files, caller, file_node, enclosing_class,
+                                             name, owner)
+
+    def resolve_call(self, is_reachable, reachable_files, caller, file_node, enclosing_class, name, owner):
+        # Pairs (caller, callee) of one call
+        if owner is None:
+            candidates = self.file_callables.get(file_node, {}).get(name)
+            if not candidates:
+                candidates = self.functions.get(name, []) + self.constructors.get(name, [])
+            for callee in candidates:
+                if is_reachable(file_node, callee):
+                    yield caller, callee
+
+        elif owner in SELF_NAMES and name in self.class_methods.get(enclosing_class, {}):
+            yield caller, self.class_methods[enclosing_class][name]
+
+        else:
+            files = self.attributes.get(name, {})
+            if reachable_files is not None:
+                reached = reachable_files(file_node)
+                if len(reached) < len(files):
+                    files = {file: files[file] for file in reached if file in files}
+                else:
+                    files = {file: callees for file, callees in files.items() if file in reached}
+
+            # Top-level functions of the same file can't be called as attributes
+            candidates = [callee for file, callees in files.items() for callee in callees
+                          if (file != file_node or callee.rsplit('/', 1)[0] != file_node)
+                          and is_reachable(file_node, callee)]
+            if len(candidates) == 1:  # Ambiguous calls are skipped
+                yield caller, candidates[0]
@@ -0,0 +1,171 @@
+import argparse  # For the command line
+import os  # For the paths of the graphs
+import sys  # For the exit code
+
+# Command line of the builder. The subcommands load only what they use, e.g. "build" does not import
+# PIL, code2flow or the binary format unless the given flags need them.
+# Usage:
+#   python cli.py build <repo> [--out graphs] [--format gml|binary] [--workers 4] [--incremental] ...
+#   python cli.py build-many <folder_of_repos> [--out graphs] [--corpus corpus.sgb] ...
+#   python cli.py convert <graph.gml|graph.sgb> <graph.sgb|graph.gml>
+#   python cli.py render <graph.gml|graph.sgb> [--output graph.png] [--edge-types Import Invoke] [--max-depth 1]
+
+GRAPH_FORMATS = {'.gml': 'gml', '.sgb': 'binary'}  # Extensions of the saved graphs
+
+
+def add_build_arguments(parser):
+    # Flags of the builder and of its phases shared by "build" and "build-many"
+    parser.add_argument('--out', default='graphs', help='folder of the saved graphs, states and reports')
+    parser.add_argument('--format', choices=['gml', 'binary'], default='gml', help='format of the saved graphs')
+    parser.add_argument('--no-save', action='store_true', help='do not save the graphs')
+    # Extraction
+    parser.add_argument('--workers', type=int, default=1, help='worker processes of the extraction')
+    parser.add_argument('--compact', action='store_true', help='keep positions instead of bodies in the graph')
+    parser.add_argument('--cache-size', type=int, help='memory bound of the parsed files (in bytes)')
+    parser.add_argument('--extraction-cache', help='folder of the persistent extraction cache')
+    parser.add_argument('--max-file-size', type=int, help='skip bigger files (in bytes), 0 for no limit')
+    parser.add_argument('--skip', nargs='*', default=[], help='glob patterns of the skipped files and folders')
+    parser.add_argument('--incremental', action='store_true', help='rebuild only what changed since the last build')
+    # Invoke
+    parser.add_argument('--call-graph', choices=['native', 'code2flow'], default='native',
+                        help='source of the Invoke edges')
+    # Rendering
+    parser.add_argument('--render', action='store_true', help='render the graphs with Graphviz')
+    parser.add_argument('--render-format', default='png', help='format of the rendered images')
+    parser.add_argument('--edge-types', nargs='*', help='render only the edges of these types')
+    parser.add_argument('--max-depth', type=int, help='render only the nodes up to this nesting')
+    parser.add_argument('--show', action='store_true', help='open the rendered image')
+    # Diagnostics
+    parser.add_argument('--profile', action='store_true', help='save a profile of the phases next to the graphs')
+    parser.add_argument('--profile-memory', action='store_true',
+                        help='also trace the allocations of the phases in the profile (slow)')
+    parser.add_argument('--debug', action='store_true', help='print the debugging output of the phases')
+
+
+def create_builder(args):
+    # Builder configured by the flags
+    from main import SemanticGraphBuilder, DEFAULT_CACHE_SIZE, DEFAULT_MAX_FILE_SIZE
+    max_file_size = DEFAULT_MAX_FILE_SIZE if args.max_file_size is None else args.max_file_size or None
+    return SemanticGraphBuilder(args.cache_size or DEFAULT_CACHE_SIZE, args.compact, args.extraction_cache,
+                                max_file_size, args.skip)
+
+
+def build_options(args):
+    # Options of SemanticGraphBuilder.build from the flags
+    return {
+        'gsave': not args.no_save,
+        'gprint': args.render,
+        'debugging': int(args.debug),
+        'workers': args.workers,
+        'incremental': args.incremental,
+        'call_graph': args.call_graph,
+        'gformat': args.format,
+        'gprint_options': {'edge_types': args.edge_types, 'max_depth': args.max_depth, 'show': args.show,
+                           'output_format': args.render_format},
+        'profile': args.profile,
+        'profile_save': args.profile or args.profile_memory,
+        'profile_memory': args.profile_memory
+    }
+
+
+def command_build(args):
+    # Build the graph of one repository
+    os.makedirs(args.out, exist_ok=True)
+    builder = create_builder(args)
+    builder.build_from_one(os.path.abspath(args.repo), args.out, **build_options(args))
+    print(f"{args.repo}: {builder.graph.number_of_nodes()} nodes, {builder.graph.number_of_edges()} edges")
+
+
+def command_build_many(args):
+    # Build a graph for every repository of the folder, optionally merged into one corpus graph
+    os.makedirs(args.out, exist_ok=True)
+    builder = create_builder(args)
+    builder.build_from_repos(os.path.abspath(args.folder), args.out, corpus=args.corpus is not None,
+                             **build_options(args))
+    if args.corpus is not None:
+        save_graph(builder.corpus.graph, args.corpus)
+        print(f"corpus: {len(builder.corpus.repos)} repositories, {builder.corpus.graph.number_of_nodes()} nodes, "
+              f"{builder.corpus.graph.number_of_edges()} edges")
+
+
+def graph_format(path):
+    # Format of the graph file by its extension
+    extension = os.path.splitext(path)[1].lower()
+    if extension not in GRAPH_FORMATS:
+        raise SystemExit(f"Unknown graph format of {path}, expected one of: {', '.join(GRAPH_FORMATS)}")
+    return GRAPH_FORMATS[extension]
+
+
+def load_graph(path):
+    # Read a saved graph
+    if graph_format(path) == 'binary':
+        from serialization import load_binary_graph
+        return load_binary_graph(path)
+    import networkx as nx
+    return nx.read_gml(path)
+
+
+def save_graph(graph, path):
+    # Write the graph in the format of the extension
+    if graph_format(path) == 'binary':
+        from serialization import save_binary_graph
+        save_binary_graph(graph, path)
+    else:
+        import networkx as nx
+        nx.write_gml(graph, path)
+
+
+def command_convert(args):
+    # Save the graph in another format
+    save_graph(load_graph(args.input), args.output)
+
+
+def command_render(args):
+    # Render a saved graph with Graphviz
+    from main import EDGES_COLORS, EDGES_STYLES
+    from rendering import render_graph
+    graph = load_graph(args.graph)
+    output = args.output or os.path.splitext(args.graph)[0] + '.' + args.format
+    render_graph(graph, output, args.format, EDGES_COLORS, EDGES_STYLES, args.edge_types, args.max_depth)
+
+
+def create_parser():
+    # Parser of the command line
+    parser = argparse.ArgumentParser(prog='semantic-graph', description='Semantic graphs of python repositories')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    build = commands.add_parser('build', help='build the graph of one repository')
+    build.add_argument('repo', help='path to the repository')
+    add_build_arguments(build)
+    build.set_defaults(run=command_build)
+
+    build_many = commands.add_parser('build-many', help='build the graphs of all repositories of a folder')
+    build_many.add_argument('folder', help='folder with the repositories')
+    build_many.add_argument('--corpus', help='also save all graphs merged into this file (.gml or .sgb)')
+    add_build_arguments(build_many)
+    build_many.set_defaults(run=command_build_many)
+
+    convert = commands.add_parser('convert', help='convert a saved graph between GML and the binary format')
+    convert.add_argument('input', help='saved graph (.gml or .sgb)')
+    convert.add_argument('output', help='converted graph (.gml or .sgb)')
+    convert.set_defaults(run=command_convert)
+
+    render = commands.add_parser('render', help='render a saved graph with Graphviz (needs its "dot" program)')
+    render.add_argument('graph', help='saved graph (.gml or .sgb)')
+    render.add_argument('--output', help='rendered image, next to the graph by default')
+    render.add_argument('--format', default='png', help='format of the image')
+    render.add_argument('--edge-types', nargs='*', help='render only the edges of these types')
+    render.add_argument('--max-depth', type=int, help='render only the nodes up to this nesting')
+    render.set_defaults(run=command_render)
+    return parser
+
+
+def main(argv=None):
+    # Run the subcommand of the command line
+    args = create_parser().parse_args(argv)
+    args.run(args)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,52 @@
+import networkx as nx  # For the merged graph
+from storage import NodeStore  # Positions of the definitions and their bodies read on demand
+
+
+class CorpusGraph:
+    # One graph merged from the graphs of many repositories, built one repository at a time.
+    # The repeated strings (node names used by the edges, colors, edge types, repository names) are interned
+    # in one table, so every string is kept once for the whole corpus, and the bodies are not copied:
+    # the positions of the definitions go to a node store and the bodies are read from the files on demand.
+    def __init__(self):
+        self.graph = nx.MultiDiGraph()  # Merged graph, the nodes know their repository
+        self.node_store = NodeStore()  # Positions of the definitions of all repositories
+        self.strings = {}  # Interned strings: string -> the one copy of it
+        self.repos = []  # Merged repositories in the order of their builds
+
+    def __len__(self):
+        return len(self.graph)
+
+    def intern(self, value):
+        # The one copy of the string
+        return self.strings.setdefault(value, value)
+
+    def add_repo(self, repo, graph, file_nodes, position):
+        # Merge the graph of the repository: file_nodes maps the files to their nodes (the file first),
+        # position(node) gives the position attributes of the definition
+        repo = self.intern(repo)
+        self.repos.append(repo)
+        for file, names in file_nodes.items():
+            for i, name in enumerate(names):
+                data = graph.nodes[name]
+                name = self.intern(name)
+                self.graph.add_node(name, repo=repo, nesting=data['nesting'], color=self.intern(data['color']))
+                if i > 0:
+                    attributes = position(name)
+                    self.node_store.add(name, file, attributes['start_byte'], attributes['end_byte'],
+                                        attributes['start_point'], attributes['end_point'])
+
+        for u, v, data in graph.edges(data=True):
+            u = self.intern(u)
+            v = self.intern(v)
+            for node in (u, v):
+                if node not in self.graph:
+                    self.graph.add_node(node, repo=repo)  # A node without a file, e.g. only used by the edges
+            self.graph.add_edge(u, v, type=self.intern(data['type']))
+
+    def get_body(self, node):
+        # Source code of the body of the definition, read from its file
+        return self.node_store.body(node)
+
+    def release(self):
+        # Drop the loaded sources
+        self.node_store.release()
@@ -0,0 +1,121 @@
+import hashlib  # For the keys of the records
+import json  # For the stored records
+import os  # For the folder of the cache
+import sqlite3  # For the store shared by the processes
+import time  # For the order of the eviction
+import zlib  # For the size of the stored records
+from importlib.metadata import version, PackageNotFoundError  # Version of the grammar
+
+from parsing import EXTRACTION_VERSION, extraction_to_record, extraction_from_record
+
+DEFAULT_EXTRACTION_CACHE_SIZE = 256 * 1024 * 1024  # Default bound of the stored records (in bytes)
+
+
+def grammar_version():
+    # Version of tree-sitter-python, the trees of other versions may differ
+    try:
+        return version('tree-sitter-python')
+    except PackageNotFoundError:
+        return 'unknown'
+
+
+class ExtractionCache:
+    # Persistent content-addressed store of the records extracted from the files (see FileExtraction).
+    # A record is found by the hash of the content of the file, so it is reused by every build, repository
+    # and machine which has the same file; the version of the grammar and of the extraction code
+    # are a part of the keys, so records of other versions are never read (and are evicted with time).
+    # The records are kept in one SQLite database in the folder: several builder processes may use it at once
+    # (the writes are short transactions in the WAL mode), the new records and the times of the last use
+    # are written once per build by flush(), then the least recently used records are evicted
+    # until the store fits into max_size.
+    def __init__(self, folder, max_size=DEFAULT_EXTRACTION_CACHE_SIZE):
+        self.folder = folder  # Folder of the database
+        self.path = os.path.join(folder, 'extractions.sqlite')  # Path to the database
+        self.max_size = max_size  # Bound of the stored records (in bytes)
+        self.namespace = hashlib.sha1(json.dumps(
+            [grammar_version(), EXTRACTION_VERSION], sort_keys=True).encode('utf-8')).hexdigest()
+        self.connection = None  # Opened on the first use, one per process
+        self.pending = {}  # Key -> compressed record which is not written yet
+        self.used = set()  # Keys of the records read since the last flush
+        self.hits = 0  # Number of records found in the store
+        self.misses = 0  # Number of records which had to be extracted
+
+    def connect(self):
+        # Open the database, create it if needed
+        if self.connection is None:
+            os.makedirs(self.folder, exist_ok=True)
+            self.connection = sqlite3.connect(self.path, timeout=60)
+            self.connection.execute('PRAGMA journal_mode=WAL')
+            with self.connection:
+                self.connection.execute('CREATE TABLE IF NOT EXISTS records '
+                                        '(key TEXT PRIMARY KEY, data BLOB, size INTEGER, used REAL)')
+                self.connection.execute('CREATE INDEX IF NOT EXISTS records_used ON records (used)')
+        return self.connection
+
+    def key(self, hash):
+        # Key of the records of the content with the hash
+        return self.namespace + ':' + hash
+
+    def get_many(self, hashes):
+        # Records of the contents with the hashes which are in the store: hash -> extraction
+        keys = {self.key(hash): hash for hash in hashes}
+        found = {}
+        connection = self.connect()
+        names = list(keys)
+        for start in range(0, len(names), 500):  # Within the limit of the parameters of a query
+            chunk = names[start:start + 500]
+            rows = connection.execute(f'SELECT key, data FROM records WHERE key IN ({",".join("?" * len(chunk))})',
+                                      chunk)
+            for key, data in rows:
+                found[keys[key]] = extraction_from_record(json.loads(zlib.decompress(data)))
+                self.used.add(key)
+        for key, hash in keys.items():
+            if hash not in found and key in self.pending:
+                found[hash] = extraction_from_record(json.loads(zlib.decompress(self.pending[key])))
+        self.hits += len(found)
+        self.misses += len(keys) - len(found)
+        return found
+
+    def put(self, hash, extraction):
+        # Keep the records of the content with the hash until the next flush
+        self.pending[self.key(hash)] = zlib.compress(json.dumps(extraction_to_record(extraction)).encode('utf-8'))
+
+    def flush(self):
+        # Write the new records and the times of the use, then evict the old records if the store is too big
+        if not self.pending and not self.used:
+            return
+        now = time.time()
+        connection = self.connect()
+        with connection:
+            connection.executemany('INSERT OR REPLACE INTO records (key, data, size, used) VALUES (?, ?, ?, ?)',
+                                   [(key, data, len(data), now) for key, data in self.pending.items()])
+            connection.executemany('UPDATE records SET used = ? WHERE key = ?', [(now, key) for key in self.used])
+        self.pending = {}
+        self.used = set()
+        self.evict()
+
+    def evict(self):
+        # Drop the least recently used records until the store fits into its bound
+        connection = self.connect()
+        with connection:
+            total = connection.execute('SELECT COALESCE(SUM(size), 0) FROM records').fetchone()[0]
+            if total <= self.max_size:
+                return
+            removed = []
+            for key, size in connection.execute('SELECT key, size FROM records ORDER BY used'):
+                if total <= self.max_size:
+                    break
+                removed.append((key,))
+                total -= size
+            connection.executemany('DELETE FROM records WHERE key = ?', removed)
+
+    def close(self):
+        # Write what is pending and close the database
+        self.flush()
+        if self.connection is not None:
+            self.connection.close()
+            self.connection = None
+
+    def stats(self):
+        # Counters of the cache usage
+        return {'hits': self.hits, 'misses': self.misses, 'pending': len(self.pending)}
@@ -0,0 +1,139 @@
+class ImportClosure:
+    # Transitive imports of the files, computed once per file without recursion.
+    # A file gets Import edges to:
+    #   "import smth" - the imported file and everything the imported file gets;
+    #   "from smth import *" - the top-level definitions of the file and everything the file gets;
+    #   "from smth import name" - the definition "name" of the file (or, if the file does not define it,
+    #   the nodes called "name" among the imports of the file and the definitions "name" of the imported files)
+    #   and everything the file gets.
+    # The files are ordered by the strongly connected components of the import graph, so every file is
+    # computed after the files it imports; the files of one cycle are computed together until nothing changes
+    # instead of aborting the cycle.
+    def __init__(self, top_level, fixed=None):
+        self.top_level = top_level  # File node -> top-level definition nodes (every file of the repository)
+        self.fixed = fixed or {}  # File node -> Import targets of the files which are not computed again
+        self.references = {}  # File node -> (imported files, wildcard files, [(file, imported name)])
+        self.closures = {}  # File node -> Import targets in the order of their discovery (dict as ordered set)
+        self.exports = {}  # File node -> name -> nodes which "from file import name" refers to
+
+    def add_file(self, file_node, modules, wildcards, names):
+        # Register the imports of the file which have to be computed
+        self.references[file_node] = (modules, wildcards, names)
+
+    def dependencies(self, file_node):
+        # Files which are imported by the file in any way
+        modules, wildcards, names = self.references[file_node]
+        return list(modules) + list(wildcards) + [module for module, _ in names]
+
+    def closure(self, file_node):
+        # Import targets of the file (the fixed targets for the files which are not computed)
+        closure = self.closures.get(file_node)
+        if closure is None:
+            return self.fixed.get(file_node, ())
+        return closure
+
+    def solve(self):
+        # Compute the Import targets of all registered files, return file node -> list of targets
+        for component in self.components():
+            if len(component) == 1 and component[0] not in self.dependencies(component[0]):
+                self.closures[component[0]] = self.compute(component[0])
+                continue
+
+            # A cycle: recompute the files until their targets stop growing
+            for file_node in component:
+                self.closures[file_node] = {}
+            changed = True
+            while changed:
+                changed = False
+                # Export tables built from the unfinished targets of the cycle are built again
+                for file_node in component:
+                    self.exports.pop(file_node, None)
+                for file_node in component:
+                    closure = self.compute(file_node)
+                    if len(closure) != len(self.closures[file_node]):
+                        self.closures[file_node] = closure
+                        changed = True
+
+        return {file_node: list(self.closures[file_node]) for file_node in self.references}
+
+    def compute(self, file_node):
+        # Import targets of the file from the targets of the files it imports
+        closure = {}
+        modules, wildcards, names = self.references[file_node]
+        for module in modules:
+            closure[module] = True
+            closure.update(dict.fromkeys(self.closure(module), True))
+        for module in wildcards:
+            closure.update(dict.fromkeys(self.top_level.get(module, ()), True))
+            closure.update(dict.fromkeys(self.closure(module), True))
+        for module, name in names:
+            closure.update(dict.fromkeys(self.export_table(module).get(name, ()), True))
+            closure.update(dict.fromkeys(self.closure(module), True))
+        # A file does not import itself or its own definitions (they come back through the import cycles)
+        own_prefix = file_node + '/'
+        return {target: True for target in closure if target != file_node and not target.startswith(own_prefix)}
+
+    def export_table(self, module):
+        # Names which can be imported from the file with the nodes they refer to, built once per file:
+        # the definitions of the file itself, otherwise the nodes with this name among its Import targets
+        # (re-exported definitions, files and the definitions reached through wildcards)
+        # and the definitions with this name of the imported files
+        table = self.exports.get(module)
+        if table is not None:
+            return table
+
+        table = {}
+        for target in self.closure(module):
+            table.setdefault(target.rsplit('/', 1)[-1], []).append(target)
+            if target in self.top_level:
+                for definition in self.top_level[target]:
+                    table.setdefault(definition.rsplit('/', 1)[-1], []).append(definition)
+        for definition in self.top_level.get(module, ()):
+            table[definition.rsplit('/', 1)[-1]] = [definition]  # Own definitions hide the imported names
+        self.exports[module] = table
+        return table
+
+    def components(self):
+        # Strongly connected components of the registered files (iterative Tarjan's algorithm),
+        # every component comes after the components it imports
+        index = {}
+        lowlink = {}
+        stack = []
+        on_stack = set()
+        components = []
+
+        for root in self.references:
+            if root in index:
+                continue
+            index[root] = lowlink[root] = len(index)
+            stack.append(root)
+            on_stack.add(root)
+            work = [(root, iter(self.dependencies(root)))]
+            while work:
+                file_node, children = work[-1]
+                for child in children:
+                    if child not in self.references:
+                        continue  # Fixed or external file, it does not depend on the computed ones
+                    if child not in index:
+                        index[child] = lowlink[child] = len(index)
+                        stack.append(child)
+                        on_stack.add(child)
+                        work.append((child, iter(self.dependencies(child))))
+                        break
+                    if child in on_stack:
+                        lowlink[file_node] = min(lowlink[file_node], index[child])
+                else:
+                    work.pop()
+                    if work:
+                        parent = work[-1][0]
+                        lowlink[parent] = min(lowlink[parent], lowlink[file_node])
+                    if lowlink[file_node] == index[file_node]:
+                        component = []
+                        while True:
+                            member = stack.pop()
+                            on_stack.discard(member)
+                            component.append(member)
+                            if member == file_node:
+                                break
+                        components.append(component)
+        return components
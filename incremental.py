@@ -0,0 +1,144 @@
+import hashlib  # For the content hashes of the files
+import json  # For the state file
+import os  # For the signatures of the files
+
+from parsing import extraction_to_record, extraction_from_record  # Records extracted from the files
+
+STATE_VERSION = 3  # Version of the layout of the state file
+
+
+def file_signature(path):
+    # Cheap signature of the file: if it has not changed, the content is not hashed again
+    stat = os.stat(path)
+    return [stat.st_size, stat.st_mtime_ns]
+
+
+def file_hash(path):
+    # Hash of the content of the file
+    with open(path, 'rb') as f:
+        return hashlib.sha1(f.read()).hexdigest()
+
+
+def to_json_value(value):
+    # Points and other tuples are stored as lists
+    if isinstance(value, tuple):
+        return list(value)
+    return value
+
+
+def from_json_value(key, value):
+    # Points of the definitions are restored as tuples
+    if key in ('start_point', 'end_point'):
+        return tuple(value)
+    return value
+
+
+class IncrementalState:
+    # Content hashes, extracted records and graph fragments of every file of the last build.
+    # A fragment of a file holds its nodes (the file and its definitions) and the edges which go out of them
+    # (and out of the classes of the file which only the Class Hierarchy edges created).
+    # Without a path the state is only kept in memory (e.g. by a long-running watcher).
+    def __init__(self, path=None):
+        self.path = path  # Path to the state file, None for the state in memory
+        self.repo = None  # Repository of the last build
+        self.compact = None  # Mode of the last build
+        self.call_graph = None  # Call graph ('native' or 'code2flow') of the Invoke edges of the last build
+        self.files = {}  # Path to the file -> its state
+
+    def load(self, repo, compact=False, call_graph='native'):
+        # Read the state of the last build of the repository, False if there is no suitable state
+        # (the nodes of the compact mode have no positions and bodies, so the modes are not mixed,
+        # neither are the Invoke edges of the two call graphs)
+        if self.path is None:
+            return self.repo == repo and self.compact == compact and self.call_graph == call_graph
+        if not os.path.exists(self.path):
+            return False
+        with open(self.path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        if data.get('version') != STATE_VERSION or data.get('repo') != repo or data.get('compact') != compact \
+                or data.get('call_graph') != call_graph:
+            return False
+        self.repo = repo
+        self.compact = compact
+        self.call_graph = call_graph
+        self.files = data['files']
+        return True
+
+    def save(self, repo, compact=False, call_graph='native'):
+        # Write the state, a temporary file is replaced so that a broken write does not spoil the old state
+        self.repo = repo
+        self.compact = compact
+        self.call_graph = call_graph
+        if self.path is None:
+            return
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        temp_path = self.path + '.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump({'version': STATE_VERSION, 'repo': repo, 'compact': compact, 'call_graph': call_graph,
+                       'files': self.files}, f)
+        os.replace(temp_path, self.path)
+
+    def compare(self, files):
+        # Find the files which were added or changed since the last build and the ones which were removed.
+        # A file which disappeared after it was listed is skipped (it has no signature) or removed
+        changed = []
+        signatures = {}
+        hashes = {}
+        for file in files:
+            old = self.files.get(file)
+            try:
+                signature = file_signature(file)
+                if old is not None and old['signature'] == signature:
+                    hashes[file] = old['hash']  # Neither the size nor the modification time changed
+                else:
+                    hashes[file] = file_hash(file)
+            except FileNotFoundError:
+                continue
+            signatures[file] = signature
+            if old is None or old['hash'] != hashes[file]:
+                changed.append(file)
+        removed = [file for file in self.files if file not in signatures]
+        return changed, removed, signatures, hashes
+
+    def extraction(self, file):
+        # Records extracted from the file during the last build
+        return extraction_from_record(self.files[file]['extraction'])
+
+    def nodes(self, file):
+        # Nodes of the file with their attributes
+        return [(name, {key: from_json_value(key, value) for key, value in attributes.items()})
+                for name, attributes in self.files[file]['nodes']]
+
+    def edges(self, file, types=None):
+        # Edges which go out of the nodes of the file, optionally only of the given types
+        return [(u, v, type) for u, v, type in self.files[file]['edges'] if types is None or type in types]
+
+    def dependencies(self, file):
+        # Nodes of the files whose content was used to resolve the imports of the file
+        return self.files[file]['depends']
+
+    def record(self, file, signature, hash, extraction, nodes, edges, depends):
+        # Store the state of the file after the build
+        self.files[file] = {
+            'signature': signature,
+            'hash': hash,
+            'extraction': extraction_to_record(extraction),
+            'nodes': [[name, {key: to_json_value(value) for key, value in attributes.items()}]
+                      for name, attributes in nodes],
+            'edges': edges,
+            'depends': sorted(depends)
+        }
+
+    def update(self, file, signature, edges=None, depends=None):
+        # Store the new signature (and the edges and dependencies if they are given) of the file whose content
+        # did not change
+        self.files[file]['signature'] = signature
+        if edges is not None:
+            self.files[file]['edges'] = edges
+        if depends is not None:
+            self.files[file]['depends'] = sorted(depends)
+
+    def forget(self, files):
+        # Drop the state of the removed files
+        for file in files:
+            self.files.pop(file, None)
@@ -0,0 +1,262 @@
+from bisect import bisect_left  # For the range search over the sorted segments
+import networkx as nx  # For the strongly connected components of the graph
+
+
+class SegmentTrieNode:
+    # Node of the trie of reversed path segments
+    __slots__ = ('children', 'names', 'sorted_keys')
+
+    def __init__(self):
+        self.children = {}  # Next (previous in the path) segment -> trie node
+        self.names = []  # Node names which consist exactly of the segments on the way to this trie node
+        self.sorted_keys = None  # Reversed child segments in sorted order, rebuilt lazily after insertions
+
+    def keys_ending_with(self, suffix):
+        # Child segments which end with the suffix (their reversed forms share a prefix, so they form a range)
+        if self.sorted_keys is None:
+            self.sorted_keys = sorted(key[::-1] for key in self.children)
+        prefix = suffix[::-1]
+        start = bisect_left(self.sorted_keys, prefix)
+        end = bisect_left(self.sorted_keys, prefix + '\U0010ffff')
+        return [key[::-1] for key in self.sorted_keys[start:end]]
+
+
+class NameIndex:
+    # Suffix index over the "/"-separated node names of the graph:
+    # a lookup returns the same names as checking name.endswith(suffix) for every node, in the order of insertion
+    def __init__(self):
+        self.root = SegmentTrieNode()  # Trie of the reversed segments of the names
+        self.order = {}  # Node name -> number in the order of insertion
+        self.added = 0  # Number of the names added so far (the removed ones included)
+
+    def __len__(self):
+        return len(self.order)
+
+    def __contains__(self, name):
+        return name in self.order
+
+    def add(self, name):
+        # Index the name, the names which are already indexed are skipped
+        if name in self.order:
+            return
+        self.order[name] = self.added
+        self.added += 1
+
+        trie_node = self.root
+        for segment in reversed(name.split('/')):
+            child = trie_node.children.get(segment)
+            if child is None:
+                child = trie_node.children[segment] = SegmentTrieNode()
+                trie_node.sorted_keys = None  # The set of children has changed
+            trie_node = child
+        trie_node.names.append(name)
+
+    def remove(self, name):
+        # Drop the name from the index, the trie nodes on its way stay
+        if name not in self.order:
+            return
+        del self.order[name]
+        trie_node = self.root
+        for segment in reversed(name.split('/')):
+            trie_node = trie_node.children[segment]
+        trie_node.names.remove(name)
+
+    def lookup(self, suffix):
+        # Find all indexed names which end with the suffix
+        segments = suffix.split('/')
+
+        # All segments except the first one must match whole segments of the names
+        trie_node = self.root
+        for segment in reversed(segments[1:]):
+            trie_node = trie_node.children.get(segment)
+            if trie_node is None:
+                return []
+
+        # The first segment may be only the end of the segment of a name
+        result = []
+        for key in trie_node.keys_ending_with(segments[0]):
+            self.collect(trie_node.children[key], result)
+
+        result.sort(key=self.order.__getitem__)  # Keep the order in which the nodes were added
+        return result
+
+    def collect(self, trie_node, result):
+        # Add all names of the subtree to the result
+        stack = [trie_node]
+        while stack:
+            trie_node = stack.pop()
+            result.extend(trie_node.names)
+            stack.extend(trie_node.children.values())
+
+
+class ReachabilityIndex:
+    # Answers "is the file an ancestor of the node" with one bit test: every file has a bit and every node keeps
+    # the bits of the files which reach it (as an int). The bits are computed once over the strongly connected
+    # components of the graph in the topological order, and an added edge (e.g. Invoke) passes only the new bits
+    # forward to the nodes which don't have them yet, so no answer is ever invalidated.
+    # The files keep the bits of all their nodes too, so the files reached from a file are known without a scan.
+    # Ancestors which are not files are found by a backward walk.
+    def __init__(self, graph, files):
+        self.files = list(files)  # Files in the order of their bits
+        self.bits = {file: 1 << position for position, file in enumerate(self.files)}  # File -> its bit
+        self.ancestors = {}  # Node -> bits of the files with a path to the node (0 if none are stored)
+        self.owners = {}  # Node -> file which contains it (None for other nodes), found once per node
+        self.file_ancestors = {}  # File -> bits of the files which reach any of its nodes
+        self.reached_files = {}  # File -> files which have nodes reached from it
+        self.children = {}  # Node -> successors
+        self.parents = {}  # Node -> predecessors
+        for u, neighbours in graph.adjacency():
+            for v in neighbours:
+                self.children.setdefault(u, set()).add(v)
+                self.parents.setdefault(v, set()).add(u)
+
+        # The nodes of one component reach each other, the components are met after all their predecessors
+        condensation = nx.condensation(graph)
+        for component in nx.topological_sort(condensation):
+            members = condensation.nodes[component]['members']
+            bits = 0
+            for node in members:
+                for parent in self.parents.get(node, ()):
+                    if parent not in members:
+                        bits |= self.ancestors.get(parent, 0) | self.bits.get(parent, 0)
+            if len(members) > 1 or any(node in self.children.get(node, ()) for node in members):
+                for node in members:
+                    bits |= self.bits.get(node, 0)
+            if bits:
+                for node in members:
+                    self.add_ancestors(node, bits)
+
+    def add_edge(self, u, v, type=None):
+        # Register an edge and pass the bits of the files which reach the target through it
+        if v in self.children.get(u, ()):
+            return
+        self.children.setdefault(u, set()).add(v)
+        self.parents.setdefault(v, set()).add(u)
+
+        stack = [(v, self.ancestors.get(u, 0) | self.bits.get(u, 0))]
+        while stack:
+            node, bits = stack.pop()
+            new = self.add_ancestors(node, bits)
+            if new:
+                for child in self.children.get(node, ()):
+                    stack.append((child, new))
+
+    def add_ancestors(self, node, bits):
+        # Give the bits to the node and to its file, return the bits which the node didn't have
+        new = bits & ~self.ancestors.get(node, 0)
+        if not new:
+            return 0
+        self.ancestors[node] = self.ancestors.get(node, 0) | new
+
+        owner = self.owner(node)
+        if owner is not None:
+            new_files = new & ~self.file_ancestors.get(owner, 0)
+            if new_files:
+                self.file_ancestors[owner] = self.file_ancestors.get(owner, 0) | new_files
+                while new_files:
+                    bit = new_files & -new_files  # Lowest bit
+                    new_files ^= bit
+                    self.reached_files.setdefault(self.files[bit.bit_length() - 1], set()).add(owner)
+        return new
+
+    def owner(self, node):
+        # File which contains the node: the node itself or the file part of the name of a definition
+        if node in self.owners:
+            return self.owners[node]
+        owner = node
+        while owner not in self.bits and '/' in owner:
+            owner = owner.rsplit('/', 1)[0]
+        self.owners[node] = owner if owner in self.bits else None
+        return self.owners[node]
+
+    def reachable_files(self, file):
+        # Files which have nodes reached from the file by a path of at least one edge, the set grows with the
+        # added edges
+        return self.reached_files.setdefault(file, set())
+
+    def is_ancestor(self, ancestor, node):
+        # Same answer as "ancestor in nx.ancestors(graph, node)" for the registered edges,
+        # so a node is not its own ancestor even in a cycle
+        if ancestor == node:
+            return False
+        bit = self.bits.get(ancestor)
+        if bit is not None:
+            return bool(self.ancestors.get(node, 0) & bit)
+        # Definitions are found only by the walk itself
+        return self.reaches_by_walk(ancestor, node)
+
+    def reaches_by_walk(self, ancestor, node):
+        # Walk backwards from the node
+        seen = set()
+        stack = list(self.parents.get(node, ()))
+        while stack:
+            current = stack.pop()
+            if current == ancestor:
+                return True
+            if current in seen:
+                continue
+            seen.add(current)
+            stack.extend(self.parents.get(current, ()))
+        return False
+
+
+class FileReachability:
+    # Answers the questions of ReachabilityIndex for one file at a time, for the rebuilds which resolve the calls
+    # of only a few files again: the nodes reached from the asked file are found by a forward walk, which goes on
+    # over the added edges, and the walk of another file starts anew. A file sees the edges which the graph had
+    # when the full build resolved its calls: no Class Hierarchy edges and the Invoke edges only of the callers
+    # in the same file and in the files before it (positions are the file nodes in the order of the build)
+    def __init__(self, graph, positions, owner):
+        self.graph = graph
+        self.positions = positions  # File node -> position of the file
+        self.owner = owner  # Function: node -> its file node
+        self.file = None  # File whose reached nodes are known
+        self.reached = set()  # Nodes reached from the file by a path of at least one edge
+        self.files = set()  # Files of the reached nodes
+
+    def add_edge(self, u, v, type=None):
+        # Continue the walk over the edge added to the graph
+        if self.file is not None and (u == self.file or u in self.reached) and v not in self.reached:
+            self.visit(v)
+            self.walk([v])
+
+    def reachable_files(self, file):
+        # Files which have nodes reached from the file, the set grows with the added edges
+        self.start(file)
+        return self.files
+
+    def is_ancestor(self, ancestor, node):
+        # Same answer as ReachabilityIndex.is_ancestor in the full build
+        self.start(ancestor)
+        return node in self.reached
+
+    def start(self, file):
+        # Walk from the file if it is not the current one
+        if file == self.file:
+            return
+        self.file = file
+        self.reached = set()
+        self.files = set()
+        self.walk([file])
+
+    def visit(self, node):
+        # Mark the node as reached
+        self.reached.add(node)
+        self.files.add(self.owner(node))
+
+    def walk(self, stack):
+        # Reach every node seen from the nodes of the stack
+        position = self.positions.get(self.file, len(self.positions))
+        while stack:
+            node = stack.pop()
+            owner = self.owner(node)
+            sees_invoke = owner == self.file or self.positions.get(owner, len(self.positions)) < position
+            for child, edges in self.graph.succ[node].items():
+                if child in self.reached:
+                    continue
+                for data in edges.values():
+                    type = data.get('type')
+                    if type != 'Class Hierarchy' and (type != 'Invoke' or sees_invoke):
+                        self.visit(child)
+                        stack.append(child)
+                        break
@@ -1,15 +1,37 @@
-import json  # For handling JSON data
+# The heavy dependencies which only some phases need (PIL, code2flow, the worker pool, the binary format,
+# the extraction cache, ...) are imported by these phases, so short-lived processes start fast
 import os  # For interacting with the operating system
-from pprint import pprint  # For pretty-printing data structures
+import shutil  # To remove the temporary folders of the builds
+import tempfile  # For the temporary files of the builds
+from collections import namedtuple  # For the fragments of the streamed graphs
+from fnmatch import fnmatch  # For the skip rules of the files
 import networkx as nx  # For creating and manipulating networks
 import tree_sitter_python as tspython  # Tree-sitter parser for Python
-from PIL import Image  # For image processing
 from tree_sitter import Language, Parser  # For parsing
-from os import listdir  # To list files in a directory
-from os.path import isfile, exists  # To check if a path is a file
-from code2flow import code2flow  # To generate call graph
+from parsing import ParsedFileCache, walk_tree, DEFAULT_CACHE_SIZE  # Parsing utilities
+from indexes import NameIndex, ReachabilityIndex, FileReachability  # Indexes over the graph
+from incremental import IncrementalState, file_hash  # State of the last build for the incremental rebuilds
+from call_graph import CallGraph  # Native resolution of the calls
+from storage import NodeStore  # Compact storage of the positions and bodies of the nodes
+from paths import RepoPaths  # Canonical paths of the files of the repository
+from resolver import ModuleResolver  # Module table of the repository for the imports
+from imports import ImportClosure  # Transitive imports of the files
+from profiling import BuildProfiler  # Measurements of the phases of the builds
 
 SUPPORTED_LANGUAGES = [".py"]  # Supported programming languages
+DEFAULT_MAX_FILE_SIZE = 10 * 1024 * 1024  # Bigger files (in bytes) are generated or vendored, they are skipped
+
+# Part of the graph yielded by SemanticGraphBuilder.iter_fragments for one file:
+# kind - 'definitions' (the file and its definitions with the Encapsulation and Ownership edges),
+# 'imports', 'invokes' or 'class_hierarchy' (the edges of this type which start in the file),
+# nodes - [(name, attributes)], edges - [(u, v, type)]
+GraphFragment = namedtuple('GraphFragment', ['kind', 'file', 'nodes', 'edges'])
+
+# Parts of the graph which an incremental rebuild has to build again after the changed files are patched in:
+# edited - files whose edges are stored again (None for all), invoke_files and hierarchy_files - files whose
+# Invoke and Class Hierarchy edges are built again (None for all), touched - nodes whose other out-edges changed,
+# old_invokes - caller node -> its callees before the rebuild
+GraphPatch = namedtuple('GraphPatch', ['edited', 'invoke_files', 'hierarchy_files', 'touched', 'old_invokes'])
 
 # Node colors for the graph
 NODES_COLORS = {
@@ -38,28 +60,185 @@ EDGES_STYLES = {
 
 
 class SemanticGraphBuilder:
-    def __init__(self):
+    def __init__(self, cache_size=DEFAULT_CACHE_SIZE, compact=False, extraction_cache=None,
+                 max_file_size=DEFAULT_MAX_FILE_SIZE, skip=()):
+        # extraction_cache is a folder (or an ExtractionCache) where the records extracted from the files are
+        # kept between the builds, the files with the same content are not parsed again;
+        # max_file_size (None for no limit) and the skip patterns are the rules of find_files
         self.graph = nx.MultiDiGraph()  # Initialize a directed graph
+        self.name_index = NameIndex()  # Suffix index of the graph nodes for parse_name
+        self.compact = compact  # Keep the positions in the node store and read the bodies lazily
+        self.node_store = NodeStore()  # Positions of the definitions in the compact mode
+        self.paths = RepoPaths('', [])  # Paths and node names of the files of the current build
+        self.resolver = ModuleResolver('', [])  # Modules of the current build, public for other tools
         self.py_language = Language(tspython.language())  # Set up the Python language for parsing
         self.parser = Parser(self.py_language)  # Create a parser for the Python language
-
-    def build_from_repos(self, path_to_repos, save_folder, *args, **kwargs):
-        # Build the graph from multiple repositories
+        self.cache_size = cache_size  # Memory bound of the parsed-file cache (in bytes)
+        if isinstance(extraction_cache, str):
+            from extraction_cache import ExtractionCache  # Persistent records of the files
+            extraction_cache = ExtractionCache(extraction_cache)
+        self.extraction_cache = extraction_cache  # Persistent records of the files, None if not used
+        self.file_cache = ParsedFileCache(self.parser, self.cache_size)  # Files parsed during the current build
+        self.extractions = {}  # Records extracted from every file during the current build
+        self.max_file_size = max_file_size  # Bigger files are not parsed (in bytes), None for no limit
+        self.skip = list(skip)  # Glob patterns of the skipped files and folders, e.g. "vendor", "*_pb2.py"
+        self.file_nodes = {}  # File -> names of its nodes (the file itself and its definitions)
+        self.import_dependencies = {}  # File node -> nodes of the files used to resolve its imports
+        self.superclasses = {}  # File -> [(child name, parent name)] of the classes of the file
+        self.native_calls = None  # Native call graph of the last build, patched by the incremental rebuilds
+        self.pool = None  # Pool of worker processes for the parallel extraction
+        self.pool_workers = 0  # Number of processes in the pool
+        self.last_report = None  # Profiling report of the last build
+        self.temp_folder = None  # Temporary folder of the current build (e.g. for the output of code2flow)
+        self.corpus = None  # Graph merged from the repositories of build_from_repos in the corpus mode
+        self.live_state = None  # (repository, mode, state) of the state which the graph was last saved to
+
+    def build_from_repos(self, path_to_repos, save_folder, *args, corpus=False, **kwargs):
+        # Build a separate graph for every repository, the pool of workers is shared by all the builds.
+        # With corpus the graphs are also merged one by one into self.corpus (see CorpusGraph)
         folders = [f for f in os.listdir(path_to_repos) if os.path.isdir(os.path.join(path_to_repos, f))]
-        for dir in folders:
-            self.path_to_repo = path_to_repos + "\\" + dir  # Set the current repository path
-            self.build(save_folder, *args, **kwargs)  # Build the graph
+        reports = []  # Profiling reports of the builds
+        if corpus:
+            from corpus import CorpusGraph  # Graph merged from many repositories
+            self.corpus = CorpusGraph()
+        try:
+            for dir in folders:
+                self.path_to_repo = path_to_repos + "\\" + dir  # Set the current repository path
+                reports.append(self.build(save_folder, *args, **kwargs))  # Build the graph
+                if corpus:
+                    self.corpus.add_repo(self.path_to_repo, self.graph, self.file_nodes, self.node_position)
+        finally:
+            self.close_pool()
+        return reports
 
     def build_from_one(self, path_to_repo, save_folder, *args, **kwargs):
         # Build the graph from a single repository
         self.path_to_repo = path_to_repo  # Set the repository path
-        self.build(save_folder, *args, **kwargs)  # Build the graph
-
-    def define_files_for_check(self):
-        dct = {}
-        for file in self.files_to_parse:
-            dct[file] = 0
-        return dct
+        try:
+            return self.build(save_folder, *args, **kwargs)  # Build the graph
+        finally:
+            self.close_pool()
+
+    def iter_fragments(self, path_to_repo, workers=1):
+        # Build the graph of the repository and yield it file by file as soon as the parts are known:
+        # the definitions of every file right after it is extracted, then the Import, Invoke and
+        # Class Hierarchy edges of every file once they are resolved (the calls are resolved natively).
+        # Nothing has to be kept by the caller; in the compact mode the builder does not keep the bodies either,
+        # they are read from the files only for the fragments
+        self.path_to_repo = path_to_repo
+        self.reset_graph()
+        self.file_cache = ParsedFileCache(self.parser, self.cache_size)
+        self.set_files(self.find_files(self.path_to_repo))
+        self.extractions = {}
+        try:
+            for file, extraction in self.iter_extractions(workers):
+                self.extractions[file] = extraction
+                self.build_encapsulation_and_ownership([file])
+                names = list(dict.fromkeys(self.file_nodes[file]))  # A name may be defined twice in the file
+                nodes = [(name, self.fragment_attributes(name)) for name in names]
+                edges = [(u, v, data['type']) for name in names
+                         for u, v, data in self.graph.out_edges(name, data=True)]
+                yield GraphFragment('definitions', file, nodes, edges)
+
+            for kind, type, build in (('imports', 'Import', self.build_import),
+                                      ('invokes', 'Invoke', self.build_native_invoke),
+                                      ('class_hierarchy', 'Class Hierarchy', self.build_class_hierarchy)):
+                nodes_before = len(self.graph)
+                build()
+                # The edges are grouped by the files of their sources, the nodes which were created only by
+                # the edges (e.g. classes which are not among the extracted definitions) come with them
+                fragments = {}
+                for u, v, data in self.graph.edges(data=True):
+                    if data['type'] == type:
+                        fragments.setdefault(self.paths.path(self.find_file_in_path(u)), []).append((u, v, type))
+                new_nodes = set(list(self.graph)[nodes_before:])
+                for file, edges in fragments.items():
+                    nodes = []
+                    for u, v, _ in edges:
+                        for node in (u, v):
+                            if node in new_nodes:
+                                new_nodes.discard(node)
+                                nodes.append((node, self.fragment_attributes(node)))
+                    yield GraphFragment(kind, file, nodes, edges)
+        finally:
+            self.end()
+            self.close_pool()
+
+    def fragment_attributes(self, node):
+        # Attributes of the node for the fragments, with the position and the body also in the compact mode
+        attributes = dict(self.graph.nodes[node])
+        if self.compact and node in self.node_store:
+            attributes.update(self.node_store.position(node))
+            attributes['body'] = self.node_store.body(node)
+        return attributes
+
+    def get_pool(self, workers):
+        # Create the pool of worker processes once and reuse it for the next builds
+        if self.pool is None or self.pool_workers != workers:
+            from concurrent.futures import ProcessPoolExecutor  # For the parallel extraction
+            self.close_pool()
+            self.pool = ProcessPoolExecutor(max_workers=workers, initializer=init_worker,
+                                            initargs=(self.cache_size,))
+            self.pool_workers = workers
+        return self.pool
+
+    def close_pool(self):
+        # Stop the worker processes
+        if self.pool is not None:
+            self.pool.shutdown()
+            self.pool = None
+            self.pool_workers = 0
+
+    def reset_graph(self):
+        # Start from an empty graph
+        self.graph = nx.MultiDiGraph()
+        self.name_index = NameIndex()
+        self.node_store.clear()
+        self.file_nodes = {}
+        self.import_dependencies = {}
+        self.superclasses = {}
+        self.native_calls = None
+        self.live_state = None
+
+    def file_node(self, file):
+        # Name of the node of the file
+        return self.paths.node(file)
+
+    def add_node(self, node, **attributes):
+        # Add a node to the graph and to the name index
+        self.name_index.add(node)
+        self.graph.add_node(node, **attributes)
+
+    def add_edge(self, u, v, **attributes):
+        # Add an edge to the graph, its nodes are indexed if they appear for the first time.
+        # Edges are unique by (u, v, type): a repeated edge only updates the attributes of the existing one,
+        # so duplicates never reach the graph; the key of the edge is returned
+        if self.graph.has_edge(u, v):
+            for key, data in self.graph.succ[u][v].items():
+                if data.get('type') == attributes.get('type'):
+                    data.update(attributes)
+                    return key
+        self.name_index.add(u)
+        self.name_index.add(v)
+        return self.graph.add_edge(u, v, **attributes)
+
+    def node_position(self, node):
+        # Position attributes of the definition: start_byte, end_byte, start_point and end_point
+        if self.compact:
+            return self.node_store.position(node)
+        data = self.graph.nodes[node]
+        return {key: data[key] for key in ('start_byte', 'end_byte', 'start_point', 'end_point')}
+
+    def get_body(self, node):
+        # Source code of the body of the definition, in the compact mode it is read from the file only now
+        if self.compact:
+            return self.node_store.body(node)
+        return self.graph.nodes[node]['body']
+
+    def query(self):
+        # Indexed lookups over the graph of the last build (see GraphQuery)
+        from query import GraphQuery
+        return GraphQuery(self.graph, self.name_index)
 
     def get_import(self):
         # only for debugging
@@ -67,160 +246,235 @@ class SemanticGraphBuilder:
             if edge[2]['type'] == "Import":
                 print(*edge)
 
-    def build(self, save_folder, gsave=False, gprint=False, debugging=0):
-        # Build the semantic graph
-        # os.system(f"code2flow {self.path_to_repo} -o __temp__.json -q")  # Generate a flow graph using console
-        code2flow([self.path_to_repo], '__temp__.json', language="py", skip_parse_errors=True)
-        self.files_to_parse = self.find_files(self.path_to_repo)  # Find files to parse
-        self.already_checked = self.define_files_for_check()
-        self.build_encapsulation_and_ownership()  # Build encapsulation and ownership relationships
-        self.build_import(debugging)  # Build import relationships
-        self.build_invoke(debugging)  # Build invoke relationships
-        self.build_class_hierarchy()  # Build class hierarchy relationships
-        self.delete_duplicate_edges()
+    def build(self, save_folder, gsave=False, gprint=False, debugging=0, workers=1, incremental=False,
+              call_graph='native', gformat='gml', gprint_options=None, profile=False, profile_save=False,
+              profile_hook=None, profile_memory=False):
+        # Build the semantic graph, call_graph is 'native' (calls from the parsed trees) or 'code2flow',
+        # gformat is the format of the saved graph: 'gml' or 'binary',
+        # gprint_options are passed to print_graph (e.g. {'edge_types': ['Import'], 'show': False}),
+        # incremental may also be an IncrementalState kept by the caller instead of the one next to the graph.
+        # With profile (or profile_hook) the phases are measured: the report is returned and kept in last_report,
+        # profile_save writes it next to the graph, profile_hook is called with it at the end of the build.
+        # profile_memory also traces the allocations of the phases with tracemalloc, it slows the build down
+        profiler = BuildProfiler(profile or profile_memory or profile_hook is not None, self.graph_counts,
+                                 profile_memory)
+        profiler.start()
+        self.temp_folder = tempfile.mkdtemp(prefix='semantic_graph_')  # Not shared with other builds
+        try:
+            self.run_phases(profiler, save_folder, gsave, gprint, debugging, workers, incremental, call_graph,
+                            gformat, gprint_options)
+        finally:
+            profiler.stop()
+            shutil.rmtree(self.temp_folder, ignore_errors=True)
+            self.temp_folder = None
+        self.last_report = profiler.report(repo=self.path_to_repo, call_graph=call_graph,
+                                           incremental=bool(incremental), workers=workers)
+        if profiler.enabled:
+            if profile_save:
+                name = f'{self.path_to_repo.split(chr(92))[-1]}.profile.json'
+                profiler.save(self.last_report, save_folder + "//" + name)
+            if profile_hook is not None:
+                profile_hook(self.last_report)
+        return self.last_report
+
+    def graph_counts(self):
+        # Current size of the graph for the counts of the profiled phases
+        return {'nodes': self.graph.number_of_nodes(), 'edges': self.graph.number_of_edges()}
+
+    def run_phases(self, profiler, save_folder, gsave, gprint, debugging, workers, incremental, call_graph,
+                   gformat, gprint_options):
+        # Phases of the build, each one measured by the profiler.
+        # There is no deduplication phase: the edges are deduplicated when they are added
+        live_state = self.live_state  # The graph is patched in place if it is the one saved to the state
+        self.live_state = None  # Until the state is saved again
+        if call_graph == 'code2flow':
+            with profiler.phase('code2flow'):
+                from code2flow import code2flow  # To generate call graph
+                # Generate a flow graph using console:
+                # os.system(f"code2flow {self.path_to_repo} -o {self.flow_path()} -q")
+                code2flow([self.path_to_repo], self.flow_path(), language="py", skip_parse_errors=True)
+        self.file_cache = ParsedFileCache(self.parser, self.cache_size)  # Every file is parsed once per build
+        with profiler.phase('find_files') as counts:
+            self.set_files(self.find_files(self.path_to_repo))  # Find files to parse
+            counts['files'] = len(self.files_to_parse)
+
+        state = None
+        hashes = None  # Content hashes of the files, computed by the comparison with the state
+        if incremental:
+            # Compare the files with the state of the last build saved next to the graph (or given by the caller)
+            with profiler.phase('compare_state') as counts:
+                if isinstance(incremental, IncrementalState):
+                    state = incremental
+                else:
+                    state = IncrementalState(self.state_path(save_folder))
+                has_state = state.load(self.path_to_repo, self.compact, call_graph)
+                changed, removed, signatures, hashes = state.compare(self.files_to_parse)
+                if len(signatures) < len(self.files_to_parse):
+                    # Some files disappeared after they were listed (e.g. the temporary files of an editor)
+                    self.set_files([file for file in self.files_to_parse if file in signatures])
+                if not has_state:
+                    # The state of another repository or mode: every file is built and stored again
+                    state.forget(list(state.files))
+                    changed, removed = list(self.files_to_parse), []
+                counts['changed_files'] = len(changed)
+                counts['removed_files'] = len(removed)
+            if debugging:
+                print(f"Changed files: {len(changed)}, removed files: {len(removed)}")
+
+        patch = GraphPatch(None, None, None, set(), {})  # A full build builds every part
+        if state is not None and has_state:
+            with profiler.phase('update_changed_files') as counts:
+                # Patch the last graph
+                patch = self.update_changed_files(state, changed, removed, hashes, workers, debugging,
+                                                  live_state == self.state_key(state), call_graph == 'native')
+                counts['files'] = len(changed)
+        else:
+            self.reset_graph()  # A full build starts from an empty graph, nothing is left from the previous one
+            with profiler.phase('extract') as counts:
+                self.extractions = self.extract_files(workers, hashes=hashes)  # Parse the files, extract the records
+                counts['files'] = len(self.extractions)
+            with profiler.phase('encapsulation'):
+                self.build_encapsulation_and_ownership()  # Build encapsulation and ownership relationships
+            with profiler.phase('import'):
+                self.build_import(debugging)  # Build import relationships
+        with profiler.phase('invoke') as counts:
+            if call_graph == 'code2flow':
+                self.build_invoke(debugging)  # Build invoke relationships from the call graph of code2flow
+            elif patch.invoke_files is None:
+                self.build_native_invoke(debugging)  # Build invoke relationships from the extracted calls
+            else:
+                self.update_invoke(patch, debugging)  # Resolve the calls of the affected files again
+                counts['files'] = len(patch.invoke_files)
+        with profiler.phase('class_hierarchy') as counts:
+            if patch.hierarchy_files is None:
+                self.build_class_hierarchy()  # Build class hierarchy relationships
+            else:
+                self.update_class_hierarchy(patch.hierarchy_files)
+                counts['files'] = len(patch.hierarchy_files)
+        if state is not None:
+            with profiler.phase('save_state'):
+                edited = None
+                if patch.edited is not None:
+                    edited = patch.edited | patch.invoke_files | patch.hierarchy_files
+                self.save_state(state, changed, removed, signatures, hashes, call_graph, edited)
+        if debugging:
+            print(self.file_cache.stats())  # Print the usage of the parsed-file cache
+            if self.extraction_cache is not None:
+                print(self.extraction_cache.stats())  # Print the usage of the extraction cache
         if gsave:
-            self.save_graph(save_folder)
+            with profiler.phase('save_graph'):
+                self.save_graph(save_folder, gformat)
         if gprint:
-            self.print_graph()  # Print the graph if requested
+            with profiler.phase('print_graph'):
+                self.print_graph(**(gprint_options or {}))  # Print the graph if requested
         self.end()
 
-    def find_files(self, path):
-        # Find all supported files in the given path
+    def set_files(self, files):
+        # Files of the current build
+        self.files_to_parse = files
+        self.paths = RepoPaths(self.path_to_repo, files)  # Map the files to their nodes once
+        self.resolver = ModuleResolver(self.path_to_repo, files, separator=os.sep)  # Resolve the imports in memory
+
+    def find_files(self, path, relative=''):
+        # Find all supported files in the given path.
+        # A file or a folder is skipped if its name or its path from the repository ("/"-separated)
+        # matches one of the skip patterns, the skipped folders are not entered; files bigger than
+        # max_file_size are skipped too
         files = []
 
-        for file in listdir(path):
-            current_instance = path + "\\" + file  # Construct the full file path
-
-            if isfile(current_instance) and file[-3:] in SUPPORTED_LANGUAGES:
-                files.append(current_instance)  # Add supported files to the list
-            elif not isfile(current_instance):
-                files.extend(self.find_files(current_instance))  # Recursively find files in subdirectories
+        # The entries of the directory know their types, so the files are not checked one by one
+        with os.scandir(path) as entries:
+            for entry in entries:
+                current_instance = os.path.join(path, entry.name)  # Construct the full file path
+                current_relative = relative + entry.name
+                if any(fnmatch(entry.name, pattern) or fnmatch(current_relative, pattern) for pattern in self.skip):
+                    continue
+
+                if entry.is_file() and entry.name[-3:] in SUPPORTED_LANGUAGES:
+                    if self.max_file_size is None or entry.stat().st_size <= self.max_file_size:
+                        files.append(current_instance)  # Add supported files to the list
+                elif not entry.is_file():
+                    # Recursively find files in subdirectories
+                    files.extend(self.find_files(current_instance, current_relative + '/'))
 
         return files  # Return the list of found files
 
-    def build_encapsulation_and_ownership(self):
-        # Build encapsulation and ownership relationships from parsed files
-        for file in self.files_to_parse:
-            with open(file, 'r', errors='ignore') as f:
-                source_code = f.read()  # Read the source code from the file
-            tree = self.parser.parse(bytes(source_code, 'utf-8'))  # Parse the source code
-
-            # Define a query to capture class and function definitions
-            query = self.py_language.query("""
-            (class_definition
-                name: (identifier) @class.name
-                body: (block) @class.body
-            )
-
-            (function_definition
-                name: (identifier) @func.name
-                parameters: (parameters) @func.parameters
-                body: (block) @func.body
-            )
-            """)
-
-            captures = query.captures(tree.root_node)  # Execute the query on the parsed tree
-
-            for el in captures:
-                captures[el].sort(key=lambda x: x.start_byte)  # Sort captures by start byte
-
-            definitions = []  # Initialize a list to hold definitions
-
-            # Find function and class names and add them to definitions
-            definitions = self.find_function_names(captures, definitions)
-            definitions = self.find_class_names(captures, definitions)
-
-            definitions.sort(key=lambda x: x['for_sorting'])  # Sort definitions for processing
-
-            self.construct_graph(definitions, file, source_code)  # Construct the graph with the definitions
-
-    def find_function_names(self, captures, definitions):
-        # Find function names from captures and add them to definitions
-        if "func.name" in captures.keys():
-            for i in range(len(captures["func.name"])):
-                definitions.append(
-                    {
-                        'name': captures["func.name"][i].text.decode('utf-8'),  # Function name
-                        'start_byte': captures["func.body"][i].start_byte,  # Start byte of the function body
-                        'nesting': 0,  # Nesting level
-                        'type': 'function',  # Type of definition
-                        'end_byte': captures["func.body"][i].end_byte,  # End byte of the function body
-                        'start_point': captures["func.body"][i].start_point,  # Start point of the function body
-                        'end_point': captures["func.body"][i].end_point,  # End point of the function body
-                        'for_sorting': [captures["func.body"][i].start_byte, 0]  # For sorting purposes
-                    }
-                )
-                definitions.append(
-                    {
-                        'name': captures["func.name"][i].text.decode('utf-8'),  # Function name
-                        'end_byte': captures["func.body"][i].end_byte,  # End byte of the function body
-                        'nesting': 1,  # Nesting level
-                        'type': "function",  # Type of definition
-                        'for_sorting': [captures["func.body"][i].end_byte, 1]  # For sorting purposes
-                    }
-                )
-        return definitions  # Return the updated definitions list
-
-    def find_class_names(self, captures, definitions):
-        # Find class names from captures and add them to definitions
-        if "class.name" in captures.keys():
-            for i in range(len(captures["class.name"])):
-                definitions.append(
-                    {
-                        'name': captures["class.name"][i].text.decode('utf-8'),  # Class name
-                        'start_byte': captures["class.body"][i].start_byte,  # Start byte of the class body
-                        'nesting': 0,  # Nesting level
-                        'type': 'class',  # Type of definition
-                        'end_byte': captures["class.body"][i].end_byte,  # End byte of the class body
-                        'start_point': captures["class.body"][i].start_point,  # Start point of the class body
-                        'end_point': captures["class.body"][i].end_point,  # End point of the class body
-                        'for_sorting': [captures["class.body"][i].start_byte, 0]  # For sorting purposes
-                    }
-                )
-                definitions.append(
-                    {
-                        'name': captures["class.name"][i].text.decode('utf-8'),  # Class name
-                        'end_byte': captures["class.body"][i].end_byte,  # End byte of the class body
-                        'nesting': 1,  # Nesting level
-                        'type': "class",  # Type of definition
-                        'for_sorting': [captures["class.body"][i].end_byte, 1]  # For sorting purposes
-                    }
-                )
-        return definitions  # Return the updated definitions list
-
-    def construct_graph(self, definitions, source, source_code):
+    def extract_files(self, workers=1, files=None, hashes=None):
+        # Extract the records of every file, spreading the files across worker processes if several are requested
+        return dict(self.iter_extractions(workers, files, hashes))
+
+    def iter_extractions(self, workers=1, files=None, hashes=None):
+        # Pairs (file, records of the file) in the order of the files, each one as soon as it is extracted;
+        # hashes are the content hashes of the files which are already known (e.g. from IncrementalState.compare)
+        files = self.files_to_parse if files is None else files
+        if self.extraction_cache is None:
+            return zip(files, self.extract_records(workers, files))
+        return self.iter_cached_extractions(workers, files, hashes or {})
+
+    def iter_cached_extractions(self, workers, files, known_hashes):
+        # The same pairs, only the files whose content is not in the extraction cache are parsed
+        hashes = {file: known_hashes.get(file) or file_hash(file) for file in files}  # Keys of the records
+        found = self.extraction_cache.get_many(set(hashes.values()))
+        records = iter(self.extract_records(workers, [file for file in files if hashes[file] not in found]))
+        for file in files:
+            extraction = found.get(hashes[file])
+            if extraction is None:
+                extraction = next(records)
+                self.extraction_cache.put(hashes[file], extraction)
+            yield file, extraction
+
+    def extract_records(self, workers, files):
+        # Records of the files in their order, spread across worker processes if several are requested
+        if workers > 1 and len(files) > 1:
+            chunksize = max(1, len(files) // (workers * 4))  # Several chunks per worker for balance
+            return self.get_pool(workers).map(extract_file_in_worker, files, chunksize=chunksize)
+        return map(self.extract_file, files)
+
+    def extract_file(self, file):
+        # Parse the file once and extract its definitions, imports, superclasses and calls with one walk of the tree
+        return walk_tree(self.file_cache.get(file).tree)
+
+    def build_encapsulation_and_ownership(self, files=None):
+        # Build encapsulation and ownership relationships from the extracted definitions
+        for file in self.files_to_parse if files is None else files:
+            # The source is needed only for the bodies of the non-compact nodes
+            parsed = None if self.compact else self.file_cache.get(file)
+            self.file_nodes[file] = self.construct_graph(self.extractions[file].definitions, file, parsed)
+            self.superclasses[file] = self.extractions[file].superclasses  # For the class hierarchy
+
+    def construct_graph(self, definitions, source, parsed):
         # Construct the semantic graph from definitions
-        counter = 0  # Initialize nesting counter
-
-        path_to_object = [source.replace('\\', '/').replace(':', '.')]  # Get the source file name
-        self.graph.add_node(path_to_object[0], nesting=counter, color=NODES_COLORS['script'])  # Add the script node
-
-        # Construct the graph by traversing the definitions
-        for object in definitions:
-            if object['nesting'] == 0:  # Entering a new scope
-                counter += 1  # Increase nesting level
-                path_to_object.append(object['name'])  # Add the current definition name to the path
-
-                # Add a node for the current definition
-                self.graph.add_node(
-                    "/".join(path_to_object), nesting=counter, color=NODES_COLORS[object['type']],
-                    start_byte=object['start_byte'], end_byte=object['end_byte'],
-                    start_point=object['start_point'], end_point=object['end_point'],
-                    body=source_code[object['start_byte']: object['end_byte']]
+        path_to_object = [self.file_node(source)]  # Names of the nodes of the open scopes, from the file down
+        self.add_node(path_to_object[0], nesting=0, color=NODES_COLORS['script'])  # Add the script node
+        nodes = [path_to_object[0]]  # Names of all nodes of the file
+
+        # Construct the graph by traversing the definitions in the order of their bodies
+        for nesting, name, type, start_byte, end_byte, start_point, end_point in definitions:
+            del path_to_object[nesting:]  # Leave the scopes which were closed before the current definition
+            node = path_to_object[-1] + "/" + name  # One string shared by the graph, the store and the edges
+
+            # Add a node for the current definition
+            if self.compact:
+                # The position goes to the columns of the store, the body is not copied
+                self.add_node(node, nesting=nesting, color=NODES_COLORS[type])
+                self.node_store.add(node, source, start_byte, end_byte, start_point, end_point)
+            else:
+                self.add_node(
+                    node, nesting=nesting, color=NODES_COLORS[type],
+                    start_byte=start_byte, end_byte=end_byte,
+                    start_point=start_point, end_point=end_point,
+                    body=parsed.body(start_byte, end_byte)
                 )
+            nodes.append(node)
 
-                # Add an edge indicating ownership and encapsulation in the hierarchy
-                if len(path_to_object) == 2:
-                    self.graph.add_edge("/".join(path_to_object[:-1]), "/".join(path_to_object), type="Encapsulation")
-                else:
-                    self.graph.add_edge("/".join(path_to_object[:-1]), "/".join(path_to_object), type="Ownership")
-
-            if object['nesting'] == 1:  # Exiting the current scope
-                counter -= 1  # Decrease nesting level
-                path_to_object.pop()  # Remove the last definition from the path
+            # Add an edge indicating ownership and encapsulation in the hierarchy
+            if len(path_to_object) == 1:
+                self.add_edge(path_to_object[-1], node, type="Encapsulation")
+            else:
+                self.add_edge(path_to_object[-1], node, type="Ownership")
+            path_to_object.append(node)  # The current definition is the innermost open scope
 
-            if counter < 0:  # Sanity check for invalid nesting
-                print("ERROR!")  # Print an error message if nesting is invalid
+        return nodes
 
     def get_imports_count(self):
         ct = 0
@@ -229,288 +483,143 @@ class SemanticGraphBuilder:
                 ct += 1
         return ct
 
-    def build_import(self, debugging=0):
+    def build_import(self, debugging=0, files=None):
+        # Build import relationships: the Import targets of every file are computed once, in the order of the
+        # strongly connected components of the import graph (see ImportClosure)
+        files = self.files_to_parse if files is None else files
+        computed = set(files)
+
+        # Top-level definitions of every file and the targets of the files which are kept from the last build
+        top_level = {}
+        fixed = {}
         for file in self.files_to_parse:
-            # Set the status of the current file as 1(in progress)
-            self.already_checked[file] = 1
-            # Construct import edges for the file
-            self.construct_import_for_file(file)
+            file_node = self.file_node(file)
+            top_level[file_node] = set()
+            fixed[file_node] = []
+            for _, target, data in self.graph.out_edges(file_node, data=True):
+                if data['type'] == 'Encapsulation':
+                    top_level[file_node].add(target)
+                elif data['type'] == 'Import' and file not in computed:
+                    fixed[file_node].append(target)
+
+        closure = ImportClosure(top_level, fixed)
+        for file in files:
+            closure.add_file(self.file_node(file), *self.find_import_references(file))
+        for file_node, targets in closure.solve().items():
+            for target in targets:
+                self.add_edge(file_node, target, type='Import')
+
         if debugging:
             print(self.get_imports_count())
             self.get_import()
 
-    def construct_import_for_file(self, file):
-        # Initialize array to collect all imports of a current file and imports of the "imported" files
-        # (nested imports)
-        instances_to_connect = []
-
-        # Read the code and then parse it
-        with open(file, 'r', errors='ignore') as f:
-            source_code = f.read()
-
-        tree = self.parser.parse(bytes(source_code, 'utf-8'))
-
-        # Initialize the list of all files with rewritten names
-        repo_files = [file.replace("\\", '/').replace(':', '.') for file in
-                      self.files_to_parse]
-
-        # Define queries:
-        # query - standard "import" or "from smt import smt"
-        query = self.py_language.query("""
-        (import_statement
-            name: (dotted_name) @file.name
-        )
-
-        (import_from_statement
-            module_name: (dotted_name) @script.name
-            name: (dotted_name) @imports
-        )              
-        """)
-
-        # query_aliased - "import smth1 as smth2" or "from smth1 import smth2 as smth3"
-        query_aliased = self.py_language.query("""
-        (import_statement
-            name: (aliased_import) @file
-        )
-
-        (import_from_statement
-            module_name: (dotted_name) @script.name
-            name: (aliased_import) @imports
-        )              
-        """)
-
-        # query_wildcard - "from smth import *"
-        query_wildcard = self.py_language.query("""
-        (import_from_statement
-            module_name: (dotted_name) @script.name
-            (wildcard_import)
-        )              
-        """)
-
-        # query_with_dots - "from ...smth import smt"
-        query_with_dots = self.py_language.query("""
-        (import_from_statement
-            module_name: (relative_import) @script.name
-            name: (dotted_name) @imports
-        )              
-        """)
-
-        # Execute the queries on the parsed tree
-        captures = query.captures(tree.root_node)
-        captures_aliased = query_aliased.captures(tree.root_node)
-        captures_wildcard = query_wildcard.captures(tree.root_node)
-        captures_with_dots = query_with_dots.captures(tree.root_node)
-
-        # Define a name of the current file
-        connect_with = file.replace('\\', '/').replace(':', '.')
+    def find_import_references(self, file):
+        # Files of the repository imported by the file: with "import smth" and "from package import module",
+        # with "from smth import *" and the pairs (file, name) of "from smth import name"
+        captures = self.extractions[file].imports
+
+        modules = self.for_import(captures, 'import.name', file) + self.for_import(captures, 'import.aliased', file)
+        wildcards = self.for_import(captures, 'wildcard.module', file)
 
+        # "from smth import smth", "from smth1 import smth2 as smth3" and "from ...smth import smth"
         definitions = []
+        for prefix in ('from', 'from_aliased', 'relative'):
+            definitions += self.for_import_from(captures, prefix + '.name', 'instance')
+            definitions += self.for_import_from(captures, prefix + '.module', 'module')
+        definitions.sort(key=lambda x: x['start_byte'])  # Sort definitions by start byte
+
+        # Every imported name belongs to the closest module before it,
+        # the name is a submodule of the module or a name defined or imported by the module file
+        names = []
+        module = module_file = None
+        for object in definitions:
+            if object['type'] == 'module':
+                module = object['name']
+                module_file = self.resolve_import(file, module)
+                continue
+            if module is None:
+                continue
+            source_file = self.resolve_import(file, module, object['name'])
+            if source_file is None:
+                continue
+
+            # Remember the file for the incremental rebuilds
+            source_node = self.file_node(source_file)
+            self.import_dependencies.setdefault(self.file_node(file), set()).add(source_node)
+            if source_file == module_file:
+                names.append((source_node, object['name']))
+            else:
+                modules.append(source_node)  # The submodule is imported as with "import smth"
+
+        return modules, wildcards, names
+
+    def resolve_import(self, file, module, name=None):
+        # File of the repository imported by the file with "import module" (or "from module import name":
+        # the submodule "name" if it exists, otherwise the module), None for the modules outside of the repository;
+        # an absolute name which is not found from the root is looked up in the folder of the file,
+        # as for the scripts which are run from their folder
+        candidates = (module,) if module.startswith('.') else (module, '.' + module)
+        for candidate in candidates:
+            if name is None:
+                source_file = self.resolver.resolve(candidate, file)
+            else:
+                source_file = self.resolver.resolve_from(candidate, name, file)
+            if source_file is not None:
+                return source_file
+        return None
 
-        # For each type of captures build import edges and extended array of imports
-        try:
-            if 'file.name' in captures.keys():
-                instances_to_connect += self.for_import(captures, 'file.name',
-                                                        source_code, repo_files, connect_with)
-
-            if 'file' in captures_aliased.keys():
-                captures_aliased['file'] = [file.children[0] for file in captures_aliased['file']]
-                instances_to_connect += self.for_import(captures_aliased, 'file',
-                                                        source_code, repo_files, connect_with)
-
-            if 'script.name' in captures_wildcard.keys():
-                instances_to_connect += self.for_import(captures_wildcard, 'script.name',
-                                                        source_code, repo_files, connect_with, for_wildcards=True)
-            if 'script.name' in captures.keys():
-                instances_to_connect += self.for_import_from(captures,
-                                                             'imports', 'instance', source_code, definitions, file)
-                instances_to_connect += self.for_import_from(captures,
-                                                             'script.name', 'file', source_code, definitions, file)
-
-            if 'script.name' in captures_aliased.keys():
-                captures_aliased['imports'] = [instance.children[0] for instance in captures_aliased['imports']]
-                instances_to_connect += self.for_import_from(captures_aliased,
-                                                             'imports', 'instance', source_code, definitions, file)
-                instances_to_connect += self.for_import_from(captures_aliased,
-                                                             'script.name', 'file', source_code, definitions, file)
-
-            if 'script.name' in captures_with_dots.keys():
-                instances_to_connect += self.for_import_from(captures_with_dots,
-                                                             'imports', 'instance', source_code, definitions, file)
-                instances_to_connect += self.for_import_from(captures_with_dots,
-                                                             'script.name', 'file', source_code, definitions, file)
-
-            definitions.sort(key=lambda x: x['start_byte'])  # Sort definitions by start byte
-
-            current_path = []  # Initialize current path for imports
-
-            # Define file names and objects form these files
-            for object in definitions:
-                # If object's type - file, current_path should contain only its name
-                if object['type'] == 'file':
-                    current_path = [object['name']]
-                else:
-                    # Check if file is from repo
-                    if current_path[0] in repo_files:
-                        # If object's type is instance, concatenate the current_path
-                        current_path.append(object['name'])
-                        # Find the appropriate file from which the instance is imported (nested imports) and add
-                        # an edge
-                        self.additional_imports(object['name'], connect_with,
-                                                instances_to_connect, namespace=current_path[0])
-                        # Delete the instance name
-                        current_path.pop()
-        except RecursionError as error:
-            print("Your repo may have circular import or contains instances with it")
-            print(f"The last two files in it are {error.args[0]} and {error.args[1]}")
-        # Set file status as 2 (already checked)
-        self.already_checked[file] = 2
-
-        # Add edges from the nested imports
-        for object in instances_to_connect:
-            self.graph.add_edge(connect_with, object, type='Import')
-
-        # Pass the list of current file imports for the next file, if the func was called recursively
-        return instances_to_connect
-
-    def define_file_path(self, name, current_path):
-        # Define a path to folder in which file is located (file means "file to which we import")
-        folder = '\\'.join(current_path.split('\\')[:-1]).replace('.', ':')
-
-        # If the file name contain dots, go tho the upper folders from the current one
-        while len(name) != 0 and name[0] == '.':
-            # Delete one dot form the name
-            name = name[1:]
-            # Go upper on one level from the folder
-            folder = '\\'.join(folder.split('\\')[:-1])
-
-        # Check if in the file name exists on the current folder level
-        if exists(folder + '\\' + name + '.py'):
-            # If it exists, connect it
-            return folder.replace('\\', '/').replace(':', '.') + '/' + name.replace('\\', '/') + '.py'
-
-        # Check if the file name exists on a higher level
-        if exists('\\'.join(folder.split('\\')[:-1]) + '\\' + name + '.py'):
-            return '/'.join(folder.split('\\')[:-1]).replace(':', '.') + '/' + name.replace('\\', '/') + '.py'
-
-        # In other case it should be located at the highest level
-        return self.path_to_repo.replace('\\', '/').replace(':', '.') + '/' + name.replace('\\', '/') + '.py'
-
-    def for_import(self, dct, key_name, source_code, repo_files, connect_with, for_wildcards=False):
-        # Process import statements and add edges to the graph
-        for_future_connection = []  # Initialize the list of imports
-
-        for file in dct[key_name]:
-            # Extract the source file name from the import statement
-            name = source_code[file.start_byte: file.end_byte]
-            source_file = self.define_file_path(name.replace('.', '\\'),
-                                                connect_with)
-
-            # If the source file is in the repository files, add an edge
-            if source_file in repo_files:
-                # Define a name of the file
-                file_name = source_file.replace('.', ':').replace('/', chr(92))[:-3] + '.py'
-                # Check its status
-                if self.already_checked[file_name] == 0:
-                    # If the file haven't been checked, set its status to 1(in progress) and check it
-                    self.already_checked[file_name] = 1
-                    for_future_connection += self.construct_import_for_file(file_name)
-                # If its status is "in progress" rise an error of circular import
-                elif self.already_checked[file_name] == 1:
-                    # Define the last two names of the circle
-                    raise RecursionError(str(connect_with), str(file_name))
-
-                # If file is imported with wildcard, connect all its instances with the current file
-                if not for_wildcards:
-                    self.graph.add_edge(connect_with, source_file, type="Import")
-                    for_future_connection.append(source_file)
-                else:
-                    # For wildcard imports, connect to all out edges of the source file
-                    for node in self.graph.out_edges(source_file):
-                        self.graph.add_edge(connect_with, node[1], type="Import")
-                        for_future_connection.append(node[1])
-                self.additional_imports(source_file, connect_with, [])
-
-        return for_future_connection
-
-    def for_import_from(self, dct, key_name, type, source_code, definitions, path):
-        for_future_connection = []
-        # Process imports from specific modules and add to definitions
-        for instance in dct[key_name]:
-            # Define the name of a file or instance, and add .py if it's a file
-            name = source_code[instance.start_byte: instance.end_byte]
-
-            if type == 'file':
-                # Define the dots count before the file name and delete them for the appropriate work
-                prefix_dots_count = 0
-                while len(name) != 0 and name[0] == '.':
-                    prefix_dots_count += 1
-                    name = name[1:]
-
-                # Define the path to the file and its "normal name" in the system
-                name = self.define_file_path('.' * (prefix_dots_count - 1) + (name.replace('.', '\\')), path)
-                file_name = name.replace('.', ':').replace('/', chr(92))[:-3] + '.py'
-
-                # Check its status and rise an error in the case of circular import
-                if file_name in self.files_to_parse and self.already_checked[file_name] == 0:
-                    self.already_checked[file_name] = 1
-                    for_future_connection += self.construct_import_for_file(file_name)
-
-                elif file_name in self.files_to_parse and self.already_checked[file_name] == 1:
-                    # If the file does not import itself rise an error
-                    if path != file_name: raise RecursionError(str(path), str(file_name))
-
-            # Append the definition to the definitions list
+    def for_import(self, dct, key_name, file):
+        # Files of the repository imported with "import smth" or "from smth import *"
+        files = []
+
+        for _, name in dct.get(key_name, []):
+            # Define the source file from the name in the import statement
+            source_file = self.resolve_import(file, name)
+
+            # If the source file is in the repository files, it is imported
+            if source_file is not None:
+                # Remember the file for the incremental rebuilds
+                source_node = self.file_node(source_file)
+                self.import_dependencies.setdefault(self.file_node(file), set()).add(source_node)
+                files.append(source_node)
+
+        return files
+
+    def for_import_from(self, dct, key_name, type):
+        # Modules and names of "from smth import smth" with their positions, the modules are resolved
+        # together with the names (a name may be a submodule)
+        definitions = []
+        for start_byte, name in dct.get(key_name, []):
             definitions.append({
                 'type': type,
                 'name': name,
-                'start_byte': instance.start_byte,
+                'start_byte': start_byte,
             })
 
-        return for_future_connection
-
-    def additional_imports(self, name, connect_with, to_connect, namespace=None):
-        # If name is file connect all its imports with the current file
-        if name.split('/')[-1][-3:] == '.py':
-            # Define all "Import" edges and reconnect them
-            for edge in self.graph.out_edges(name, data=True):
-                if edge[2]['type'] == 'Import':
-                    self.graph.add_edge(connect_with, edge[1], type='Import')
+        return definitions
 
-        else:
-            # Initialize import and encapsulated edges
-            imported = []
-            encapsulated = []
-            for edge in self.graph.out_edges(namespace, data=True):
-                if edge[2]['type'] == 'Import':
-                    imported.append(edge[1])
-                elif edge[2]['type'] == 'Encapsulation':
-                    encapsulated.append(edge[1])
-            # Check if the name exists in the file
-            if namespace + '/' + name in encapsulated:
-                self.graph.add_edge(connect_with, namespace + '/' + name, type="Import")
-                to_connect.append(namespace + '/' + name)
+    def parse_name(self, name):
+        # Find the nodes which end with the formatted name in the suffix index
+        result = self.name_index.lookup(self.format_name(name))
+        result.sort(key=self.node_order)  # The order of a full build, also after the incremental ones
 
-            else:
-                # If the name is not in encapsulated find a file in which it is encapsulated
-                for imp in imported:
-                    # Check if it is imported or encapsulated
-                    if name == imp.split('/')[-1]:
-                        self.graph.add_edge(connect_with, imp, type="Import")
-                    elif imp[-3:] == '.py':
-                        self.additional_imports(name, connect_with, to_connect, namespace=imp)
+        return result  # Return the list of matching nodes
 
-    def parse_name(self, name):
-        result = []  # List to store matching node names
+    def format_name(self, name):
         # Format the name for the graph
         partial_name = name.replace('.', '/')  # Replace dots with slashes
         partial_name = partial_name.replace('::', '.py/')  # Replace '::' with '.py/'
         partial_name = partial_name.replace('/(global)', '')  # Remove '(global)'
+        return partial_name
 
-        for element in self.graph.nodes:
-            if element.endswith(partial_name):  # Check if node matches the formatted name
-                result.append(element)  # Add matching node to the result
-
-        return result  # Return the list of matching nodes
+    def node_order(self, node):
+        # Key of the node in the order in which a full build adds the nodes: the definitions by the files
+        # (a patched file keeps the order of its nodes), then the nodes created only by the Class Hierarchy edges,
+        # also by the files which created them
+        position = self.paths.positions.get(self.find_file_in_path(node), len(self.paths))
+        if 'nesting' not in self.graph.nodes[node]:
+            position += len(self.paths) + 1
+        return position, self.name_index.order[node]
 
     def find_file_in_path(self, full_name):
         path = full_name.split("/")  # Split the full name into components
@@ -518,13 +627,23 @@ class SemanticGraphBuilder:
             if "." in path[i]:  # Check for a file component
                 return "/".join(path[:i + 1])  # Return the path up to the file
 
+    def flow_path(self):
+        # Call graph of code2flow in the temporary folder of the build
+        return os.path.join(self.temp_folder, 'code2flow.json')
+
     def build_invoke(self, debugging=0):
         # Build invoke relationships from a temporary JSON file
-        with open("__temp__.json", "r", errors='ignore') as f:
+        import json  # For the call graph of code2flow
+        from pprint import pprint  # For pretty-printing data structures
+        with open(self.flow_path(), "r", errors='ignore') as f:
             data = json.load(f)  # Load the JSON data
 
         nodes_to_nodes = dict()  # Dictionary to map node UIDs to graph node names
 
+        # Compute the files which reach every node once instead of walking the graph for every pair of nodes
+        files = [self.file_node(file) for file in self.files_to_parse]
+        reachability = ReachabilityIndex(self.graph, files)
+
         if debugging:
             pprint(data)  # Print the loaded JSON data if debugging is enabled
 
@@ -543,134 +662,362 @@ class SemanticGraphBuilder:
             node_2_names = nodes_to_nodes[node["target"]]  # Get the target node name(s)
 
             if debugging:
-                pprint(node_1_names)  # Print source node names if debugging
-                pprint(node_2_names)  # Print target node names if debugging
-                pprint(self.graph.nodes)  # Print current graph nodes if debugging
-                print("------------------------------------------------------")
+                print(node_1_names, "->", node_2_names)  # Print the names of the call if debugging
 
             # Add an edge if both nodes exist in the graph
             for node_1 in node_1_names:
                 for node_2 in node_2_names:
+                    # Check if the file of node_1 is an ancestor of node_2
+                    reachable = reachability.is_ancestor(self.find_file_in_path(node_1), node_2)
                     if debugging:
-                        pprint(self.find_file_in_path(node_1))  # Print the file path for node_1 if debugging
-                        pprint(nx.ancestors(self.graph, node_2))  # Print ancestors of node_2 if debugging
-                        print("<<<------------------------------------------------>>>")
-                    # Check if node_1 is an ancestor of node_2
-                    if self.find_file_in_path(node_1) in nx.ancestors(self.graph, node_2):
+                        print(node_1, "->", node_2, "reachable" if reachable else "not reachable")
+                    if reachable:
                         # Add an edge if both nodes exist in the graph
                         if node_1 in self.graph.nodes and node_2 in self.graph.nodes:
-                            self.graph.add_edge(node_1, node_2, type='Invoke')  # Add invoke edge
+                            self.add_edge(node_1, node_2, type='Invoke')  # Add invoke edge
+                            reachability.add_edge(node_1, node_2, 'Invoke')  # New paths to the ancestors
+
+    def build_native_invoke(self, debugging=0, files=None):
+        # Build invoke relationships from the calls extracted from the parsed trees, with files only the calls
+        # of these files are resolved again with the call graph of the last build (see update_invoke)
+        file_nodes = None
+        if files is None:
+            self.native_calls = CallGraph()
+            self.native_calls.positions = self.paths.positions
+            for file in self.files_to_parse:
+                self.native_calls.add_file(self.file_node(file), self.extractions[file])
+            # A call is connected only if the callee can be reached from the file of the caller (as with code2flow)
+            reachability = ReachabilityIndex(self.graph, [self.file_node(file) for file in self.files_to_parse])
+        else:
+            # The few files are walked one by one instead of indexing the whole graph
+            reachability = FileReachability(self.graph, self.paths.positions, self.find_file_in_path)
+            file_nodes = [self.file_node(file) for file in files]
 
-    def build_class_hierarchy(self):
-        for file in self.files_to_parse:
-            with open(file, 'r', errors='ignore') as f:
-                source_code = f.read()  # Read the source code from the file
-            tree = self.parser.parse(bytes(source_code, 'utf-8'))  # Parse the source code
-
-            # Define a query to capture class and function definitions
-            query = self.py_language.query("""
-            (class_definition
-                name: (identifier) @class.name
-                superclasses: (argument_list (identifier) @class.parents)?
-                body: (block) @class.body
-            )
-            """)
-
-            captures = query.captures(tree.root_node)  # Execute the query on the parsed tree
-
-            for el in captures:
-                captures[el].sort(key=lambda x: x.start_point)  # Sort captures by start byte
-
-            # if there are child classes in current file, extract their parents
-            if "class.parents" in captures.keys():
-                name_body = dict()  # dict to store the parameters of body of each class
-
-                for i in range(len(captures["class.name"])):
-                    name_body[captures["class.name"][i]] = captures["class.body"][i]
-
-                # use Two pointers technique to break up the list of all parent classes and
-                # match parent class with child class
-                i, j = 0, 0
-
-                while j < len(captures["class.parents"]):
-                    if captures["class.name"][i].start_byte < captures["class.parents"][j].start_byte \
-                            < name_body[captures["class.name"][i]].start_byte:
-                        child_name = captures["class.name"][i].text.decode('utf-8')
-                        parent_name = captures["class.parents"][j].text.decode('utf-8')
-
-                        child_path = f"{file.replace(':', '.')}/{child_name}".replace('\\', '/')
-
-                        parent_path = self.parse_name(parent_name)
-                        if parent_path:
-                            # Add edges to represent class hierarchy
-                            self.graph.add_edge(child_path, parent_path[-1], type='Class Hierarchy')
-
-                        j += 1
-                    else:
-                        i += 1
-
-    def delete_duplicate_edges(self):
-        # Create a list of unique edges by converting them to a set
-        new_edges = list(set([(a, b, tuple(c.values())) for a, b, c in list(self.graph.edges(data=True))]))
-
-        # Convert the unique edges back to the required format with a dictionary
-        new_edges = [(a, b, dict(zip(["type"], c))) for a, b, c in new_edges]
-
-        # Clear all existing edges from the graph
-        self.graph.clear_edges()
-
-        # Add the unique edges back to the graph
-        self.graph.add_edges_from(new_edges)
-
-    def print_graph(self):
-        # Extract node attributes (color, nesting) for visualization
-        node_colors = nx.get_node_attributes(self.graph, 'color')  # Get colors of nodes
-
-        # Create a DOT (graph description) representation
-        dot = nx.nx_pydot.to_pydot(self.graph)  # Convert the graph to a DOT format
-
-        # Set node styles, colors, and labels
-        for node in self.graph.nodes():
-            pydot_node = dot.get_node(str(node))[0]  # Get the corresponding node in the DOT representation
-            pydot_node.set_fillcolor(node_colors.get(node, 'white'))  # Set fill color, default to white
-            pydot_node.set_style("filled")  # Make the node visually filled
-            pydot_node.set_label(node.split("/")[-1])  # Label with the last path segment
-
-        # Set edge labels and styles
-        for edge in self.graph.edges(keys=True):
-            source, target, key = edge  # Extract source, target, and key for MultiDiGraph edges
-            edge_type = self.graph.edges[source, target, key].get('type', 'Unknown')  # Get the edge type
-            edge_color = EDGES_COLORS.get(edge_type, "black")  # Get the edge color based on the type
-            edge_style = EDGES_STYLES.get(edge_type, "solid")  # Get the edge style based on the type
-
-            # Get the corresponding edge in the DOT representation
-            pydot_edge = dot.get_edge(str(source), str(target))[key]
-
-            # Apply attributes to the edge
-            pydot_edge.set_label(edge_type)  # Set edge label to indicate the type
-            pydot_edge.set_style(edge_style)  # Set style for the edge
-            pydot_edge.set_color(edge_color)  # Set color for the edge
-
-        # Save the resulting graph visualization as a PNG image
-        png_name = f'{self.path_to_repo.split(chr(92))[-1]}.png'  # Generate PNG file name
-        dot.write_png(png_name)  # Write the DOT representation to a PNG file
-        #
-        # Optionally, display the generated graph image
-        img = Image.open(png_name)  # Open the generated PNG image
-        img.show()  # Display the image
+        for caller, callee in self.native_calls.resolve(reachability.is_ancestor, reachability.reachable_files,
+                                                         file_nodes):
+            if debugging:
+                print(caller, "->", callee)
+            if caller in self.graph.nodes and callee in self.graph.nodes:
+                self.add_edge(caller, callee, type='Invoke')  # Add invoke edge
+                reachability.add_edge(caller, callee, 'Invoke')  # New paths to the ancestors
+
+    def build_class_hierarchy(self, files=None):
+        for file in self.files_to_parse if files is None else files:
+            # The nodes created by the edges of the later files are not seen, as in the full build
+            last = len(self.paths) + 1 + self.paths.positions[self.file_node(file)]
+
+            # Connect every child class with its parents extracted from the file
+            for child_name, parent_name in self.superclasses[file]:
+                child_path = self.file_node(file) + '/' + child_name
+
+                parent_path = [node for node in self.parse_name(parent_name) if self.node_order(node)[0] <= last]
+                if parent_path:
+                    # Add edges to represent class hierarchy
+                    self.add_edge(child_path, parent_path[-1], type='Class Hierarchy')
+
+    def print_graph(self, edge_types=None, max_depth=None, show=True, output_format='png'):
+        # Write the graph (optionally only the edges of the given types and the nodes up to the given nesting)
+        # as DOT text in one pass and render it with Graphviz, show=False keeps it headless
+        from rendering import render_graph  # Rendering of the graph with Graphviz
+        name = self.path_to_repo.split(chr(92))[-1]
+
+        # Save the resulting graph visualization as an image, the DOT text only goes through a temporary file
+        png_name = f'{name}.{output_format}'  # Generate PNG file name
+        render_graph(self.graph, png_name, output_format, EDGES_COLORS, EDGES_STYLES, edge_types, max_depth)
 
-    def save_graph(self, save_folder):
-        name = f'{self.path_to_repo.split(chr(92))[-1]}.gml'
-        nx.write_gml(self.graph, save_folder + "//" + name)
+        # Optionally, display the generated graph image
+        if show:
+            from PIL import Image  # For image processing
+            img = Image.open(png_name)  # Open the generated PNG image
+            img.show()  # Display the image
+
+    def state_path(self, save_folder):
+        # The state of the incremental rebuilds is saved next to the graph
+        return save_folder + "//" + f'{self.path_to_repo.split(chr(92))[-1]}.state.json'
+
+    def find_affected_files(self, state, changed, removed):
+        # Files whose imports have to be resolved again: the changed files and all files which depend on them
+        if removed or any(file not in state.files for file in changed):
+            # Imports of any file may be resolved to the added or removed files
+            return set(self.files_to_parse)
+
+        dependents = {}  # File node -> files whose imports were resolved with it
+        for file in self.files_to_parse:
+            for node in state.dependencies(file):
+                dependents.setdefault(node, []).append(file)
+
+        affected = set(changed)
+        stack = list(changed)
+        while stack:
+            for dependent in dependents.get(self.file_node(stack.pop()), ()):
+                if dependent not in affected:
+                    affected.add(dependent)
+                    stack.append(dependent)
+        return affected
+
+    def state_key(self, state):
+        # The repository, the mode and the state (the file of the state or the state in memory) of the build
+        return self.path_to_repo, self.compact, state if state.path is None else state.path
+
+    def update_changed_files(self, state, changed, removed, hashes, workers=1, debugging=0, live=False,
+                             native=True):
+        # Patch the graph of the last build in place: the nodes of the changed and removed files are dropped
+        # with all their edges, the changed files are extracted and added again and only the files which depend
+        # on them get their imports resolved again. If the graph of the builder is not the one saved to the state
+        # (live), the graph of the last build is restored from the state first.
+        # Returns the GraphPatch of the files whose Invoke and Class Hierarchy edges may change: the files calling
+        # the added or removed names, the files reaching the nodes whose other out-edges changed and the files with
+        # the parent classes of these names (the code2flow calls and the class hierarchy are built again for all)
+        changed_files = set(changed)
+        affected = self.find_affected_files(state, changed, removed)
+        if debugging:
+            print(f"Files with imports to resolve again: {len(affected)}")
+        if not live:
+            self.restore_state(state)
+        if native:
+            self.native_calls.positions = self.paths.positions
+        else:
+            self.remove_edges(self.graph.edges(keys=True, data='type'), ('Invoke', 'Class Hierarchy'))
+
+        # The old nodes with the edges which the new ones are compared to
+        old_nodes = {node: self.graph.nodes[node].get('color') for file in list(changed) + list(removed)
+                     for node in self.file_nodes.get(file, ())}
+        watched = list(old_nodes) + [self.file_node(file) for file in affected]
+        old_structure = {node: self.structure_edges(node) for node in watched if node in self.graph}
+        old_invokes = {}
+        invoke_files = set(changed)
+        hierarchy_files = set(changed)
+        for node in old_nodes:
+            # The calls and the classes which refer to the old nodes are resolved again
+            for parent, edges in self.graph.pred[node].items():
+                for data in edges.values():
+                    if data['type'] == 'Invoke':
+                        invoke_files.add(self.paths.path(self.find_file_in_path(parent)))
+                        old_invokes[parent] = self.invoked(parent)
+                    elif data['type'] == 'Class Hierarchy':
+                        hierarchy_files.add(self.paths.path(self.find_file_in_path(parent)))
+            old_invokes[node] = self.invoked(node)
+
+        # Drop the old fragments of the changed and removed files
+        for file in list(changed) + list(removed):
+            self.remove_hierarchy_edges(file)
+            self.remove_nodes(self.file_nodes.pop(file, ()))
+            self.import_dependencies.pop(self.file_node(file), None)
+            self.superclasses.pop(file, None)
+            if native:
+                self.native_calls.remove_file(self.file_node(file))
+
+        # Extract the changed files and add their definitions and calls
+        self.extractions = {file: state.extraction(file) for file in affected if file not in changed_files}
+        self.extractions.update(self.extract_files(workers, changed, hashes))
+        self.build_encapsulation_and_ownership(changed)
+        if native:
+            for file in changed:
+                self.native_calls.add_file(self.file_node(file), self.extractions[file])
+
+        # Resolve the imports of the affected files again, the imports of the other files are kept
+        for file in affected:
+            file_node = self.file_node(file)
+            self.import_dependencies.pop(file_node, None)
+            if file_node in self.graph:
+                self.remove_edges(self.graph.out_edges(file_node, keys=True, data='type'), ('Import',))
+        self.build_import(debugging, [file for file in self.files_to_parse if file in affected])
+
+        if not native:
+            return GraphPatch(None, None, None, set(), {})
+
+        # Names which were added or removed, with the names of the classes around them (for the constructors)
+        new_nodes = {node: self.graph.nodes[node].get('color') for file in changed for node in self.file_nodes[file]}
+        names = set()
+        for node in set(old_nodes.items()) ^ set(new_nodes.items()):
+            names.update(node[0][len(self.find_file_in_path(node[0])) + 1:].split('/'))
+        names.discard('')
+        invoke_files.update(self.paths.path(file_node) for file_node in self.native_calls.files_calling(names))
+
+        # Classes whose parents may be found among the added or removed nodes
+        name_index = NameIndex()
+        for node, _ in set(old_nodes.items()) ^ set(new_nodes.items()):
+            name_index.add(node)
+        for file, superclasses in self.superclasses.items():
+            if any(name_index.lookup(self.format_name(parent_name)) for _, parent_name in superclasses):
+                hierarchy_files.add(file)
+
+        touched = {node for node in watched + list(new_nodes)
+                   if node in self.graph and self.structure_edges(node) != old_structure.get(node)}
+        present = set(self.files_to_parse)
+        return GraphPatch(changed_files | affected, invoke_files & present, hierarchy_files & present, touched,
+                          old_invokes)
+
+    def structure_edges(self, node):
+        # Encapsulation, Ownership and Import edges which go out of the node
+        return {(v, type) for _, v, type in self.graph.out_edges(node, data='type')
+                if type not in ('Invoke', 'Class Hierarchy')}
+
+    def invoked(self, node):
+        # Nodes called by the node
+        return {v for _, v, type in self.graph.out_edges(node, data='type') if type == 'Invoke'}
+
+    def remove_edges(self, edges, types):
+        # Remove the edges (u, v, key, type) of the given types
+        self.graph.remove_edges_from([(u, v, key) for u, v, key, type in list(edges) if type in types])
+        if 'Class Hierarchy' in types:
+            # The nodes which only these edges created
+            self.remove_nodes([node for node in self.graph if 'nesting' not in self.graph.nodes[node]])
+
+    def remove_hierarchy_edges(self, file):
+        # Remove the Class Hierarchy edges of the classes of the file and the nodes which only these edges created
+        nodes = set()
+        for child_name, _ in self.superclasses.get(file, ()):
+            child_path = self.file_node(file) + '/' + child_name
+            if child_path in self.graph:
+                edges = list(self.graph.out_edges(child_path, keys=True, data='type'))
+                nodes.add(child_path)
+                nodes.update(v for _, v, _, type in edges if type == 'Class Hierarchy')
+                self.graph.remove_edges_from([(u, v, key) for u, v, key, type in edges if type == 'Class Hierarchy'])
+        self.remove_nodes([node for node in nodes if 'nesting' not in self.graph.nodes[node]
+                           and self.graph.degree(node) == 0])
+
+    def reaching_files(self, nodes):
+        # Files with a path to any of the nodes (the Class Hierarchy edges are not followed), the files of the nodes
+        # among them
+        seen = set(node for node in nodes if node in self.graph)
+        stack = list(seen)
+        while stack:
+            node = stack.pop()
+            for parent, edges in self.graph.pred[node].items():
+                if parent not in seen and any(data['type'] != 'Class Hierarchy' for data in edges.values()):
+                    seen.add(parent)
+                    stack.append(parent)
+        file_nodes = {self.find_file_in_path(node) for node in seen}
+        return {self.paths.path(file_node) for file_node in file_nodes if self.paths.is_file_node(file_node)}
+
+    def update_invoke(self, patch, debugging=0):
+        # Resolve again the calls of the files of the patch in the order of the files, the edges of the other files
+        # are kept. A file which reaches a caller whose callees changed sees them if it comes after the caller,
+        # so such files are added and the calls are resolved again until no file is added.
+        # The calls of every file see the edges which they see in the full build (see FileReachability),
+        # so the result is the one of the full build
+        files = patch.invoke_files
+        files |= self.reaching_files(patch.touched)
+        while True:
+            ordered = [file for file in self.files_to_parse if file in files]
+            for file in ordered:
+                for node in self.file_nodes[file]:
+                    patch.old_invokes.setdefault(node, self.invoked(node))
+                    self.remove_edges(self.graph.out_edges(node, keys=True, data='type'), ('Invoke',))
+            self.build_native_invoke(debugging, ordered)
+
+            moved = [node for file in ordered for node in self.file_nodes[file]
+                     if self.invoked(node) != patch.old_invokes.get(node, set())]
+            added = self.reaching_files(patch.touched) - files
+            if moved:
+                first = min(self.paths.positions[self.find_file_in_path(node)] for node in moved)
+                added |= {file for file in self.reaching_files(moved) - files
+                          if self.paths.positions[self.file_node(file)] > first}
+            if not added:
+                return
+            if debugging:
+                print(f"Files with calls to resolve again: {len(added)}")
+            files |= added
+
+    def update_class_hierarchy(self, files):
+        # Connect the classes of the files to their parents again in the order of the files
+        ordered = [file for file in self.files_to_parse if file in files]
+        for file in ordered:
+            self.remove_hierarchy_edges(file)
+        self.build_class_hierarchy(ordered)
+
+    def remove_nodes(self, nodes):
+        # Remove the nodes with their edges from the graph and the indexes
+        for node in nodes:
+            if node in self.graph:
+                self.graph.remove_node(node)
+            self.name_index.remove(node)
+            self.node_store.remove(node)
+
+    def restore_state(self, state):
+        # Restore the graph of the last build and the records of its files from the state
+        self.reset_graph()
+        self.native_calls = CallGraph()
+        self.native_calls.positions = self.paths.positions
+        for file in state.files:
+            self.file_nodes[file] = []
+            for name, attributes in state.nodes(file):
+                self.add_node(name, **attributes)
+                self.file_nodes[file].append(name)
+            extraction = state.extraction(file)
+            if self.compact:
+                self.node_store.add_definitions(file, self.file_nodes[file][1:], extraction.definitions)
+            self.import_dependencies[self.file_node(file)] = set(state.dependencies(file))
+            self.superclasses[file] = extraction.superclasses
+            self.native_calls.add_file(self.file_node(file), extraction)
+        for file in state.files:
+            for u, v, type in state.edges(file):
+                self.add_edge(u, v, type=type)
+
+    def file_edges(self, file):
+        # Edges which go out of the nodes of the file and of its classes which only the Class Hierarchy edges created
+        sources = dict.fromkeys(self.file_nodes[file])
+        for child_name, _ in self.superclasses[file]:
+            sources[self.file_node(file) + '/' + child_name] = None
+        return [[u, v, type] for name in sources if name in self.graph
+                for u, v, type in self.graph.out_edges(name, data='type')]
+
+    def save_state(self, state, changed, removed, signatures, hashes, call_graph='native', edited=None):
+        # Save the hashes, records and fragments of the changed files for the next incremental rebuild,
+        # the other files get their new signatures and, if they are edited (all of them if edited is None),
+        # their edges and dependencies
+        changed = set(changed)
+        for file in self.files_to_parse:
+            depends = self.import_dependencies.get(self.file_node(file), ())
+            if file in changed:
+                nodes = [(name, self.graph.nodes[name]) for name in self.file_nodes[file]]
+                state.record(file, signatures[file], hashes[file], self.extractions[file], nodes,
+                             self.file_edges(file), depends)
+            elif edited is None or file in edited:
+                state.update(file, signatures[file], self.file_edges(file), depends)
+            else:
+                state.update(file, signatures[file])
+        state.forget(removed)
+        state.save(self.path_to_repo, self.compact, call_graph)
+        self.live_state = self.state_key(state)
+
+    def save_graph(self, save_folder, gformat='gml'):
+        # Save the graph as GML or in the binary format (loaded back with serialization.load_binary_graph)
+        if gformat == 'binary':
+            from serialization import save_binary_graph  # Compact binary format of the graphs
+            name = f'{self.path_to_repo.split(chr(92))[-1]}.sgb'
+            save_binary_graph(self.graph, save_folder + "//" + name)
+        else:
+            name = f'{self.path_to_repo.split(chr(92))[-1]}.gml'
+            nx.write_gml(self.graph, save_folder + "//" + name)
 
 
     def end(self):
-        os.remove("__temp__.json")
+        if self.extraction_cache is not None:
+            self.extraction_cache.flush()  # Store the new records for the next builds
+        self.file_cache.clear()  # Free the parsed files of the finished build
+        self.node_store.release()  # The sources of the bodies are read again when they are asked
+        self.extractions = {}
+
+
+worker_builder = None  # Builder used by the current worker process of the parallel extraction
+
+
+def init_worker(cache_size):
+    # Set up the parser once per worker process
+    global worker_builder
+    worker_builder = SemanticGraphBuilder(cache_size)
+
+
+def extract_file_in_worker(file):
+    # Extract the records of the file in a worker process, the tree is not needed after that
+    extraction = worker_builder.extract_file(file)
+    worker_builder.file_cache.clear()
+    return extraction
 
 
 if __name__ == "__main__":
-    # Main entry point for the script.
-    builder = SemanticGraphBuilder()  # Create an instance of the SemanticGraphBuilder
-    # Build the semantic graph from a user-provided repository path and display the graph
-    builder.build_from_one(input(), "graphs", gsave=False,
-                           gprint=True)  # Call the build method with user input and enable graph printing
+    # Main entry point for the script: the command line of cli.py, e.g. "python main.py build <repo>"
+    from cli import main as run_command_line
+    raise SystemExit(run_command_line())
@@ -0,0 +1,267 @@
+import mmap  # For the big files
+import os  # For the sizes of the files
+from collections import OrderedDict, namedtuple  # For the LRU order of the cached files and the records
+
+DEFAULT_CACHE_SIZE = 512 * 1024 * 1024  # Default memory bound of the parsed-file cache (in bytes)
+TREE_SIZE_FACTOR = 8  # Approximate size of a syntax tree relative to the size of its source
+MMAP_THRESHOLD = 4 * 1024 * 1024  # Files of this size (in bytes) and bigger are memory-mapped instead of read
+
+# Compact picklable records extracted from one file:
+# definitions - (nesting, name, type, start_byte, end_byte, start_point, end_point) in the order of the bodies,
+# imports - kind of the import (e.g. "import.name", "from.module", see walk_import) -> [(start_byte, name)],
+# superclasses - [(child_name, parent_name)],
+# calls - (start_byte, name, owner) with the owner None for "name()" and the owner's name (or '') for "owner.name()"
+FileExtraction = namedtuple('FileExtraction', ['definitions', 'imports', 'superclasses', 'calls'])
+EXTRACTION_VERSION = 2  # Version of the extraction code, the stored records of other versions are not used
+
+
+def extraction_to_record(extraction):
+    # JSON-compatible record of the extraction
+    return {
+        'definitions': [[list(value) if isinstance(value, tuple) else value for value in definition]
+                        for definition in extraction.definitions],
+        'imports': extraction.imports,
+        'superclasses': extraction.superclasses,
+        'calls': extraction.calls
+    }
+
+
+def extraction_from_record(record):
+    # Extraction restored from its JSON-compatible record
+    return FileExtraction(
+        [tuple(tuple(value) if isinstance(value, list) else value for value in definition)
+         for definition in record['definitions']],
+        {key: [tuple(name) for name in names] for key, names in record['imports'].items()},
+        [tuple(pair) for pair in record['superclasses']],
+        [tuple(call) for call in record['calls']]
+    )
+
+
+DEFINITION_TYPES = {'class_definition': 'class', 'function_definition': 'function'}  # Node type -> definition type
+FROM_PREFIXES = {'dotted_name': 'from', 'aliased_import': 'from_aliased'}  # Name type -> key of "from smth import"
+RELATIVE_PREFIXES = {'dotted_name': 'relative'}  # Name type -> key of "from ...smth import"
+
+
+def walk_tree(tree):
+    # Extract the definitions, imports, superclasses and calls of the file with one walk of its tree
+    # (see FileExtraction): the definitions are met in the order of their bodies and their nesting
+    # is the number of the definitions open above them, so nothing is sorted
+    definitions = []
+    imports = {}
+    superclasses = []
+    calls = []
+    open_definitions = []  # Depths of the definitions which contain the current node
+    cursor = tree.walk()
+    depth = 0
+    while True:
+        node = cursor.node
+        type = node.type
+        while open_definitions and open_definitions[-1] >= depth:
+            open_definitions.pop()  # The walk has left the definition
+
+        if type == 'call':
+            walk_call(node, calls)
+        elif type in DEFINITION_TYPES:
+            name = node.child_by_field_name('name')
+            body = node.child_by_field_name('body')
+            if name is not None and name.type == 'identifier' and body is not None and body.type == 'block' and \
+                    (type == 'class_definition' or walk_parameters(node)):
+                open_definitions.append(depth)
+                definitions.append((len(open_definitions), name.text.decode('utf-8', errors='ignore'),
+                                    DEFINITION_TYPES[type], body.start_byte, body.end_byte,
+                                    body.start_point, body.end_point))
+                if type == 'class_definition':
+                    walk_superclasses(node, name, superclasses)
+        elif type == 'import_statement':
+            walk_import(node, imports)
+        elif type == 'import_from_statement':
+            walk_import_from(node, imports)
+
+        # Next node in the preorder
+        if cursor.goto_first_child():
+            depth += 1
+            continue
+        while not cursor.goto_next_sibling():
+            if not cursor.goto_parent():
+                return FileExtraction(definitions, imports, superclasses, calls)
+            depth -= 1
+
+
+def walk_parameters(node):
+    # Check if the function has its parameters (a function of a broken file may miss them)
+    parameters = node.child_by_field_name('parameters')
+    return parameters is not None and parameters.type == 'parameters'
+
+
+def walk_call(node, calls):
+    # Called name of "name()" or "owner.name()", the calls of one position go names first
+    function = node.child_by_field_name('function')
+    if function is None:
+        return
+    if function.type == 'identifier':
+        position = len(calls)
+        while position and calls[position - 1][0] == function.start_byte:
+            position -= 1  # "name().attribute()" was met before "name()"
+        calls.insert(position, (function.start_byte, function.text.decode('utf-8', errors='ignore'), None))
+    elif function.type == 'attribute':
+        owner = function.child_by_field_name('object')
+        calls.append((
+            function.start_byte,
+            function.child_by_field_name('attribute').text.decode('utf-8', errors='ignore'),
+            owner.text.decode('utf-8', errors='ignore') if owner.type == 'identifier' else ''
+        ))
+
+
+def walk_superclasses(node, name, superclasses):
+    # Parents of "class Child(Parent1, Parent2)" given by plain names
+    arguments = node.child_by_field_name('superclasses')
+    if arguments is None:
+        return
+    child_name = None
+    for argument in arguments.named_children:
+        if argument.type == 'identifier':
+            if child_name is None:
+                child_name = name.text.decode('utf-8', errors='ignore')
+            superclasses.append((child_name, argument.text.decode('utf-8', errors='ignore')))
+
+
+def walk_import(node, imports):
+    # "import smth" and "import smth1 as smth2"
+    for name in node.children_by_field_name('name'):
+        if name.type == 'dotted_name':
+            key = 'import.name'
+        elif name.type == 'aliased_import':
+            key = 'import.aliased'
+            name = name.child_by_field_name('name')
+            if name is None or name.type != 'dotted_name':
+                continue
+        else:
+            continue
+        imports.setdefault(key, []).append((name.start_byte, name.text.decode('utf-8', errors='ignore')))
+
+
+def walk_import_from(node, imports):
+    # "from smth import smth", "from smth1 import smth2 as smth3", "from smth import *"
+    # and "from ...smth import smth", the module is kept once for every kind of the names it is imported with
+    module = node.child_by_field_name('module_name')
+    if module is None:
+        return
+    if module.type == 'dotted_name':
+        prefixes = FROM_PREFIXES
+    elif module.type == 'relative_import':
+        prefixes = RELATIVE_PREFIXES
+    else:
+        return
+    module_record = None
+    for name in node.children_by_field_name('name'):
+        prefix = prefixes.get(name.type)
+        if prefix is None:
+            continue
+        if prefix == 'from_aliased':
+            name = name.child_by_field_name('name')
+            if name is None or name.type != 'dotted_name':
+                continue
+        if module_record is None:
+            module_record = (module.start_byte, module.text.decode('utf-8', errors='ignore'))
+        modules = imports.setdefault(prefix + '.module', [])
+        if not modules or modules[-1] is not module_record:
+            modules.append(module_record)
+        imports.setdefault(prefix + '.name', []).append(
+            (name.start_byte, name.text.decode('utf-8', errors='ignore')))
+    if module.type == 'dotted_name' and any(child.type == 'wildcard_import' for child in node.children):
+        imports.setdefault('wildcard.module', []).append(
+            (module.start_byte, module.text.decode('utf-8', errors='ignore')))
+
+
+def read_source(path, mmap_threshold=MMAP_THRESHOLD):
+    # Bytes of the file exactly as they are on the disk, so the byte offsets of the nodes are offsets in the file;
+    # the big files are memory-mapped instead of being copied into memory
+    with open(path, 'rb') as f:
+        size = os.fstat(f.fileno()).st_size
+        if size == 0:
+            return b''  # An empty file can't be memory-mapped
+        if size >= mmap_threshold:
+            return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        return f.read()
+
+
+def decode_slice(source, start_byte, end_byte):
+    # Text of the part of the source, only the part is copied
+    return str(memoryview(source)[start_byte:end_byte], 'utf-8', errors='ignore')
+
+
+class ParsedFile:
+    # A file of the repository that is read and parsed only once per build
+    def __init__(self, path, source_bytes, parser):
+        self.path = path  # Path to the file in the system
+        self.source_bytes = source_bytes  # Bytes of the file (or its memory map) given to the parser as they are
+        self.parser = parser  # Parser for the tree
+        self._tree = None  # Syntax tree, parsed on the first request
+        # Approximate memory footprint of the entry: bytes and the tree
+        self.size = len(source_bytes) * (TREE_SIZE_FACTOR + 1)
+
+    @property
+    def tree(self):
+        # Parse the file only when its tree is needed (the bytes alone are enough for the bodies)
+        if self._tree is None:
+            self._tree = self.parser.parse(self.source_bytes)
+        return self._tree
+
+    def body(self, start_byte, end_byte):
+        # Text between the byte offsets
+        return decode_slice(self.source_bytes, start_byte, end_byte)
+
+
+class ParsedFileCache:
+    # Store of parsed files keyed by path, bounded in memory with LRU eviction
+    def __init__(self, parser, max_size=DEFAULT_CACHE_SIZE, mmap_threshold=MMAP_THRESHOLD):
+        self.parser = parser  # Parser used for the files which are not in the cache yet
+        self.max_size = max_size  # Memory bound of the cache (in bytes)
+        self.mmap_threshold = mmap_threshold  # Size of the files which are memory-mapped (in bytes)
+        self.files = OrderedDict()  # Parsed files in the order of their last use
+        self.current_size = 0  # Approximate memory used by the cached files
+        self.hits = 0  # Number of requests served from the cache
+        self.misses = 0  # Number of requests which required reading and parsing
+        self.evictions = 0  # Number of files dropped to stay within the bound
+
+    def get(self, path):
+        # Return the parsed file, reading it only if it is not cached
+        parsed = self.files.get(path)
+        if parsed is not None:
+            self.hits += 1
+            self.files.move_to_end(path)  # Mark the file as the most recently used
+            return parsed
+
+        self.misses += 1
+        parsed = self.load(path)
+        self.files[path] = parsed
+        self.current_size += parsed.size
+        self.evict()
+        return parsed
+
+    def load(self, path):
+        # Read the bytes of the file once, it is parsed on the first request of the tree
+        return ParsedFile(path, read_source(path, self.mmap_threshold), self.parser)
+
+    def evict(self):
+        # Drop the least recently used files until the cache fits into its bound (the newest one always stays)
+        while self.current_size > self.max_size and len(self.files) > 1:
+            _, parsed = self.files.popitem(last=False)
+            self.current_size -= parsed.size
+            self.evictions += 1
+
+    def clear(self):
+        # Drop all the cached files, counters are kept
+        self.files.clear()
+        self.current_size = 0
+
+    def stats(self):
+        # Counters of the cache usage
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'files': len(self.files),
+            'size': self.current_size,
+            'max_size': self.max_size
+        }
@@ -0,0 +1,45 @@
+def to_node(path):
+    # Name of the node of the file (or the folder) in the graph
+    return path.replace('\\', '/').replace(':', '.')
+
+
+def to_path(node):
+    # Path to the file of the node name, for the names which are not registered in RepoPaths
+    return node.replace('.', ':').replace('/', '\\')[:-3] + '.py'
+
+
+class RepoPaths:
+    # Canonical paths of the files of the repository, computed once per build:
+    # the path of a file in the system and the name of its node are mapped to each other in both directions,
+    # so the membership checks of the import pass are dictionary lookups instead of scans and conversions
+    def __init__(self, path_to_repo, files):
+        self.root = path_to_repo  # Path to the repository
+        self.nodes = {}  # Path to the file -> node name
+        self.paths = {}  # Node name -> path to the file
+        self.positions = {}  # Node name -> position of the file in the list of the files
+        for file in files:
+            node = to_node(file)
+            self.nodes[file] = node
+            self.paths[node] = file
+            self.positions[node] = len(self.positions)
+
+    def __len__(self):
+        return len(self.nodes)
+
+    def node(self, path):
+        # Node name of the file, the files of the repository are not converted again
+        node = self.nodes.get(path)
+        return to_node(path) if node is None else node
+
+    def path(self, node):
+        # Path to the file of the node
+        path = self.paths.get(node)
+        return to_path(node) if path is None else path
+
+    def is_file(self, path):
+        # Check if the path is a file of the repository
+        return path in self.nodes
+
+    def is_file_node(self, node):
+        # Check if the node name is a file of the repository
+        return node in self.paths
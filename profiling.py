@@ -0,0 +1,125 @@
+import json  # For the saved reports
+import sys  # For the units of the resident set size
+import time  # For the wall and CPU time
+import tracemalloc  # For the traced memory of the phases
+from contextlib import contextmanager  # For the phases
+
+
+def peak_rss():
+    # Highest resident set size of the process so far (in bytes), None if it can't be measured:
+    # resource on Unix, the peak working set on Windows
+    try:
+        import resource
+    except ImportError:
+        return peak_working_set()
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == 'darwin' else peak * 1024  # Kilobytes everywhere except macOS
+
+
+def peak_working_set():
+    # Peak working set of the process on Windows (GetProcessMemoryInfo), None on other systems
+    if sys.platform != 'win32':
+        return None
+    import ctypes
+    from ctypes import wintypes
+
+    class ProcessMemoryCounters(ctypes.Structure):
+        # PROCESS_MEMORY_COUNTERS
+        _fields_ = [('cb', wintypes.DWORD), ('PageFaultCount', wintypes.DWORD)] + \
+                   [(name, ctypes.c_size_t) for name in (
+                       'PeakWorkingSetSize', 'WorkingSetSize', 'QuotaPeakPagedPoolUsage', 'QuotaPagedPoolUsage',
+                       'QuotaPeakNonPagedPoolUsage', 'QuotaNonPagedPoolUsage', 'PagefileUsage', 'PeakPagefileUsage')]
+
+    counters = ProcessMemoryCounters()
+    counters.cb = ctypes.sizeof(counters)
+    kernel32 = ctypes.WinDLL('kernel32')
+    kernel32.GetCurrentProcess.restype = wintypes.HANDLE
+    psapi = ctypes.WinDLL('psapi')
+    psapi.GetProcessMemoryInfo.argtypes = [wintypes.HANDLE, ctypes.POINTER(ProcessMemoryCounters), wintypes.DWORD]
+    psapi.GetProcessMemoryInfo.restype = wintypes.BOOL
+    if not psapi.GetProcessMemoryInfo(kernel32.GetCurrentProcess(), ctypes.byref(counters), counters.cb):
+        return None
+    return counters.PeakWorkingSetSize
+
+
+class BuildProfiler:
+    # Wall time, CPU time, memory and item counts of the phases of one build.
+    # The times are measured without tracing, the memory is the peak resident set size of the process
+    # at the end of every phase (peak_rss; it never goes down, so it includes the earlier work of the process).
+    # With trace_memory the allocations are also traced by tracemalloc, which slows the build down several times
+    # and makes the times useless (the parallel workers are not traced): traced_peak is the highest traced memory
+    # during the phase, memory_delta is the memory the phase left.
+    # The item counts are the changes of the values returned by counter() plus the counts set by the phase.
+    def __init__(self, enabled=True, counter=None, trace_memory=False):
+        self.enabled = enabled  # Nothing is measured if the profiler is disabled
+        self.counter = counter  # Returns the current counts (e.g. nodes and edges of the graph)
+        self.trace_memory = trace_memory and enabled  # Trace the allocations of the phases
+        self.started_tracing = False  # The tracing was started by this profiler and is stopped by it
+        self.phases = []  # Records of the finished phases
+        self.start_wall = None  # Start of the build
+        self.start_cpu = None
+
+    def start(self):
+        # Start measuring the build
+        if not self.enabled:
+            return
+        if self.trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self.started_tracing = True
+        self.start_wall = time.perf_counter()
+        self.start_cpu = time.process_time()
+
+    def stop(self):
+        # Stop measuring the build
+        if self.started_tracing:
+            tracemalloc.stop()
+            self.started_tracing = False
+
+    @contextmanager
+    def phase(self, name):
+        # Measure the phase, the phase may add its own counts to the yielded dictionary
+        counts = {}
+        if not self.enabled:
+            yield counts
+            return
+
+        before = self.counter() if self.counter is not None else {}
+        if self.trace_memory:
+            tracemalloc.reset_peak()
+            memory_before = tracemalloc.get_traced_memory()[0]
+        start_wall = time.perf_counter()
+        start_cpu = time.process_time()
+        try:
+            yield counts
+        finally:
+            record = {
+                'name': name,
+                'wall_time': time.perf_counter() - start_wall,
+                'cpu_time': time.process_time() - start_cpu,
+                'peak_rss': peak_rss()
+            }
+            if self.trace_memory:
+                memory_after, peak = tracemalloc.get_traced_memory()
+                record['traced_peak'] = peak
+                record['memory_delta'] = memory_after - memory_before
+            after = self.counter() if self.counter is not None else {}
+            record['counts'] = {key: after[key] - before.get(key, 0) for key in after}
+            record['counts'].update(counts)
+            self.phases.append(record)
+
+    def report(self, **info):
+        # Structured report of the build, the info (e.g. the repository) is added to it
+        report = dict(info)
+        if self.enabled and self.start_wall is not None:
+            report['wall_time'] = time.perf_counter() - self.start_wall
+            report['cpu_time'] = time.process_time() - self.start_cpu
+            report['peak_memory'] = peak_rss()
+            if self.trace_memory:
+                report['traced_peak'] = max((phase['traced_peak'] for phase in self.phases), default=0)
+        report['phases'] = self.phases
+        return report
+
+    def save(self, report, path):
+        # Write the report as JSON
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
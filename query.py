@@ -0,0 +1,96 @@
+from indexes import NameIndex  # Suffix index of the node names
+
+EDGE_TYPES = ('Encapsulation', 'Ownership', 'Import', 'Invoke', 'Class Hierarchy')  # Types of the edges
+
+
+class GraphQuery:
+    # Lookups over a built graph without scanning its edges for every question.
+    # The edges are split once by their types into the adjacency of the successors and the predecessors,
+    # the transitive closures are computed on the first question and cached,
+    # the nodes are found by the ends of their names with the suffix index of the builder (or a new one).
+    # The index is a snapshot: a new GraphQuery is needed after the graph changes.
+    # Usage:
+    #   query = builder.query()
+    #   query.invoked_by(node)  # who invokes the node
+    #   query.imports(file_node)  # what the file imports (the Import edges are already transitive)
+    #   query.subclasses(class_node)  # all subclasses of the class
+    #   query.batch(query.invoked_by, nodes)  # node -> answer for many nodes at once
+    def __init__(self, graph, name_index=None):
+        self.graph = graph
+        self.successors = {type: {} for type in EDGE_TYPES}  # Edge type -> node -> targets of its edges
+        self.predecessors = {type: {} for type in EDGE_TYPES}  # Edge type -> node -> sources of its edges
+        for u, v, type in graph.edges(data='type'):
+            self.successors.setdefault(type, {}).setdefault(u, []).append(v)
+            self.predecessors.setdefault(type, {}).setdefault(v, []).append(u)
+        if name_index is None:
+            name_index = NameIndex()
+            for node in graph:
+                name_index.add(node)
+        self.name_index = name_index
+        self.closures = {}  # (edge type, reverse, node) -> nodes reached through the edges of the type
+
+    def targets(self, node, type):
+        # Direct targets of the edges of the type from the node
+        return self.successors.get(type, {}).get(node, [])
+
+    def sources(self, node, type):
+        # Direct sources of the edges of the type to the node
+        return self.predecessors.get(type, {}).get(node, [])
+
+    def transitive(self, node, type, reverse=False):
+        # All nodes reached from the node through the edges of the type (against them if reverse),
+        # in the order of the discovery, computed once per node
+        key = (type, reverse, node)
+        closure = self.closures.get(key)
+        if closure is None:
+            adjacency = (self.predecessors if reverse else self.successors).get(type, {})
+            seen = {node: True}
+            stack = [node]
+            while stack:
+                for next_node in adjacency.get(stack.pop(), ()):
+                    if next_node not in seen:
+                        seen[next_node] = True
+                        stack.append(next_node)
+            del seen[node]
+            closure = self.closures[key] = list(seen)
+        return closure
+
+    def find(self, suffix):
+        # Nodes whose names end with the suffix, e.g. "Graph/add_edge"
+        return self.name_index.lookup(suffix)
+
+    def invokes(self, node):
+        # Definitions invoked by the node
+        return self.targets(node, 'Invoke')
+
+    def invoked_by(self, node):
+        # Definitions (or files) which invoke the node
+        return self.sources(node, 'Invoke')
+
+    def imports(self, file_node):
+        # Files and definitions imported by the file
+        return self.targets(file_node, 'Import')
+
+    def imported_by(self, node):
+        # Files which import the file or the definition
+        return self.sources(node, 'Import')
+
+    def children(self, node):
+        # Definitions directly inside the file or the definition
+        return self.targets(node, 'Encapsulation') + self.targets(node, 'Ownership')
+
+    def superclasses(self, class_node, transitive=True):
+        # Parents of the class (and their parents)
+        if transitive:
+            return self.transitive(class_node, 'Class Hierarchy')
+        return self.targets(class_node, 'Class Hierarchy')
+
+    def subclasses(self, class_node, transitive=True):
+        # Children of the class (and their children)
+        if transitive:
+            return self.transitive(class_node, 'Class Hierarchy', reverse=True)
+        return self.sources(class_node, 'Class Hierarchy')
+
+    def batch(self, lookup, nodes):
+        # Answers of the lookup for many nodes: node -> answer
+        return {node: lookup(node) for node in nodes}
@@ -0,0 +1,66 @@
+import os  # To remove the temporary DOT files
+import subprocess  # To run Graphviz
+import tempfile  # For the DOT text given to Graphviz
+
+# The graphs are rendered by the "dot" program of Graphviz (https://graphviz.org), it has to be installed
+# and found on the PATH; no python package is needed for the rendering
+
+
+def quote(value):
+    # Quoted DOT identifier
+    return '"' + str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') + '"'
+
+
+def select_subgraph(graph, edge_types=None, max_depth=None):
+    # Nodes and edges to render: only the edges of the given types and the nodes up to the given nesting,
+    # with the edge filter only the nodes connected by the selected edges are kept
+    def node_fits(node):
+        return max_depth is None or graph.nodes[node].get('nesting', 0) <= max_depth
+
+    edges = [(u, v, data) for u, v, data in graph.edges(data=True)
+             if (edge_types is None or data.get('type') in edge_types) and node_fits(u) and node_fits(v)]
+    if edge_types is None:
+        nodes = [node for node in graph.nodes if node_fits(node)]
+    else:
+        connected = set()
+        for u, v, _ in edges:
+            connected.add(u)
+            connected.add(v)
+        nodes = [node for node in graph.nodes if node in connected]
+    return nodes, edges
+
+
+def write_dot(graph, out, edge_colors, edge_styles, edge_types=None, max_depth=None):
+    # Write the graph as DOT text in one pass: node colors come from their "color" attributes,
+    # edge colors and styles from the given tables by the edge types
+    nodes, edges = select_subgraph(graph, edge_types, max_depth)
+    out.write('digraph G {\n')
+    out.write('node [style=filled];\n')
+    for node in nodes:
+        # Label with the last path segment, fill color from the node, default to white
+        out.write(f'{quote(node)} [label={quote(node.split("/")[-1])}, '
+                  f'fillcolor={quote(graph.nodes[node].get("color", "white"))}];\n')
+    for u, v, data in edges:
+        edge_type = data.get('type', 'Unknown')
+        out.write(f'{quote(u)} -> {quote(v)} [label={quote(edge_type)}, '
+                  f'color={quote(edge_colors.get(edge_type, "black"))}, '
+                  f'style={quote(edge_styles.get(edge_type, "solid"))}];\n')
+    out.write('}\n')
+    return len(nodes), len(edges)
+
+
+def render_dot(dot_path, output_path, output_format='png', engine='dot'):
+    # Render the DOT file with Graphviz, nothing is displayed
+    subprocess.run([engine, f'-T{output_format}', dot_path, '-o', output_path], check=True)
+
+
+def render_graph(graph, output_path, output_format='png', edge_colors=None, edge_styles=None, edge_types=None,
+                 max_depth=None):
+    # Render the graph into the image, the DOT text is written to a temporary file which is removed afterwards
+    descriptor, dot_path = tempfile.mkstemp(suffix='.dot')
+    try:
+        with os.fdopen(descriptor, 'w', encoding='utf-8') as f:
+            write_dot(graph, f, edge_colors or {}, edge_styles or {}, edge_types, max_depth)
+        render_dot(dot_path, output_path, output_format)
+    finally:
+        os.remove(dot_path)
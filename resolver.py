@@ -0,0 +1,96 @@
+class ModuleResolver:
+    # Resolution of the imported modules to the files of the repository without the file system:
+    # the table of the modules is built once from the list of the files.
+    # Module names are dotted paths from the root of the repository, e.g. "pkg.sub.mod" for pkg\sub\mod.py,
+    # a package "pkg" is its pkg\__init__.py. If the root of the repository has an __init__.py,
+    # its name is also accepted as the first part of the module names.
+    # Usage by other tools:
+    #   resolver = ModuleResolver(path_to_repo, files)
+    #   resolver.resolve('pkg.mod')  # "import pkg.mod"
+    #   resolver.resolve('..utils', importer=path_to_file)  # "from ..utils import smth"
+    #   resolver.resolve_from('pkg', 'mod', importer=path_to_file)  # "from pkg import mod"
+    def __init__(self, root, files, separator='\\'):
+        self.root = root  # Path to the repository
+        self.separator = separator  # Separator of the folders in the paths
+        self.modules = {}  # Dotted name of the module file -> path to the file
+        self.packages = {}  # Dotted name of the package -> path to its __init__.py
+        self.names = {}  # Path to the file -> dotted name of the module
+        for file in files:
+            name = self.module_name_of_path(file)
+            if name is None:
+                continue  # The file is not inside the repository
+            self.modules[name] = file
+            self.names[file] = name
+            if name == '__init__' or name.endswith('.__init__'):
+                self.packages[name[:-len('__init__')].rstrip('.')] = file
+
+        # If the repository is a package itself, its modules are also known by the names with the package
+        if '' in self.packages:
+            prefix = root.split(separator)[-1]
+            for table in (self.modules, self.packages):
+                for name, file in list(table.items()):
+                    table[prefix + '.' + name if name else prefix] = file
+
+    def __len__(self):
+        return len(self.names)
+
+    def __contains__(self, path):
+        return path in self.names
+
+    def module_name_of_path(self, path):
+        # Dotted name of the module of the python file, None if the file is outside of the repository
+        if not path.startswith(self.root + self.separator) or not path.endswith('.py'):
+            return None
+        return path[len(self.root) + 1:-3].replace(self.separator, '.')
+
+    def module_name(self, path):
+        # Dotted name of the module of the file of the repository
+        return self.names.get(path)
+
+    def package_name(self, path):
+        # Dotted name of the package which contains the file (the package itself for __init__.py)
+        name = self.names.get(path)
+        if name is None:
+            return None
+        return name.rpartition('.')[0]
+
+    def find_module(self, name):
+        # File of the module or the package with the absolute dotted name, packages come first as in python
+        path = self.packages.get(name)
+        return self.modules.get(name) if path is None else path
+
+    def absolute_name(self, name, importer=None):
+        # Absolute dotted name of the imported module, leading dots are resolved from the package of the importer
+        level = len(name) - len(name.lstrip('.'))
+        if level == 0:
+            return name
+        if importer is None:
+            return None
+        package = self.package_name(importer)
+        if package is None:
+            return None
+
+        parts = package.split('.') if package else []
+        if level - 1 > len(parts):
+            return None  # Goes beyond the root of the repository
+        parts = parts[:len(parts) - (level - 1)]
+        if name[level:]:
+            parts.append(name[level:])
+        return '.'.join(parts)
+
+    def resolve(self, name, importer=None):
+        # File of the module for "import name" or "from name import ...", None if it is not in the repository
+        absolute = self.absolute_name(name, importer)
+        if not absolute:
+            return self.packages.get('') if absolute == '' else None
+        return self.find_module(absolute)
+
+    def resolve_from(self, module, name, importer=None):
+        # File for "from module import name": the submodule if it exists, otherwise the module itself
+        absolute = self.absolute_name(module, importer)
+        if absolute is None:
+            return None
+        submodule = self.find_module(absolute + '.' + name if absolute else name)
+        if submodule is not None:
+            return submodule
+        return self.resolve(module, importer)
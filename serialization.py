@@ -0,0 +1,315 @@
+import mmap  # For reading the graph files without copying them
+import struct  # For the headers and the tagged values
+from array import array  # For the integer tables
+import networkx as nx  # For the restored graphs
+
+# Binary layout of the graph file (headers are little-endian, the tables use the byte order of the machine):
+#   header: magic b'SGBG', version (u32), flags (u32: 1 - directed, 2 - multigraph), reserved (u32)
+#   blocks: length (u64), payload, zero padding to 8 bytes, so every table can be viewed with memoryview.cast
+#     1. string table: character offsets (u64, count + 1) and the UTF-8 text of all strings
+#     2. nodes: string ids of the node names (u32)
+#     3. edges: node indexes of the sources and of the targets (u32 each), keys of the multigraph edges
+#     4. node attributes, 5. edge attributes: number of columns (u64), then every column as
+#        a descriptor (key string id, kind, number of rows), the rows (u32) and the values
+#     6. graph attributes: tagged values
+# Columns of the attributes with integer, string or (int, int) values are stored as plain tables,
+# other values are written with type tags.
+MAGIC = b'SGBG'  # Signature of the graph files
+VERSION = 1  # Version of the layout
+DIRECTED = 1  # Flags of the header
+MULTIGRAPH = 2
+
+COLUMN_INTS = 0  # Kinds of the attribute columns
+COLUMN_STRINGS = 1
+COLUMN_PAIRS = 2
+COLUMN_TAGGED = 3
+
+INT64_MIN = -2 ** 63  # Range of the integer tables
+INT64_MAX = 2 ** 63 - 1
+
+
+class GraphWriter:
+    # Serializer of one graph into the binary layout
+    def __init__(self):
+        self.strings = {}  # String -> id in the string table (the strings are interned)
+        self.chunks = []  # Parts of the file
+
+    def string_id(self, value):
+        # Id of the string, the string is added to the table when it appears for the first time
+        string_id = self.strings.get(value)
+        if string_id is None:
+            string_id = self.strings[value] = len(self.strings)
+        return string_id
+
+    def block(self, payload):
+        # Add a block with its length and the padding
+        payload = bytes(payload)
+        self.chunks.append(struct.pack('<Q', len(payload)))
+        self.chunks.append(payload)
+        self.chunks.append(b'\0' * (-len(payload) % 8))
+
+    def tagged(self, value, out):
+        # Append the value with its type tag
+        if value is None:
+            out.append(b'N')
+        elif value is True or value is False:
+            out.append(b'T' if value else b'F')
+        elif isinstance(value, int):
+            if INT64_MIN <= value <= INT64_MAX:
+                out.append(b'i' + struct.pack('<q', value))
+            else:
+                text = str(value).encode()
+                out.append(b'I' + struct.pack('<I', len(text)) + text)
+        elif isinstance(value, float):
+            out.append(b'f' + struct.pack('<d', value))
+        elif isinstance(value, str):
+            out.append(b's' + struct.pack('<I', self.string_id(value)))
+        elif isinstance(value, bytes):
+            out.append(b'b' + struct.pack('<I', len(value)) + value)
+        elif isinstance(value, (tuple, list)):
+            out.append((b't' if isinstance(value, tuple) else b'l') + struct.pack('<I', len(value)))
+            for item in value:
+                self.tagged(item, out)
+        elif isinstance(value, dict):
+            out.append(b'd' + struct.pack('<I', len(value)))
+            for key, item in value.items():
+                self.tagged(key, out)
+                self.tagged(item, out)
+        else:
+            raise TypeError(f"Values of type {type(value).__name__} can't be saved in the binary graph")
+
+    def columns(self, records):
+        # Group the attributes of the nodes or edges by their keys: key -> (rows, values)
+        columns = {}
+        for row, attributes in enumerate(records):
+            for key, value in attributes.items():
+                column = columns.get(key)
+                if column is None:
+                    column = columns[key] = ([], [])
+                column[0].append(row)
+                column[1].append(value)
+        return columns
+
+    def attributes(self, records):
+        # Block of the attribute columns
+        out = []
+        columns = self.columns(records)
+        out.append(struct.pack('<Q', len(columns)))
+        for key, (rows, values) in columns.items():
+            kind, payload = self.column(values)
+            rows = array('I', rows).tobytes()
+            out.append(struct.pack('<IIQQ', self.string_id(key), kind, len(rows), len(payload)))
+            out.append(rows + b'\0' * (-len(rows) % 8))
+            out.append(payload + b'\0' * (-len(payload) % 8))
+        return b''.join(out)
+
+    def column(self, values):
+        # Kind and payload of the values of one column
+        if all(type(value) is int and INT64_MIN <= value <= INT64_MAX for value in values):
+            return COLUMN_INTS, array('q', values).tobytes()
+        if all(type(value) is str for value in values):
+            return COLUMN_STRINGS, array('I', map(self.string_id, values)).tobytes()
+        if all(type(value) is tuple and len(value) == 2 and type(value[0]) is int and type(value[1]) is int
+               and INT64_MIN <= min(value) and max(value) <= INT64_MAX for value in values):
+            return COLUMN_PAIRS, array('q', [item for value in values for item in value]).tobytes()
+        out = []
+        for value in values:
+            self.tagged(value, out)
+        return COLUMN_TAGGED, b''.join(out)
+
+    def write(self, graph, path):
+        # Write the graph to the file
+        nodes = list(graph.nodes)
+        for node in nodes:
+            if not isinstance(node, str):
+                raise TypeError("Only graphs with string node names can be saved in the binary graph")
+        node_index = {node: index for index, node in enumerate(nodes)}
+        node_ids = array('I', map(self.string_id, nodes))
+
+        multigraph = graph.is_multigraph()
+        if multigraph:
+            edges = list(graph.edges(keys=True, data=True))
+            keys = [key for _, _, key, _ in edges]
+            edge_data = [data for _, _, _, data in edges]
+        else:
+            edges = list(graph.edges(data=True))
+            keys = []
+            edge_data = [data for _, _, data in edges]
+        sources = array('I', (node_index[edge[0]] for edge in edges))
+        targets = array('I', (node_index[edge[1]] for edge in edges))
+
+        # The attributes are serialized first, their strings go to the same table
+        key_kind, key_payload = self.column(keys)
+        node_attributes = self.attributes([graph.nodes[node] for node in nodes])
+        edge_attributes = self.attributes(edge_data)
+        graph_attributes = []
+        self.tagged(dict(graph.graph), graph_attributes)
+
+        # String table: offsets in characters, so that the text is decoded at once when it is loaded
+        offsets = array('Q', [0])
+        for string in self.strings:
+            offsets.append(offsets[-1] + len(string))
+        text = ''.join(self.strings).encode('utf-8', errors='surrogatepass')
+
+        flags = (DIRECTED if graph.is_directed() else 0) | (MULTIGRAPH if multigraph else 0)
+        self.chunks = [MAGIC, struct.pack('<III', VERSION, flags, 0)]
+        self.block(offsets.tobytes())
+        self.block(text)
+        self.block(node_ids.tobytes())
+        self.block(sources.tobytes())
+        self.block(targets.tobytes())
+        self.block(struct.pack('<Q', key_kind) + key_payload)
+        self.block(node_attributes)
+        self.block(edge_attributes)
+        self.block(b''.join(graph_attributes))
+
+        with open(path, 'wb') as f:
+            f.writelines(self.chunks)
+
+
+class GraphReader:
+    # Deserializer of the binary layout, the tables are read through memoryviews of the buffer
+    def __init__(self, buffer):
+        self.buffer = memoryview(buffer)  # Content of the file (bytes or a memory map)
+        self.position = 0  # Current position in the buffer
+        self.strings = []  # String table
+
+    def block(self):
+        # Next block of the file
+        length, = struct.unpack_from('<Q', self.buffer, self.position)
+        start = self.position + 8
+        self.position = start + length + (-length % 8)
+        return self.buffer[start: start + length]
+
+    def table(self, view, typecode):
+        # Integer table viewed in place (empty views can't be cast)
+        if len(view) == 0:
+            return []
+        return view.cast('B').cast(typecode)
+
+    def tagged(self, view, position):
+        # Value with its type tag at the position, return the value and the next position
+        tag = bytes(view[position: position + 1])
+        position += 1
+        if tag == b'N':
+            return None, position
+        if tag == b'T':
+            return True, position
+        if tag == b'F':
+            return False, position
+        if tag == b'i':
+            return struct.unpack_from('<q', view, position)[0], position + 8
+        if tag == b'f':
+            return struct.unpack_from('<d', view, position)[0], position + 8
+        if tag == b's':
+            return self.strings[struct.unpack_from('<I', view, position)[0]], position + 4
+
+        count, = struct.unpack_from('<I', view, position)
+        position += 4
+        if tag == b'I':
+            return int(bytes(view[position: position + count])), position + count
+        if tag == b'b':
+            return bytes(view[position: position + count]), position + count
+        if tag in (b't', b'l'):
+            items = []
+            for _ in range(count):
+                item, position = self.tagged(view, position)
+                items.append(item)
+            return (tuple(items) if tag == b't' else items), position
+        if tag == b'd':
+            items = {}
+            for _ in range(count):
+                key, position = self.tagged(view, position)
+                items[key], position = self.tagged(view, position)
+            return items, position
+        raise ValueError(f"Unknown value tag {tag!r} in the binary graph")
+
+    def column(self, kind, payload, count):
+        # Values of one column
+        if kind == COLUMN_INTS:
+            return self.table(payload, 'q').tolist() if count else []
+        if kind == COLUMN_STRINGS:
+            strings = self.strings
+            return [strings[string_id] for string_id in self.table(payload, 'I')] if count else []
+        if kind == COLUMN_PAIRS:
+            items = self.table(payload, 'q').tolist() if count else []
+            return list(zip(items[0::2], items[1::2]))
+        values = []
+        position = 0
+        for _ in range(count):
+            value, position = self.tagged(payload, position)
+            values.append(value)
+        return values
+
+    def attributes(self, count):
+        # Attribute dictionaries of the rows from the block of the columns
+        view = self.block()
+        records = [{} for _ in range(count)]
+        columns, = struct.unpack_from('<Q', view, 0)
+        position = 8
+        for _ in range(columns):
+            key_id, kind, rows_length, payload_length = struct.unpack_from('<IIQQ', view, position)
+            position += 24
+            rows = self.table(view[position: position + rows_length], 'I')
+            position += rows_length + (-rows_length % 8)
+            payload = view[position: position + payload_length]
+            position += payload_length + (-payload_length % 8)
+            key = self.strings[key_id]
+            for row, value in zip(rows, self.column(kind, payload, len(rows))):
+                records[row][key] = value
+        return records
+
+    def read(self):
+        # Restore the graph
+        if bytes(self.buffer[:4]) != MAGIC:
+            raise ValueError("Not a binary graph file")
+        version, flags, _ = struct.unpack_from('<III', self.buffer, 4)
+        if version != VERSION:
+            raise ValueError(f"Unsupported version {version} of the binary graph")
+        self.position = 16
+
+        offsets = self.table(self.block(), 'Q')
+        text = str(self.block(), 'utf-8', errors='surrogatepass')
+        self.strings = [text[offsets[i]: offsets[i + 1]] for i in range(len(offsets) - 1)]
+
+        nodes = [self.strings[string_id] for string_id in self.table(self.block(), 'I')]
+        sources = self.table(self.block(), 'I')
+        targets = self.table(self.block(), 'I')
+        keys_view = self.block()
+        key_kind, = struct.unpack_from('<Q', keys_view, 0)
+        multigraph = bool(flags & MULTIGRAPH)
+        keys = self.column(key_kind, keys_view[8:], len(sources) if multigraph else 0)
+        node_attributes = self.attributes(len(nodes))
+        edge_attributes = self.attributes(len(sources))
+        graph_attributes, _ = self.tagged(self.block(), 0)
+
+        if flags & DIRECTED:
+            graph = nx.MultiDiGraph() if multigraph else nx.DiGraph()
+        else:
+            graph = nx.MultiGraph() if multigraph else nx.Graph()
+        graph.graph.update(graph_attributes)
+        graph.add_nodes_from(zip(nodes, node_attributes))
+        if multigraph:
+            graph.add_edges_from((nodes[u], nodes[v], key, data)
+                                 for u, v, key, data in zip(sources, targets, keys, edge_attributes))
+        else:
+            graph.add_edges_from((nodes[u], nodes[v], data) for u, v, data in zip(sources, targets, edge_attributes))
+        return graph
+
+
+def save_binary_graph(graph, path):
+    # Save the graph (MultiDiGraph or any other networkx graph with string node names) in the binary layout
+    GraphWriter().write(graph, path)
+
+
+def load_binary_graph(path, use_mmap=True):
+    # Load the graph saved by save_binary_graph, the file is memory-mapped instead of read if use_mmap is set
+    with open(path, 'rb') as f:
+        if not use_mmap:
+            return GraphReader(f.read()).read()
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+            reader = GraphReader(buffer)
+            try:
+                return reader.read()
+            finally:
+                reader.buffer.release()  # The memory map can be closed only without the views
@@ -0,0 +1,119 @@
+from array import array  # For the columns of the node store
+from collections import OrderedDict  # For the LRU order of the loaded sources
+from parsing import read_source, decode_slice  # Bytes of the files as they are given to the parser
+
+DEFAULT_SOURCE_BUFFERS = 64  # Number of source files kept in memory for the lazy bodies
+
+
+def load_source_bytes(path):
+    # Bytes of the file exactly as they are given to the parser, so that the byte offsets of the nodes match
+    return read_source(path)
+
+
+class NodeStore:
+    # Compact storage of the positions of the definition nodes.
+    # Instead of the per-node attributes (start/end bytes and points and the whole body text, which repeats
+    # the text of the nested definitions) every node keeps one row in array-backed columns: the id of its file
+    # and the byte offsets and points of its body. The body is read from the source file only when it is asked,
+    # the sources are kept in a small LRU of shared buffers.
+    #
+    # Memory of the graph after the build (tracemalloc, benchmarks/bench_node_storage.py, without the name index)
+    # on networkx (8360 nodes, 6.2 MB of source code): 23.2 MB with the body attributes, 12.7 MB in the compact
+    # mode; reading all the bodies back lazily takes 0.04 s.
+    def __init__(self, max_buffers=DEFAULT_SOURCE_BUFFERS, loader=load_source_bytes):
+        self.files = []  # File id -> path to the file
+        self.file_ids = {}  # Path to the file -> file id
+        self.rows = {}  # Node name -> row in the columns
+        self.file_id = array('l')  # Columns of the rows
+        self.start_byte = array('q')
+        self.end_byte = array('q')
+        self.start_row = array('l')
+        self.start_column = array('l')
+        self.end_row = array('l')
+        self.end_column = array('l')
+        self.max_buffers = max_buffers  # Number of the sources kept in memory
+        self.loader = loader  # Reads the bytes of the source file
+        self.buffers = OrderedDict()  # File id -> bytes of the source, in the order of the last use
+
+    def __len__(self):
+        return len(self.rows)
+
+    def __contains__(self, name):
+        return name in self.rows
+
+    def add_file(self, path):
+        # Id of the file, the file is registered when it appears for the first time
+        file_id = self.file_ids.get(path)
+        if file_id is None:
+            file_id = self.file_ids[path] = len(self.files)
+            self.files.append(path)
+        return file_id
+
+    def add(self, name, path, start_byte, end_byte, start_point, end_point):
+        # Store the position of the node, the row of a node which is added again is overwritten
+        values = (self.add_file(path), start_byte, end_byte, start_point[0], start_point[1],
+                  end_point[0], end_point[1])
+        columns = (self.file_id, self.start_byte, self.end_byte,
+                   self.start_row, self.start_column, self.end_row, self.end_column)
+        row = self.rows.get(name)
+        if row is None:
+            self.rows[name] = len(self.file_id)
+            for column, value in zip(columns, values):
+                column.append(value)
+        else:
+            for column, value in zip(columns, values):
+                column[row] = value
+        self.buffers.pop(values[0], None)  # The file may have changed since its source was loaded
+
+    def add_definitions(self, path, names, definitions):
+        # Store the positions of the definitions of the file, names are in the order of the definitions
+        for name, (_, _, _, start_byte, end_byte, start_point, end_point) in zip(names, definitions):
+            self.add(name, path, start_byte, end_byte, start_point, end_point)
+
+    def position(self, name):
+        # Attributes of the position of the node, the same as the ones of the non-compact nodes
+        row = self.rows[name]
+        return {
+            'start_byte': self.start_byte[row],
+            'end_byte': self.end_byte[row],
+            'start_point': (self.start_row[row], self.start_column[row]),
+            'end_point': (self.end_row[row], self.end_column[row])
+        }
+
+    def path(self, name):
+        # Path to the file of the node
+        return self.files[self.file_id[self.rows[name]]]
+
+    def source(self, file_id):
+        # Bytes of the source file, loaded on the first request and kept while they are recently used
+        buffer = self.buffers.get(file_id)
+        if buffer is None:
+            buffer = self.buffers[file_id] = self.loader(self.files[file_id])
+            while len(self.buffers) > self.max_buffers:
+                self.buffers.popitem(last=False)
+        else:
+            self.buffers.move_to_end(file_id)
+        return buffer
+
+    def body(self, name):
+        # Text of the body of the node, read from the source only now
+        row = self.rows[name]
+        return decode_slice(self.source(self.file_id[row]), self.start_byte[row], self.end_byte[row])
+
+    def remove(self, name):
+        # Forget the position of the node, its row is left unused
+        self.rows.pop(name, None)
+
+    def release(self):
+        # Drop the loaded sources, they are read again when a body is asked
+        self.buffers.clear()
+
+    def clear(self):
+        # Drop all the rows and files
+        self.files = []
+        self.file_ids = {}
+        self.rows = {}
+        for column in (self.file_id, self.start_byte, self.end_byte,
+                       self.start_row, self.start_column, self.end_row, self.end_column):
+            del column[:]
+        self.buffers.clear()
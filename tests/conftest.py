@@ -0,0 +1,170 @@
+import os  # For the files of the fixture repositories
+import sys  # To import the modules of the repository
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Small repository with every kind of import (plain, aliased, from, wildcard, relative, an import cycle),
+# nested definitions, a class hierarchy and plain, "self." and attribute calls
+SAMPLE_FILES = {
+    'app.py': '''\
+import pkg.models
+from pkg.models import Dog, make_animal
+from pkg.utils import *
+from pkg import helpers
+
+
+class Kennel(Dog):
+    def __init__(self):
+        self.dogs = []
+
+    def add(self, dog):
+        self.dogs.append(dog)
+        self.report()
+
+    def report(self):
+        return format_name(self.dogs)
+
+
+def main():
+    kennel = Kennel()
+    kennel.add(make_animal('rex'))
+    helpers.shout('done')
+
+    def inner():
+        return main()
+    return inner
+''',
+    'pkg/__init__.py': '',
+    'pkg/models.py': '''\
+from .utils import format_name
+from . import helpers
+
+
+class Animal:
+    def __init__(self, name):
+        self.name = name
+
+    def speak(self):
+        return format_name(self.name)
+
+
+class Dog(Animal):
+    def speak(self):
+        return helpers.shout(super().speak())
+
+
+def make_animal(name):
+    return Dog(name)
+''',
+    'pkg/utils.py': '''\
+import pkg.helpers as helpers
+
+
+def format_name(name):
+    return str(name).title()
+
+
+def unused():
+    pass
+''',
+    'pkg/helpers.py': '''\
+from pkg.cycle_a import ping
+
+
+def shout(text):
+    return text.upper() + '!'
+''',
+    'pkg/cycle_a.py': '''\
+from pkg.cycle_b import pong
+
+
+def ping():
+    return pong()
+
+
+class A:
+    pass
+''',
+    'pkg/cycle_b.py': '''\
+from pkg.cycle_a import ping, A
+
+
+def pong():
+    return 'pong'
+
+
+class B(A):
+    def run(self):
+        return ping()
+''',
+    'scripts/tool.py': '''\
+from pkg.models import Animal
+import app
+
+
+def run():
+    Animal('x').speak()
+    app.main()
+''',
+}
+
+
+def write_repo(folder, files):
+    # Write the files of the repository, "/" in the names separates the folders
+    for name, source in files.items():
+        path = os.path.join(folder, *name.split('/'))
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(source)
+    return folder
+
+
+def remove_file(folder, name):
+    # Remove the file of the repository
+    os.remove(os.path.join(folder, *name.split('/')))
+
+
+def change_sample(path_to_repo):
+    # Change one file, add one and remove one
+    write_repo(path_to_repo, {
+        'pkg/utils.py': SAMPLE_FILES['pkg/utils.py'] + '''
+
+def shout_name(name):
+    return helpers.shout(format_name(name))
+''',
+        'pkg/extra.py': '''\
+from pkg.utils import shout_name
+
+
+class Puppy:
+    def bark(self):
+        return shout_name('puppy')
+''',
+    })
+    remove_file(path_to_repo, 'scripts/tool.py')
+
+
+def graph_nodes(graph):
+    # Nodes of the graph with their attributes
+    return {node: dict(data) for node, data in graph.nodes(data=True)}
+
+
+def graph_edges(graph):
+    # Edges of the graph as a sorted list of (source, target, type)
+    return sorted((u, v, data['type']) for u, v, data in graph.edges(data=True))
+
+
+@pytest.fixture
+def sample_repo(tmp_path):
+    # Path to a fresh copy of the sample repository
+    return write_repo(str(tmp_path / 'sample'), SAMPLE_FILES)
+
+
+@pytest.fixture
+def save_folder(tmp_path):
+    # Folder for the saved graphs and states
+    folder = tmp_path / 'graphs'
+    folder.mkdir()
+    return str(folder)
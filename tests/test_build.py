@@ -0,0 +1,50 @@
+from conftest import change_sample, graph_nodes, graph_edges
+from main import SemanticGraphBuilder
+
+
+def build(path_to_repo, save_folder, builder=None, **kwargs):
+    # Graph of the repository built by a new (or the given) builder
+    builder = builder or SemanticGraphBuilder()
+    builder.build_from_one(path_to_repo, save_folder, **kwargs)
+    return builder
+
+
+def test_sample_graph_has_every_edge_type(sample_repo, save_folder):
+    types = {type for _, _, type in graph_edges(build(sample_repo, save_folder).graph)}
+    assert types == {'Encapsulation', 'Ownership', 'Import', 'Invoke', 'Class Hierarchy'}
+
+
+def test_parallel_build_matches_serial(sample_repo, save_folder):
+    serial = build(sample_repo, save_folder, workers=1).graph
+    parallel = build(sample_repo, save_folder, workers=3).graph
+    assert graph_nodes(parallel) == graph_nodes(serial)
+    assert graph_edges(parallel) == graph_edges(serial)
+
+
+def test_parallel_compact_build_matches_serial(sample_repo, save_folder):
+    serial = build(sample_repo, save_folder, SemanticGraphBuilder(compact=True), workers=1).graph
+    parallel = build(sample_repo, save_folder, SemanticGraphBuilder(compact=True), workers=3).graph
+    assert graph_nodes(parallel) == graph_nodes(serial)
+    assert graph_edges(parallel) == graph_edges(serial)
+
+
+def test_incremental_build_with_the_extraction_cache_hashes_every_file_once(sample_repo, save_folder, tmp_path,
+                                                                             monkeypatch):
+    import incremental
+    import main
+    hashed = []
+    file_hash = incremental.file_hash
+
+    def counted_hash(path):
+        hashed.append(path)
+        return file_hash(path)
+    monkeypatch.setattr(incremental, 'file_hash', counted_hash)
+    monkeypatch.setattr(main, 'file_hash', counted_hash)
+
+    builder = SemanticGraphBuilder(extraction_cache=str(tmp_path / 'cache'))
+    for edit in (None, change_sample):
+        if edit is not None:
+            edit(sample_repo)
+        hashed.clear()
+        build(sample_repo, save_folder, builder, incremental=True)
+        assert hashed and len(hashed) == len(set(hashed))  # The hashes of the state are the keys of the cache
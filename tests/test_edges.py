@@ -0,0 +1,13 @@
+from conftest import graph_edges
+from main import SemanticGraphBuilder
+
+
+def test_add_edge_deduplicates_by_type():
+    builder = SemanticGraphBuilder()
+    assert builder.add_edge('a.py', 'a.py/f', type='Encapsulation') == 0
+    assert builder.add_edge('a.py', 'a.py/f', type='Encapsulation') == 0
+    assert builder.add_edge('a.py', 'a.py/f', type='Import') == 1
+    builder.add_edge('a.py', 'a.py/f', type='Import', weight=2)  # Only updates the attributes
+    assert graph_edges(builder.graph) == [('a.py', 'a.py/f', 'Encapsulation'), ('a.py', 'a.py/f', 'Import')]
+    assert builder.graph.edges['a.py', 'a.py/f', 1]['weight'] == 2
+    assert 'a.py/f' in builder.name_index
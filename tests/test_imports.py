@@ -0,0 +1,30 @@
+from conftest import graph_edges
+from imports import ImportClosure
+from main import SemanticGraphBuilder
+from paths import to_node
+
+
+def test_cycle_does_not_import_own_definitions():
+    closure = ImportClosure({'a.py': {'a.py/A'}, 'b.py': {'b.py/B'}})
+    closure.add_file('a.py', ['b.py'], [], [])
+    closure.add_file('b.py', [], [], [('a.py', 'A')])
+    assert closure.solve() == {'a.py': ['b.py'], 'b.py': ['a.py/A']}
+
+
+def test_wildcard_cycle_does_not_import_own_definitions():
+    closure = ImportClosure({'a.py': {'a.py/A'}, 'b.py': {'b.py/B'}})
+    closure.add_file('a.py', [], ['b.py'], [])
+    closure.add_file('b.py', [], ['a.py'], [])
+    targets = closure.solve()
+    assert sorted(targets['a.py']) == ['b.py/B']
+    assert sorted(targets['b.py']) == ['a.py/A']
+
+
+def test_sample_files_do_not_import_themselves(sample_repo, save_folder):
+    builder = SemanticGraphBuilder()
+    builder.build_from_one(sample_repo, save_folder)
+    root = to_node(sample_repo) + '/'
+    imports = [(u[len(root):], v[len(root):]) for u, v, type in graph_edges(builder.graph) if type == 'Import']
+    assert ('pkg/cycle_b.py', 'pkg/cycle_a.py/A') in imports
+    assert ('pkg/cycle_a.py', 'pkg/cycle_b.py/pong') in imports
+    assert not [(u, v) for u, v in imports if v == u or v.startswith(u + '/')]
@@ -0,0 +1,42 @@
+from conftest import SAMPLE_FILES, write_repo, remove_file, change_sample, graph_nodes, graph_edges
+from main import SemanticGraphBuilder
+
+
+def build(path_to_repo, save_folder, builder=None, **kwargs):
+    # Graph of the repository built by a new (or the given) builder
+    builder = builder or SemanticGraphBuilder()
+    builder.build_from_one(path_to_repo, save_folder, **kwargs)
+    return builder
+
+
+def test_incremental_build_matches_full(sample_repo, save_folder):
+    build(sample_repo, save_folder, incremental=True)
+    change_sample(sample_repo)
+    incremental = build(sample_repo, save_folder, incremental=True).graph
+    full = build(sample_repo, save_folder).graph
+    assert graph_nodes(incremental) == graph_nodes(full)
+    assert graph_edges(incremental) == graph_edges(full)
+
+
+def test_incremental_build_of_the_same_builder_matches_full(sample_repo, save_folder):
+    for compact in (False, True):
+        builder = build(sample_repo, save_folder, SemanticGraphBuilder(compact=compact), incremental=True)
+        graph = builder.graph
+        change_sample(sample_repo)
+        incremental = build(sample_repo, save_folder, builder, incremental=True).graph
+        full_builder = build(sample_repo, save_folder, SemanticGraphBuilder(compact=compact))
+        assert incremental is graph  # Patched in place
+        assert graph_nodes(incremental) == graph_nodes(full_builder.graph)
+        assert graph_edges(incremental) == graph_edges(full_builder.graph)
+        for node, nesting in full_builder.graph.nodes(data='nesting'):
+            if nesting:
+                assert builder.get_body(node) == full_builder.get_body(node)
+        write_repo(sample_repo, SAMPLE_FILES)  # Back to the first version for the next mode
+        remove_file(sample_repo, 'pkg/extra.py')
+
+
+def test_incremental_build_without_changes_keeps_the_graph(sample_repo, save_folder):
+    first = build(sample_repo, save_folder, incremental=True).graph
+    second = build(sample_repo, save_folder, incremental=True).graph
+    assert graph_nodes(second) == graph_nodes(first)
+    assert graph_edges(second) == graph_edges(first)
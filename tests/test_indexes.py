@@ -0,0 +1,100 @@
+import random
+
+import networkx as nx
+
+from call_graph import CallGraph
+from conftest import graph_edges
+from indexes import ReachabilityIndex
+from main import SemanticGraphBuilder
+
+
+def random_graph(seed, files=12, definitions=30, edges=60):
+    # Graph of files and definitions with random edges (cycles included)
+    generator = random.Random(seed)
+    file_nodes = [f'f{i}.py' for i in range(files)]
+    nodes = file_nodes + [f'f{i % files}.py/d{i}' for i in range(definitions)]
+    graph = nx.MultiDiGraph()
+    graph.add_nodes_from(nodes)
+    for _ in range(edges):
+        graph.add_edge(generator.choice(nodes), generator.choice(nodes), type=generator.choice(['Import', 'Invoke']))
+    return graph, file_nodes, nodes, generator
+
+
+def assert_same_ancestors(index, graph, file_nodes, nodes):
+    # Every answer of the index is the answer of nx.ancestors
+    for node in nodes:
+        ancestors = nx.ancestors(graph, node)
+        for ancestor in file_nodes + nodes[-5:]:
+            assert index.is_ancestor(ancestor, node) == (ancestor in ancestors), (ancestor, node)
+
+
+def assert_same_reachable_files(index, graph, file_nodes):
+    # Files reached from every file are the files of the nodes at the ends of its paths (the file itself too
+    # if it is on a cycle)
+    for file in file_nodes:
+        reached = set()
+        for successor in graph.successors(file):
+            reached |= {node.split('/')[0] for node in nx.descendants(graph, successor) | {successor}}
+        assert index.reachable_files(file) == reached, file
+
+
+def test_reachability_matches_ancestors():
+    for seed in range(20):
+        graph, file_nodes, nodes, _ = random_graph(seed)
+        index = ReachabilityIndex(graph, file_nodes)
+        assert_same_ancestors(index, graph, file_nodes, nodes)
+        assert_same_reachable_files(index, graph, file_nodes)
+
+
+def test_reachability_follows_added_edges():
+    for seed in range(20):
+        graph, file_nodes, nodes, generator = random_graph(seed, edges=20)
+        index = ReachabilityIndex(graph, file_nodes)
+        for _ in range(20):
+            u, v = generator.choice(nodes), generator.choice(nodes)
+            graph.add_edge(u, v, type='Invoke')
+            index.add_edge(u, v, 'Invoke')
+            assert_same_ancestors(index, graph, file_nodes, nodes)
+            assert_same_reachable_files(index, graph, file_nodes)
+
+
+def test_node_is_not_its_own_ancestor():
+    graph = nx.MultiDiGraph()
+    graph.add_edge('a.py', 'b.py', type='Import')
+    graph.add_edge('b.py', 'a.py', type='Import')
+    graph.add_edge('c.py', 'c.py', type='Import')
+    graph.add_node('d.py')
+    index = ReachabilityIndex(graph, ['a.py', 'b.py', 'c.py', 'd.py'])
+    for node in ('a.py', 'b.py', 'c.py', 'd.py'):
+        assert node not in nx.ancestors(graph, node)
+        assert not index.is_ancestor(node, node)
+    assert index.is_ancestor('a.py', 'b.py') and index.is_ancestor('b.py', 'a.py')
+
+
+def reference_invoke_edges(builder):
+    # Invoke edges of the native call graph with every reachability question asked with nx.ancestors
+    # on the graph as it was during the invoke phase (before the class hierarchy), Invoke edges included,
+    # and with every candidate of the attribute calls checked
+    graph = nx.MultiDiGraph()
+    graph.add_nodes_from(builder.graph.nodes)
+    graph.add_edges_from((u, v, data) for u, v, data in builder.graph.edges(data=True)
+                         if data['type'] not in ('Invoke', 'Class Hierarchy'))
+    extractions = builder.extract_files()  # The records of the files are dropped at the end of the build
+    call_graph = CallGraph()
+    for file in builder.files_to_parse:
+        call_graph.add_file(builder.file_node(file), extractions[file])
+
+    edges = set()
+    for caller, callee in call_graph.resolve(lambda file_node, node: file_node in nx.ancestors(graph, node)):
+        if caller in graph and callee in graph and (caller, callee) not in edges:
+            edges.add((caller, callee))
+            graph.add_edge(caller, callee, type='Invoke')
+    return sorted(edges)
+
+
+def test_invoke_edges_match_ancestors(sample_repo, save_folder):
+    builder = SemanticGraphBuilder()
+    builder.build_from_one(sample_repo, save_folder)
+    invokes = [(u, v) for u, v, type in graph_edges(builder.graph) if type == 'Invoke']
+    assert invokes
+    assert invokes == reference_invoke_edges(builder)
@@ -0,0 +1,33 @@
+import tracemalloc
+
+from main import SemanticGraphBuilder
+from profiling import peak_rss
+
+
+def assert_memory(value):
+    # The peak memory is measured wherever peak_rss can measure it
+    if peak_rss() is None:
+        assert value is None
+    else:
+        assert value > 0
+
+
+def test_profile_measures_times_without_tracing(sample_repo, save_folder):
+    tracing = []
+    builder = SemanticGraphBuilder()
+    builder.graph_counts = lambda: tracing.append(tracemalloc.is_tracing()) or {}  # Asked in every phase
+    report = builder.build_from_one(sample_repo, save_folder, profile=True)
+    assert tracing and not any(tracing)
+    assert_memory(report['peak_memory'])
+    assert [phase['name'] for phase in report['phases']][-2:] == ['invoke', 'class_hierarchy']
+    for phase in report['phases']:
+        assert phase['wall_time'] >= 0
+        assert_memory(phase['peak_rss'])
+        assert 'traced_peak' not in phase
+
+
+def test_profile_memory_traces_the_phases(sample_repo, save_folder):
+    report = SemanticGraphBuilder().build_from_one(sample_repo, save_folder, profile_memory=True)
+    assert not tracemalloc.is_tracing()  # Stopped at the end of the build
+    assert report['traced_peak'] == max(phase['traced_peak'] for phase in report['phases']) > 0
+    assert all('memory_delta' in phase for phase in report['phases'])
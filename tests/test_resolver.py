@@ -0,0 +1,79 @@
+import os
+
+from conftest import write_repo, graph_edges
+from main import SemanticGraphBuilder
+from paths import to_node
+from resolver import ModuleResolver
+
+ROOT = os.path.join('repos', 'r1')
+FILES = [os.path.join(ROOT, *name.split('/')) for name in (
+    'app.py', 'pkg/__init__.py', 'pkg/m.py', 'pkg/n.py', 'pkg/sub/__init__.py', 'pkg/sub/deep.py')]
+
+
+def path(name):
+    # Path to the file of the resolved repository
+    return os.path.join(ROOT, *name.split('/'))
+
+
+def test_resolve_absolute_names():
+    resolver = ModuleResolver(ROOT, FILES, os.sep)
+    assert resolver.resolve('app') == path('app.py')
+    assert resolver.resolve('pkg') == path('pkg/__init__.py')
+    assert resolver.resolve('pkg.sub.deep') == path('pkg/sub/deep.py')
+    assert resolver.resolve('os.path') is None
+
+
+def test_resolve_relative_names():
+    resolver = ModuleResolver(ROOT, FILES, os.sep)
+    importer = path('pkg/sub/deep.py')
+    assert resolver.resolve('.', importer) == path('pkg/sub/__init__.py')
+    assert resolver.resolve('..n', importer) == path('pkg/n.py')
+    assert resolver.resolve('...app', importer) == path('app.py')
+    assert resolver.resolve('....app', importer) is None  # Beyond the root
+    assert resolver.resolve('.n') is None  # Relative names need the importer
+
+
+def test_resolve_from_prefers_submodules():
+    resolver = ModuleResolver(ROOT, FILES, os.sep)
+    importer = path('pkg/m.py')
+    assert resolver.resolve_from('.', 'n', importer) == path('pkg/n.py')
+    assert resolver.resolve_from('pkg', 'sub', importer) == path('pkg/sub/__init__.py')
+    assert resolver.resolve_from('pkg.n', 'f', importer) == path('pkg/n.py')
+    assert resolver.resolve_from('.', 'missing', importer) == path('pkg/__init__.py')
+    assert resolver.resolve_from('missing', 'n', importer) is None
+
+
+def import_edges(files, tmp_path):
+    # Import edges of the built repository with the node names relative to its root
+    root = write_repo(str(tmp_path / 'r1'), files)
+    builder = SemanticGraphBuilder()
+    builder.build_from_one(root, str(tmp_path))
+    prefix = to_node(root) + '/'
+    return [(u[len(prefix):], v[len(prefix):]) for u, v, type in graph_edges(builder.graph) if type == 'Import']
+
+
+def test_builder_resolves_relative_package_imports(tmp_path):
+    edges = import_edges({
+        'pkg/__init__.py': '',
+        'pkg/m.py': 'from . import n\nfrom .n import f\n',
+        'pkg/n.py': 'def f():\n    pass\n',
+    }, tmp_path)
+    assert ('pkg/m.py', 'pkg/n.py') in edges
+    assert ('pkg/m.py', 'pkg/n.py/f') in edges
+
+
+def test_builder_resolves_packages_and_submodules(tmp_path):
+    edges = import_edges({
+        'app.py': 'import pkg\nfrom pkg import n\nfrom pkg.n import f\n',
+        'pkg/__init__.py': 'def g():\n    pass\n',
+        'pkg/n.py': 'def f():\n    pass\n',
+    }, tmp_path)
+    assert sorted(edges) == [('app.py', 'pkg/__init__.py'), ('app.py', 'pkg/n.py'), ('app.py', 'pkg/n.py/f')]
+
+
+def test_builder_looks_for_scripts_next_to_the_importer(tmp_path):
+    edges = import_edges({
+        'tools/run.py': 'import helper\nfrom helper import h\n',
+        'tools/helper.py': 'def h():\n    pass\n',
+    }, tmp_path)
+    assert sorted(edges) == [('tools/run.py', 'tools/helper.py'), ('tools/run.py', 'tools/helper.py/h')]
@@ -0,0 +1,34 @@
+import networkx as nx
+
+from conftest import graph_nodes, graph_edges
+from main import SemanticGraphBuilder
+from serialization import save_binary_graph, load_binary_graph
+
+
+def round_trip(graph, path, use_mmap=True):
+    # Graph saved in the binary format and loaded back
+    save_binary_graph(graph, path)
+    return load_binary_graph(path, use_mmap)
+
+
+def test_binary_round_trip_of_a_built_graph(sample_repo, save_folder, tmp_path):
+    builder = SemanticGraphBuilder()
+    builder.build_from_one(sample_repo, save_folder)
+    for use_mmap in (True, False):
+        loaded = round_trip(builder.graph, str(tmp_path / 'sample.sgb'), use_mmap)
+        assert list(loaded.nodes) == list(builder.graph.nodes)
+        assert graph_nodes(loaded) == graph_nodes(builder.graph)
+        assert graph_edges(loaded) == graph_edges(builder.graph)
+
+
+def test_binary_round_trip_of_all_value_kinds(tmp_path):
+    graph = nx.MultiDiGraph(name='kinds', version=3)
+    graph.add_node('a', count=1, big=2 ** 70, ratio=0.5, flag=True, empty=None, text='ü\n"x"', point=(1, 2))
+    graph.add_node('b', items=[1, 'two', (3, 4)], mapping={'k': 'v'}, point=(0, 0))
+    graph.add_edge('a', 'b', type='Invoke')
+    graph.add_edge('a', 'b', type='Import')
+    graph.add_edge('b', 'a', key='named', type='Ownership')
+    loaded = round_trip(graph, str(tmp_path / 'kinds.sgb'))
+    assert loaded.graph == graph.graph
+    assert graph_nodes(loaded) == graph_nodes(graph)
+    assert sorted(loaded.edges(keys=True, data=True)) == sorted(graph.edges(keys=True, data=True))
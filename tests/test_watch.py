@@ -0,0 +1,84 @@
+import os
+
+from conftest import SAMPLE_FILES, write_repo, remove_file, graph_nodes, graph_edges
+from incremental import IncrementalState
+from main import SemanticGraphBuilder
+from watch import GraphWatcher
+
+# Edits of the sample, one per rebuild: a new call in a body, a new function called from another file,
+# a new class with a parent, a removed file
+EDITS = [
+    {'pkg/helpers.py': SAMPLE_FILES['pkg/helpers.py'] + '''
+
+def whisper(text):
+    return shout(text).lower()
+'''},
+    {'app.py': SAMPLE_FILES['app.py'].replace("helpers.shout('done')", "helpers.whisper('done')")},
+    {'pkg/extra.py': '''\
+from pkg.models import Animal
+
+
+class Cat(Animal):
+    def speak(self):
+        return self.name
+'''},
+    'scripts/tool.py',
+]
+
+
+def test_watcher_rebuilds_match_full_builds(sample_repo, save_folder):
+    watcher = GraphWatcher(SemanticGraphBuilder(), sample_repo)
+    graph = watcher.start().graph
+    for edit in EDITS:
+        if isinstance(edit, str):
+            remove_file(sample_repo, edit)
+        else:
+            write_repo(sample_repo, edit)
+        watcher.poll()
+        snapshot = watcher.rebuild()
+        full = SemanticGraphBuilder()
+        full.build_from_one(sample_repo, save_folder)
+        assert snapshot.graph is graph  # The live graph is patched
+        assert graph_nodes(snapshot.graph) == graph_nodes(full.graph)
+        assert graph_edges(snapshot.graph) == graph_edges(full.graph)
+
+
+def test_watcher_survives_a_file_which_disappears(sample_repo, save_folder):
+    watcher = GraphWatcher(SemanticGraphBuilder(), sample_repo)
+    first = watcher.start()
+    build = watcher.builder.build
+
+    def build_once_without_a_file(*args, **kwargs):
+        # The first rebuild fails as if a file was replaced by an editor during the build
+        watcher.builder.build = build
+        raise FileNotFoundError('pkg/utils.py')
+
+    watcher.builder.build = build_once_without_a_file
+    write_repo(sample_repo, EDITS[0])
+    watcher.poll()
+    assert watcher.rebuild() is None
+    assert watcher.pending and watcher.version == first.version  # Kept for the next rebuild
+    snapshot = watcher.rebuild()
+    assert snapshot.version == first.version + 1 and not watcher.pending
+    full = SemanticGraphBuilder()
+    full.build_from_one(sample_repo, save_folder)
+    assert graph_edges(snapshot.graph) == graph_edges(full.graph)
+
+
+def test_compare_skips_files_which_disappeared(sample_repo):
+    state = IncrementalState()
+    files = [os.path.join(sample_repo, 'app.py'), os.path.join(sample_repo, 'gone.py')]
+    changed, removed, signatures, hashes = state.compare(files)
+    assert changed == files[:1] and removed == [] and list(signatures) == files[:1]
+
+
+def test_incremental_build_skips_files_which_disappeared(sample_repo, save_folder):
+    builder = SemanticGraphBuilder()
+    find_files = builder.find_files
+    builder.find_files = lambda path, relative='': find_files(path, relative) + [os.path.join(path, 'gone.py')]
+    state = IncrementalState()
+    builder.build_from_one(sample_repo, save_folder, incremental=state)
+    full = SemanticGraphBuilder()
+    full.build_from_one(sample_repo, save_folder)
+    assert graph_edges(builder.graph) == graph_edges(full.graph)
+    assert not [file for file in state.files if file.endswith('gone.py')]
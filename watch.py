@@ -0,0 +1,178 @@
+import json  # For the messages to the socket clients
+import os  # For the signatures of the files
+import socket  # For the local socket of the snapshots
+import threading  # For the clients of the socket
+import time  # For the polling and the debouncing
+from collections import namedtuple  # For the snapshots
+
+from incremental import IncrementalState, file_signature  # State of the last build kept in memory
+
+# Graph published after every rebuild: version - number of the rebuild, graph - the live graph of the builder
+# (it is patched in place by the next rebuild, so a caller which keeps a version copies it),
+# changed and removed - files which triggered the rebuild, elapsed - seconds from the rebuild start
+GraphSnapshot = namedtuple('GraphSnapshot', ['version', 'graph', 'changed', 'removed', 'elapsed'])
+
+
+class GraphWatcher:
+    # Long-running watch mode: the builder (with its parser and indexes) and the state of the last build
+    # stay in memory, the tree of the repository is polled for created, modified and deleted files
+    # (or the caller reports its own file system events with notify), the changes are debounced and the graph
+    # is patched in place: only the nodes and edges of the changed files are removed and added again, only the
+    # files depending on them get their imports, calls and parent classes resolved again.
+    # Every new graph is given to the callback and announced as a line of JSON to the clients of the local
+    # socket (with the path to the graph saved in the binary format if save_folder is given).
+    # Usage:
+    #   watcher = GraphWatcher(SemanticGraphBuilder(compact=True), path_to_repo, callback=print)
+    #   watcher.run()  # until watcher.stop() is called from another thread
+    def __init__(self, builder, path_to_repo, callback=None, save_folder=None, address=None,
+                 interval=0.2, debounce=0.1, workers=1):
+        self.builder = builder  # Builder which keeps the graph
+        self.path_to_repo = path_to_repo  # Watched repository
+        self.callback = callback  # Called with every GraphSnapshot
+        self.save_folder = save_folder  # Folder for the binary snapshots for the socket clients, None to skip
+        self.address = address  # (host, port) of the local socket, None to skip
+        self.interval = interval  # Seconds between the polls of the files
+        self.debounce = debounce  # Seconds without new changes before a rebuild
+        self.workers = workers  # Worker processes of the extraction
+        self.state = IncrementalState()  # State of the last build in memory
+        self.signatures = {}  # Path to the file -> signature seen by the last poll
+        self.version = 0  # Number of the published snapshots
+        self.last_change = None  # Time of the last seen change which is not built yet
+        self.pending = set()  # Changed (or reported) files which are not built yet
+        self.running = False
+        self.server = None  # Listening socket
+        self.clients = []  # Connected socket clients
+        self.lock = threading.Lock()  # Guards the clients and the reported events
+
+    def scan(self):
+        # Signatures of the files of the repository
+        signatures = {}
+        for file in self.builder.find_files(self.path_to_repo):
+            try:
+                signatures[file] = file_signature(file)
+            except OSError:
+                pass  # Deleted between the listing and the stat
+        return signatures
+
+    def poll(self):
+        # Compare the files with the last poll, remember the changed ones
+        signatures = self.scan()
+        changed = {file for file, signature in signatures.items() if self.signatures.get(file) != signature}
+        changed |= {file for file in self.signatures if file not in signatures}
+        self.signatures = signatures
+        if changed:
+            with self.lock:
+                self.pending |= changed
+                self.last_change = time.monotonic()
+        return changed
+
+    def notify(self, path):
+        # Report a created, modified or deleted file (e.g. from the events of an editor)
+        with self.lock:
+            self.pending.add(path)
+            self.last_change = time.monotonic()
+
+    def ready(self):
+        # Check if there are changes and none came during the debounce time
+        with self.lock:
+            return bool(self.pending) and time.monotonic() - self.last_change >= self.debounce
+
+    def rebuild(self):
+        # Build the graph again from the changes since the last build and publish it.
+        # If a file can't be read during the build (e.g. it was replaced by an editor in the meantime), nothing
+        # is published and None is returned, the changes are built again after the next poll
+        start = time.perf_counter()
+        with self.lock:
+            pending = self.pending
+            self.pending = set()
+        self.builder.path_to_repo = self.path_to_repo
+        try:
+            self.builder.build(self.save_folder, incremental=self.state, workers=self.workers)
+        except OSError:
+            with self.lock:
+                self.pending |= pending
+                self.last_change = time.monotonic()
+            return None
+        changed = sorted(file for file in pending if file in self.signatures)
+        removed = sorted(file for file in pending if file not in self.signatures)
+        self.version += 1
+        snapshot = GraphSnapshot(self.version, self.builder.graph, changed, removed, time.perf_counter() - start)
+        self.publish(snapshot)
+        return snapshot
+
+    def publish(self, snapshot):
+        # Give the snapshot to the callback and announce it to the socket clients
+        if self.callback is not None:
+            self.callback(snapshot)
+        if self.server is None:
+            return
+        message = {
+            'version': snapshot.version,
+            'repo': self.path_to_repo,
+            'nodes': snapshot.graph.number_of_nodes(),
+            'edges': snapshot.graph.number_of_edges(),
+            'changed': snapshot.changed,
+            'removed': snapshot.removed,
+            'elapsed': snapshot.elapsed
+        }
+        if self.save_folder is not None:
+            self.builder.save_graph(self.save_folder, 'binary')
+            message['graph'] = os.path.join(self.save_folder, f'{self.path_to_repo.split(chr(92))[-1]}.sgb')
+        data = (json.dumps(message) + '\n').encode('utf-8')
+        with self.lock:
+            for client in list(self.clients):
+                try:
+                    client.sendall(data)
+                except OSError:
+                    self.clients.remove(client)  # The client is gone
+                    client.close()
+
+    def serve(self):
+        # Accept the clients of the socket until the watcher stops
+        while self.running:
+            try:
+                client, _ = self.server.accept()
+            except OSError:
+                break  # The socket was closed
+            with self.lock:
+                self.clients.append(client)
+
+    def start(self):
+        # Build the first graph and open the socket
+        self.running = True
+        if self.address is not None:
+            self.server = socket.create_server(self.address)
+            threading.Thread(target=self.serve, daemon=True).start()
+        self.signatures = self.scan()
+        self.pending = set(self.signatures)
+        self.last_change = time.monotonic() - self.debounce
+        return self.rebuild()
+
+    def run(self):
+        # Watch the repository until stop() is called
+        if not self.running:
+            self.start()
+        try:
+            while self.running:
+                self.poll()
+                if self.ready():
+                    self.rebuild()
+                time.sleep(self.interval)
+        finally:
+            self.close()
+
+    def stop(self):
+        # Ask the loop of run() to finish
+        self.running = False
+
+    def close(self):
+        # Close the socket, its clients and the worker processes
+        self.running = False
+        if self.server is not None:
+            self.server.close()
+            self.server = None
+        with self.lock:
+            for client in self.clients:
+                client.close()
+            self.clients = []
+        self.builder.close_pool()